@@ -0,0 +1,6 @@
+# ===============================================
+# 🏁 BENCHMARKS
+# ===============================================
+# python -m bench.synthetic  – build a synthetic snapshot of the ten dashboard tables
+# python -m bench.run        – time every case study against it (see bench/run.py)
+# python -m bench.fetch      – row tuples vs Arrow batches on the widest pulls (see bench/fetch.py)
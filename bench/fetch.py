@@ -0,0 +1,191 @@
+# ===============================================
+# 🏹 FETCH PATH BENCHMARK – ROW TUPLES VS ARROW BATCHES
+# ===============================================
+# Times the dashboard's widest pulls through both fetch paths and reports rows/s and peak memory:
+#
+#   rows   – what db.read_sql did before: a tuple of Python objects per row, then
+#            DataFrame.from_records (db._fetch_rows)
+#   arrow  – column buffers filled a batch at a time, then Arrow -> pandas (db._fetch_arrow,
+#            see columnar.py)
+#
+# --source sqlserver runs both against PHONEPE_CONN_STR (the arrow path needs arrow-odbc).
+# Without a SQL Server, --source snapshot runs the same two shapes on the embedded DuckDB
+# engine over a synthetic snapshot: its row cursor vs its Arrow record batches.
+# Peak memory is the resident-set high-water mark over one fetch, in a fresh process per
+# measurement, so Arrow and ODBC buffers count as well as Python objects.
+#
+#   python -m bench.fetch --scale 10 --iterations 5
+#   python -m bench.fetch --source sqlserver --out bench/results/fetch.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from bench.run import ROOT, git_commit, peak_bytes, percentile
+
+PATHS = ["rows", "arrow"]
+
+
+def queries():
+    # the wide pulls: cube and insurance base frames, the Pincode leaderboard, the pincode tables
+    import cube
+    import insurance_store
+    import leaderboards
+
+    return {
+        "transaction_cube": cube.CUBE_SQL,
+        "insurance_store": insurance_store.STORE_SQL,
+        "leaderboard_pincode": leaderboards.LEADERBOARD_SQL.format(level="Pincode",
+                                                                   table=leaderboards.LEVELS["Pincode"]),
+        "top_pincode_transaction": "SELECT * FROM dbo.top_pincode_transaction",
+        "top_user_pincode": "SELECT * FROM dbo.top_user_pincode",
+    }
+
+
+# ---------- FETCH PATHS ----------
+def fetchers(source):
+    # -> {path: fn(sql) -> DataFrame}; a path that can't run here is left out
+    import columnar
+    import db
+
+    if source == "sqlserver":
+        out = {"rows": lambda sql: db._fetch_rows(sql, [])}
+        if columnar.available():
+            out["arrow"] = lambda sql: db._fetch_arrow(*columnar.bind(sql, []))
+        return out
+
+    import pandas as pd
+
+    import snapshot
+
+    engine = snapshot.get_engine()
+
+    def rows(sql):
+        cur = engine._con.cursor()
+        try:
+            cur.execute(sql)
+            columns = [d[0] for d in cur.description]
+            data = cur.fetchall()
+        finally:
+            cur.close()
+        return pd.DataFrame.from_records(data, columns=columns, coerce_float=True)
+
+    def arrow(sql):
+        cur = engine._con.cursor()
+        try:
+            reader = snapshot.arrow_reader(cur.execute(sql), db.CHUNK_ROWS)
+            return columnar.to_frame(list(reader), reader.schema)
+        finally:
+            cur.close()
+
+    return {"rows": rows, "arrow": arrow}
+
+
+# ---------- MEASURING ----------
+def measure_memory(source, path, name):
+    # runs in its own process (see _memory_run), so earlier fetches don't raise the high-water mark
+    fn = fetchers(source)[path]
+    sql = queries()[name]
+    # warm up on a one-row query: imports and connections, without leaving the allocator pages
+    # that the measured fetch would then reuse
+    fn("SELECT 1 AS x")
+    nbytes, method = peak_bytes(lambda: fn(sql))
+    print(json.dumps({"peak_bytes": nbytes, "method": method}))
+
+
+def _memory_run(source, path, name):
+    cmd = [sys.executable, "-m", "bench.fetch", "--source", source, "--memory", path, name]
+    if source == "snapshot":
+        cmd += ["--data", os.environ["PHONEPE_SNAPSHOT_DIR"]]
+    out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"memory run {path}/{name} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(source, iterations):
+    paths = fetchers(source)
+    missing = [p for p in PATHS if p not in paths]
+    if missing:
+        print(f"skipping {', '.join(missing)}: arrow-odbc is not available")
+    results = {}
+    for name, sql in queries().items():
+        results[name] = {}
+        for path, fn in paths.items():
+            fn(sql)                  # warm-up, discarded
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                df = fn(sql)
+                samples.append(time.perf_counter() - start)
+            p50 = percentile(samples, 50)
+            mem = _memory_run(source, path, name)
+            results[name][path] = {
+                "rows": len(df),
+                "p50_ms": round(p50 * 1000, 2),
+                "rows_per_s": round(len(df) / p50) if p50 else None,
+                "peak_mem_mb": round(mem["peak_bytes"] / 2**20, 2),
+                "frame_mb": round(df.memory_usage(index=True, deep=True).sum() / 2**20, 2),
+                "memory_method": mem["method"],
+            }
+            r = results[name][path]
+            print(f"{name:<24} {path:<6} {r['rows']:>10,} rows  p50 {r['p50_ms']:9.1f} ms  "
+                  f"{r['rows_per_s'] or 0:>12,} rows/s  peak {r['peak_mem_mb']:8.1f} MB")
+        if len(results[name]) == 2:
+            rows, arrow = results[name]["rows"], results[name]["arrow"]
+            speedup = rows["p50_ms"] / arrow["p50_ms"] if arrow["p50_ms"] else 0.0
+            print(f"{'':<24} arrow: {speedup:.2f}x rows/s, "
+                  f"peak {arrow['peak_mem_mb'] - rows['peak_mem_mb']:+.1f} MB")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare the pyodbc row fetch with the Arrow batch fetch")
+    ap.add_argument("--source", choices=["snapshot", "sqlserver"], default="snapshot")
+    ap.add_argument("--scale", type=int, default=1, help="multiple of the real Pulse row counts (snapshot)")
+    ap.add_argument("--data", default=None, help="synthetic snapshot dir (built if missing)")
+    ap.add_argument("--iterations", type=int, default=5)
+    ap.add_argument("--out", default=None, help="write results JSON here")
+    ap.add_argument("--memory", nargs=2, metavar=("PATH", "QUERY"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    if args.source == "snapshot":
+        data = Path(args.data or ROOT / "bench" / "data" / f"x{args.scale}")
+        # the app modules read these at import time
+        os.environ["PHONEPE_DATA_SOURCE"] = "snapshot"
+        os.environ["PHONEPE_SNAPSHOT_DIR"] = str(data)
+        if not args.memory and not (data / "_manifest.json").exists():
+            from bench import synthetic
+            synthetic.build(data, args.scale)
+
+    if args.memory:
+        measure_memory(args.source, *args.memory)
+        return
+
+    results = measure(args.source, args.iterations)
+    report = {
+        "meta": {
+            "source": args.source,
+            "scale": args.scale if args.source == "snapshot" else None,
+            "iterations": args.iterations,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "queries": results,
+    }
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
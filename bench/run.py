@@ -0,0 +1,307 @@
+# ===============================================
+# ⏱ CASE-STUDY BENCHMARK
+# ===============================================
+# Runs every page of the dashboard headlessly (streamlit.testing AppTest) against a synthetic
+# snapshot and times each one: the query phase (db.read_sql / read_sql_many / cube and insurance
+# store builds), the chart phase (plotly express, chart rendering, st.plotly_chart / st.image) and
+# the whole run.
+# Reports p50/p95 per phase and the peak resident memory of a run (measured in a fresh process
+# per case, so Arrow buffers and numpy arrays count as well as Python objects), and writes the
+# numbers as JSON so a change can be compared with a saved baseline.
+#
+#   python -m bench.run --scale 10 --iterations 20 --out bench/results/x10.json
+#   python -m bench.run --scale 10 --baseline bench/results/x10.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "test.py"
+
+# (name, sidebar page, case study prefix or None, extra widget settings {label: value})
+CASES = [
+    ("home", "Home", None, {}),
+    ("scenario1", "Analysis", "1.", {}),
+    ("scenario2", "Analysis", "2.", {}),
+    ("scenario3", "Analysis", "3.", {}),
+    ("scenario4_year", "Analysis", "4.", {}),
+    ("scenario4_district", "Analysis", "4.", {"Show top by": "District"}),
+    ("scenario4_pincode", "Analysis", "4.", {"Show top by": "Pincode"}),
+    ("scenario5", "Analysis", "5.", {}),
+]
+
+
+# ---------- PHASE TIMING ----------
+class PhaseClock:
+    # wall time during which at least one call of a phase was running (calls overlap across
+    # the query worker threads, so the intervals are merged rather than summed)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.intervals = {}
+
+    def wrap(self, phase, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.intervals.setdefault(phase, []).append((start, time.perf_counter()))
+        timed.__wrapped__ = fn
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.intervals = {}
+
+    def total(self, phase):
+        spans = sorted(self.intervals.get(phase, []))
+        total, cur_start, cur_end = 0.0, None, None
+        for s, e in spans:
+            if cur_end is None or s > cur_end:
+                if cur_end is not None:
+                    total += cur_end - cur_start
+                cur_start, cur_end = s, e
+            else:
+                cur_end = max(cur_end, e)
+        if cur_end is not None:
+            total += cur_end - cur_start
+        return total
+
+
+def instrument(clock):
+    import plotly.express as px
+    import streamlit as st
+
+    import charts
+    import cube
+    import db
+    import insurance_store
+    import leaderboards
+
+    for mod, names, phase in [
+        (db, ["read_sql", "read_sql_many"], "query"),
+        (cube, ["build_cube"], "query"),
+        (insurance_store, ["build_store"], "query"),
+        (leaderboards, ["build_leaderboard"], "query"),
+        (px, ["line", "bar", "pie", "choropleth"], "chart"),
+        (charts, ["render"], "chart"),
+        (st, ["plotly_chart", "image"], "chart"),
+    ]:
+        for name in names:
+            setattr(mod, name, clock.wrap(phase, getattr(mod, name)))
+
+
+# ---------- MEMORY ----------
+def _status_kb(field):
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    raise KeyError(field)
+
+
+def peak_bytes(fn):
+    # -> (bytes, method): resident-set high-water mark over fn() (Linux); elsewhere the traced
+    # Python heap only
+    try:
+        Path("/proc/self/clear_refs").write_text("5")     # resets VmHWM to the current RSS
+        before = _status_kb("VmRSS")
+        fn()
+        return max(_status_kb("VmHWM") - before, 0) * 1024, "rss"
+    except OSError:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak, "tracemalloc"
+
+
+# ---------- RUNNING ----------
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def _widget(at, label):
+    return next(w for w in list(at.radio) + list(at.selectbox) if w.label == label)
+
+
+def run_case(page, case, widgets):
+    # an AppTest already showing the wanted view; its next run() is the one that gets timed
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    if page != "Home":
+        _widget(at, "Go to").set_value(page)
+        at.run()
+        box = _widget(at, "Choose a Case Study")
+        box.set_value(next(o for o in box.options if o.startswith(case)))
+        at.run()
+    for label, value in widgets.items():
+        _widget(at, label).set_value(value)
+        at.run()
+    return at
+
+
+def measure(iterations, warm):
+    import cache
+
+    clock = PhaseClock()
+    instrument(clock)
+    results = {}
+    for name, page, case, widgets in CASES:
+        totals, queries, charts_ = [], [], []
+        for i in range(iterations + 1):        # first run warms imports and is discarded
+            at = run_case(page, case, widgets)
+            if not warm:
+                cache.invalidate()
+            clock.reset()
+            start = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - start
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].value}")
+            if i:
+                totals.append(elapsed)
+                queries.append(clock.total("query"))
+                charts_.append(clock.total("chart"))
+
+        mem = _memory_run(name, warm)
+        results[name] = {
+            "total": summarize(totals),
+            "query": summarize(queries),
+            "chart": summarize(charts_),
+            "peak_mem_mb": round(mem["peak_bytes"] / 2**20, 2),
+            "memory_method": mem["method"],
+        }
+        r = results[name]
+        print(f"{name:<20} total p50 {r['total']['p50_ms']:8.1f} p95 {r['total']['p95_ms']:8.1f} ms | "
+              f"query p50 {r['query']['p50_ms']:8.1f} | chart p50 {r['chart']['p50_ms']:8.1f} | "
+              f"peak {r['peak_mem_mb']:7.1f} MB")
+    return results
+
+
+def measure_memory(name, warm):
+    # runs in its own process (see _memory_run), so the other cases' runs don't raise the
+    # high-water mark; the navigation runs in run_case load the imports first
+    import cache
+
+    _, page, case, widgets = next(c for c in CASES if c[0] == name)
+    at = run_case(page, case, widgets)
+    if not warm:
+        cache.invalidate()
+    nbytes, method = peak_bytes(at.run)
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].value}")
+    print(json.dumps({"peak_bytes": nbytes, "method": method}))
+
+
+def _memory_run(name, warm):
+    cmd = [sys.executable, "-m", "bench.run", "--memory", name, "--data", os.environ["PHONEPE_SNAPSHOT_DIR"]]
+    if warm:
+        cmd.append("--warm")
+    out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"memory run {name} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline_path):
+    base = json.loads(Path(baseline_path).read_text())["cases"]
+    print(f"\nvs baseline {baseline_path} (p50, negative = faster)")
+    for name, r in results.items():
+        if name not in base:
+            continue
+        line = [f"{name:<20}"]
+        for phase in ["total", "query", "chart"]:
+            old, new = base[name][phase]["p50_ms"], r[phase]["p50_ms"]
+            pct = (new - old) / old * 100 if old else 0.0
+            line.append(f"{phase} {new - old:+8.1f} ms ({pct:+6.1f}%)")
+        print(" | ".join(line))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the dashboard case studies on synthetic data")
+    ap.add_argument("--scale", type=int, default=1, help="multiple of the real Pulse row counts")
+    ap.add_argument("--iterations", type=int, default=10)
+    ap.add_argument("--warm", action="store_true", help="keep caches between iterations")
+    ap.add_argument("--data", default=None, help="synthetic snapshot dir (built if missing)")
+    ap.add_argument("--out", default=None, help="write results JSON here")
+    ap.add_argument("--baseline", default=None, help="results JSON to compare against")
+    ap.add_argument("--memory", metavar="CASE", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    data = Path(args.data or ROOT / "bench" / "data" / f"x{args.scale}")
+    # the app modules read these at import time, so set them before anything imports db/snapshot
+    os.environ["PHONEPE_DATA_SOURCE"] = "snapshot"
+    os.environ["PHONEPE_SNAPSHOT_DIR"] = str(data)
+    os.environ.setdefault("PHONEPE_CHART_WORKERS", "0")
+    # test.py starts the warm-up and the neighbour prefetch on every run: cold numbers would
+    # include their work and warm ones would find caches they filled
+    os.environ["PHONEPE_WARMUP"] = "0"
+    os.environ["PHONEPE_PREFETCH_WORKERS"] = "0"
+    # cold mode calls cache.invalidate(), which clears the shared tier: keep it private to the run
+    # instead of wiping the dashboard's disk cache (or the Redis of a live deployment)
+    os.environ["PHONEPE_SHARED_CACHE"] = "memory"
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")   # bare-mode / deprecation chatter
+
+    from bench import synthetic
+    if not args.memory and not (data / "_manifest.json").exists():
+        synthetic.build(data, args.scale)
+
+    if args.memory:
+        measure_memory(args.memory, args.warm)
+        return
+
+    results = measure(args.iterations, args.warm)
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "iterations": args.iterations,
+            "warm": args.warm,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": results,
+    }
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.out}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
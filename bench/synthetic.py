@@ -0,0 +1,122 @@
+# ===============================================
+# 🧪 SYNTHETIC PULSE DATA
+# ===============================================
+# Reproduces the schema of the ten dashboard tables (schema.py) with random values, at a
+# multiple of the real PhonePe Pulse row counts, and publishes it as a local snapshot that the
+# embedded DuckDB engine serves (PHONEPE_DATA_SOURCE=snapshot). No SQL Server needed.
+#
+#   python -m bench.synthetic --scale 10 --out bench/data/x10
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from schema import COLUMNS, QUARTERS, STATES, YEARS
+
+TRANSACTION_TYPES = ["Recharge & bill payments", "Peer-to-peer payments", "Merchant payments",
+                     "Financial Services", "Others"]
+BRANDS = ["Xiaomi", "Samsung", "Vivo", "Oppo", "OnePlus", "Realme", "Apple", "Motorola", "Lenovo",
+          "Huawei", "Others", "Tecno", "Gionee", "Infinix", "Asus", "Micromax", "HMD Global",
+          "Lava", "COOLPAD", "Lyf"]
+INSURANCE_TYPES = ["Insurance"]
+DISTRICTS_PER_STATE = 22          # ~790 districts across India
+TOP_PER_QUARTER = 10              # Pulse "top" lists hold 10 entries per state and quarter
+
+
+def _keys(*levels):
+    # cartesian product of State × Year × Quarter × extra levels, as a DataFrame
+    grid = pd.MultiIndex.from_product([STATES, YEARS, QUARTERS, *levels[1::2]],
+                                      names=["State", "Year", "Quarter", *levels[0::2]])
+    return grid.to_frame(index=False)
+
+
+def _repeat(df, scale):
+    # scale > 1: each key gets `scale` rows (finer-grained sub-entries); the sums just grow
+    return df if scale == 1 else df.loc[df.index.repeat(scale)].reset_index(drop=True)
+
+
+def generate(scale=1, seed=0):
+    rng = np.random.default_rng(seed)
+    districts = [f"district-{i:02d}" for i in range(DISTRICTS_PER_STATE)]
+    ranks = list(range(TOP_PER_QUARTER))
+
+    def counts(n, hi):
+        return rng.integers(1, hi, size=n)
+
+    tables = {}
+
+    d = _repeat(_keys("Transaction_type", TRANSACTION_TYPES), scale)
+    d["Transaction_count"] = counts(len(d), 5_000_000)
+    d["Transaction_amount"] = d["Transaction_count"] * rng.uniform(50, 3000, len(d))
+    tables["aggregated_transaction"] = d
+
+    d = _repeat(_keys("user_brand", BRANDS), scale)
+    d["user_count"] = counts(len(d), 2_000_000)
+    d["user_percentage"] = rng.uniform(0, 0.3, len(d))
+    tables["aggregated_user"] = d
+
+    d = _repeat(_keys("insurance_type", INSURANCE_TYPES), scale)
+    d["insurance_count"] = counts(len(d), 50_000)
+    d["insurance_amount"] = d["insurance_count"] * rng.uniform(100, 2000, len(d))
+    tables["aggregated_insurance"] = d
+
+    d = _repeat(_keys("District", districts), scale)
+    d["District"] = d["State"] + "-" + d["District"]
+    d["m_registered_Users"] = counts(len(d), 500_000)
+    d["m_app_Opens"] = counts(len(d), 20_000_000)
+    tables["map_user"] = d
+
+    d = _repeat(_keys(), scale)
+    d["Transaction_count"] = counts(len(d), 50_000_000)
+    d["Transaction_amount"] = d["Transaction_count"] * rng.uniform(50, 3000, len(d))
+    tables["top_state_transaction"] = d
+
+    for level in ["District", "Pincode"]:
+        d = _repeat(_keys("rank", ranks), scale)
+        if level == "District":
+            d["District"] = d["State"] + "-district-" + rng.integers(0, DISTRICTS_PER_STATE, len(d)).astype(str)
+        else:
+            d["Pincode"] = rng.integers(110000, 855999, len(d))
+        d["Transaction_count"] = counts(len(d), 10_000_000)
+        d["Transaction_amount"] = d["Transaction_count"] * rng.uniform(50, 3000, len(d))
+        tables[f"top_{level.lower()}_transaction"] = d
+
+        u = _repeat(_keys("rank", ranks), scale)
+        u[level] = d[level].values
+        u["registeredUsers"] = counts(len(u), 1_000_000)
+        tables[f"top_user_{level.lower()}"] = u
+
+    d = _repeat(_keys(), scale)
+    d["registeredUsers"] = counts(len(d), 30_000_000)
+    tables["top_user_state"] = d
+
+    return {name: tables[name][cols] for name, cols in COLUMNS.items()}
+
+
+def build(out, scale=1, seed=0):
+    out = Path(out)
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    start = time.perf_counter()
+    rows = {}
+    for name, df in generate(scale, seed).items():
+        rows[name] = snapshot.write_table(df, tmp, name)
+        print(f"{name:<28} {rows[name]:>10,} rows")
+    snapshot.publish(tmp, out, {"exported_at": time.time(), "source": "synthetic", "scale": scale,
+                                "seed": seed, "rows": rows})
+    print(f"Synthetic snapshot (x{scale}) written to {out} in {time.perf_counter() - start:.2f}s")
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build a synthetic PhonePe Pulse snapshot")
+    ap.add_argument("--scale", type=int, default=1, help="multiple of the real Pulse row counts")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="snapshot directory (default bench/data/x<scale>)")
+    args = ap.parse_args()
+    build(args.out or Path(__file__).resolve().parent / "data" / f"x{args.scale}", args.scale, args.seed)
@@ -0,0 +1,384 @@
+# ===============================================
+# 🗃 QUERY RESULT CACHE – TTL + LRU UNDER A MEMORY BUDGET
+# ===============================================
+
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+import shared_cache
+from datasets import view
+
+# ---------- SETTINGS ----------
+# Keys carry the data version of the tables they read (see DataVersions), so by default an
+# entry lives until that data changes; a finite TTL only caps it further.
+CACHE_TTL = float(os.environ.get("PHONEPE_CACHE_TTL", "inf"))           # default seconds a result stays fresh
+LOOKUP_TTL = float(os.environ.get("PHONEPE_LOOKUP_TTL", "inf"))         # selector domains (DISTINCT State/Year ...)
+CACHE_MB = float(os.environ.get("PHONEPE_CACHE_MB", "256"))            # memory budget for all cached frames
+
+_WS = re.compile(r"\s+")
+_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    # whitespace/indentation and a trailing ';' don't change the query
+    return _WS.sub(" ", sql).strip().rstrip(";").strip()
+
+
+@lru_cache(maxsize=1024)
+def tables_in(sql):
+    return frozenset(t.lower() for t in _TABLES.findall(sql))
+
+
+def _years(years):
+    return None if years is None else frozenset(int(y) for y in years)
+
+
+def _affected(entry_tables, entry_years, tables, years):
+    if tables is not None and not entry_tables & tables:
+        return False
+    return years is None or entry_years is None or bool(entry_years & years)
+
+
+def frame_bytes(df):
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+
+# ---------- BACKGROUND WORK ----------
+# Prefetch and warm-up fill the caches ahead of the sessions. Entries the prefetcher creates
+# are counted, and so is the first time a session actually uses one (the prefetch hit rate).
+_background = contextvars.ContextVar("phonepe_background", default=None)
+
+
+@contextmanager
+def background(kind="prefetch"):
+    token = _background.set(kind)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def in_background():
+    return _background.get() is not None
+
+
+def _prefetching():
+    return _background.get() == "prefetch"
+
+
+class ResultCache:
+    def __init__(self, max_bytes=int(CACHE_MB * 1024 * 1024), default_ttl=CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (df, nbytes, expires_at, tables, years); least recently used first
+        self._latest = {}               # (sql, values) -> key of its most recent entry
+        self._prefetched = set()        # keys put in the background and not used by a session yet
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidated": 0, "stale_served": 0,
+                       "prefetched": 0, "prefetch_hits": 0}
+
+    @staticmethod
+    def make_key(sql, values=(), years=None):
+        sql = normalize_sql(sql)
+        return sql, tuple(values), data_versions.of(tables_in(sql), years)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            df, nbytes, expires_at, _, _ = entry
+            if expires_at <= time.monotonic():
+                # expired entries stay (under the memory budget) as the stale fallback, see get_stale
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            if key in self._prefetched and not in_background():
+                self._prefetched.discard(key)
+                self._stats["prefetch_hits"] += 1
+        # callers post-process their frames in place, so never hand out the cached one itself:
+        # a copy-on-write view shares its arrays until the caller writes to a column
+        return view(df)
+
+    def put(self, key, df, ttl=None, years=None):
+        # years: the Year values the result is restricted to (None = it depends on every year)
+        ttl = self.default_ttl if ttl is None else ttl
+        nbytes = frame_bytes(df)
+        if ttl <= 0 or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            # replaces this query's result for an older data version, if any
+            for old in {key, self._latest.get(key[:2])}:
+                if old in self._entries:
+                    self._drop(old)
+            self._latest[key[:2]] = key
+            if _prefetching():
+                self._prefetched.add(key)
+                self._stats["prefetched"] += 1
+            # the caller keeps working on `df`, so it must only get views of it (see db.read_sql)
+            self._entries[key] = (df, nbytes, time.monotonic() + ttl, tables_in(key[0]), _years(years))
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _drop(self, key):
+        _, nbytes, _, _, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+        self._prefetched.discard(key)
+        if self._latest.get(key[:2]) == key:
+            del self._latest[key[:2]]
+
+    def get_stale(self, key):
+        # the last result cached for the same SQL and values, whatever its age or data version:
+        # what db.read_sql serves when a query runs past its latency budget
+        with self._lock:
+            entry = self._entries.get(self._latest.get(key[:2]))
+            if entry is None:
+                return None
+            self._stats["stale_served"] += 1
+        return view(entry[0])
+
+    def invalidate(self, tables=None, years=None):
+        # no tables -> everything (e.g. after a full data load); with years, entries restricted
+        # to other years stay fresh (e.g. after a one-quarter refresh). Invalidated entries are
+        # only marked expired: they are never served as fresh again, but remain the stale
+        # fallback until the LRU evicts them.
+        wanted = None if tables is None else {t.lower().split(".")[-1] for t in tables}
+        years = _years(years)
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e[2] > 0 and _affected(e[3], e[4], wanted, years)]
+            for k in keys:
+                df, nbytes, _, t, y = self._entries[k]
+                self._entries[k] = (df, nbytes, 0.0, t, y)
+            self._stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+            s["bytes"] = self._bytes
+            s["max_bytes"] = self.max_bytes
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+
+# ---------- DATA VERSIONS ----------
+# db.check_refresh probes every table (ETL watermarks or checksums per Year) and records a token
+# per (table, year). Cache keys include the tokens of the tables – and, for a query bound to one
+# year, just that year – they were built from, so a changed table is never served stale.
+class DataVersions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}        # table -> {year: token}
+
+    def of(self, tables, years=None):
+        years = _years(years)
+        with self._lock:
+            out = []
+            for t in sorted(t.lower().split(".")[-1] for t in tables):
+                per_year = self._tokens.get(t)
+                if per_year is None:
+                    out.append((t, None))
+                elif years is None:
+                    out.append((t, tuple(sorted(per_year.items()))))
+                else:
+                    out.append((t, tuple((y, per_year.get(y)) for y in sorted(years))))
+            return tuple(out)
+
+    def update(self, tokens):
+        # tokens: {table: {year: token}} -> {table: [years whose token changed]}
+        changed = {}
+        with self._lock:
+            for table, per_year in tokens.items():
+                old = self._tokens.get(table)
+                if old is not None and old != per_year:
+                    changed[table] = sorted(y for y in set(old) | set(per_year) if old.get(y) != per_year.get(y))
+                self._tokens[table] = per_year
+        return changed
+
+    def snapshot(self):
+        with self._lock:
+            return {t: dict(v) for t, v in self._tokens.items()}
+
+
+data_versions = DataVersions()
+
+
+# ---------- DERIVED OBJECTS ----------
+# Rollups, lookup structures, figures ... built from query results. They are small and
+# shared read-only, so there is no memory budget or copying; they go when their tables do.
+class DerivedCache:
+    def __init__(self, default_ttl=CACHE_TTL):
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = {}       # key -> (value, expires_at, tables, years)
+        self._building = {}      # key -> [lock, users], so one session builds while the others wait
+        self._prefetched = set()
+        self._stats = {"hits": 0, "builds": 0, "invalidated": 0, "prefetched": 0, "prefetch_hits": 0}
+
+    def get(self, key, tables, build, ttl=None, years=None, shared=False):
+        # shared: the value also goes to the tier every worker process reads (see shared_cache.py);
+        # for frames and figures, not for objects that are quick to rebuild from those
+        key = (key, data_versions.of(tables, years))
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            building = self._building.setdefault(key, [threading.Lock(), 0])
+            building[1] += 1
+        try:
+            with building[0]:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                return self._build(key, tables, build, ttl, years, shared)
+        finally:
+            # the last one out drops the key's lock: keys change with every data version
+            with self._lock:
+                building[1] -= 1
+                if not building[1]:
+                    del self._building[key]
+
+    def _build(self, key, tables, build, ttl, years, shared):
+        ttl = self.default_ttl if ttl is None else ttl
+        value = shared_cache.get(key) if shared else None
+        if value is None:
+            value = build()
+            if shared:
+                shared_cache.put(key, value, ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl, frozenset(t.lower() for t in tables),
+                                  _years(years))
+            self._stats["builds"] += 1
+            if _prefetching():
+                self._prefetched.add(key)
+                self._stats["prefetched"] += 1
+        return value
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._stats["hits"] += 1
+            if key in self._prefetched and not in_background():
+                self._prefetched.discard(key)
+                self._stats["prefetch_hits"] += 1
+            return entry[0]
+
+    def invalidate(self, tables=None, years=None):
+        wanted = None if tables is None else {t.lower().split(".")[-1] for t in tables}
+        years = _years(years)
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if _affected(e[2], e[3], wanted, years)]
+            for k in keys:
+                del self._entries[k]
+                self._prefetched.discard(k)
+            self._stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+        return s
+
+
+# ---------- SINGLE FLIGHT ----------
+# Sessions opening the same page at the same time miss the cache together. The first caller
+# for a key starts the query; the others join it and share its result (or its error), so a
+# burst of identical queries costs one round-trip. Callers may stop waiting early (timeout,
+# rerun, stale result served – see db.read_sql); leave() tells the last one to go.
+class _Call:
+    def __init__(self, key):
+        self.key = key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.statement = None    # set by the leader, so the last waiter can cancel it
+        self.stages = {}         # metrics stage timings of the execution
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}         # key -> _Call in flight
+        self._stats = {"executed": 0, "coalesced": 0, "abandoned": 0}
+
+    def join(self, key):
+        # -> (call, leader): the leader starts the work and reports it with finish()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(key)
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+            call.waiters += 1
+        return call, leader
+
+    def leave(self, call, abandon=True):
+        # a caller stops waiting; True when nobody waits anymore and (abandon) the work can stop.
+        # An abandoned call is forgotten, so the next caller starts over instead of joining it.
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters or call.done.is_set() or not abandon:
+                return False
+            if self._calls.get(call.key) is call:
+                del self._calls[call.key]
+            self._stats["abandoned"] += 1
+            return True
+
+    def finish(self, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(call.key) is call:
+                del self._calls[call.key]
+        call.result, call.error = result, error
+        call.done.set()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["in_flight"] = len(self._calls)
+        return s
+
+
+# ---------- PROCESS-WIDE CACHE ----------
+query_cache = ResultCache()
+derived = DerivedCache()
+inflight = SingleFlight()
+
+
+def invalidate(tables=None, years=None):
+    # reaches the shared tier too, so no worker reads an invalidated entry from there
+    if tables is None:
+        shared_cache.clear()
+    else:
+        shared_cache.invalidate(tables, years)
+    derived.invalidate(tables, years)
+    return query_cache.invalidate(tables, years)
+
+
+def cache_stats():
+    s = query_cache.stats()
+    s["single_flight"] = inflight.stats()
+    s["shared"] = shared_cache.stats()
+    return s
@@ -0,0 +1,193 @@
+# ===============================================
+# 🖼 SERVER-SIDE MATPLOTLIB RENDERING (SCENARIO 2)
+# ===============================================
+# Scenario 2's matplotlib/seaborn charts are drawn with the object-oriented Figure API (no
+# pyplot global state, so concurrent sessions can't trample each other) in a small process
+# pool. The PNG/SVG bytes are cached on a hash of the input data + style + format, so a
+# repeat view is a cache lookup (in every worker process, see shared_cache.py), and every Figure
+# is dropped as soon as it has been saved.
+
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cache import derived
+
+CHART_WORKERS = int(os.environ.get("PHONEPE_CHART_WORKERS", "2"))   # 0 = render in the calling thread
+CHART_DPI = 200                                                     # what st.pyplot used to save at
+STYLE = "dark_background"
+
+
+def human_format(x, pos=None):
+    if x >= 1_000_000_000:
+        return f"{x/1_000_000_000:.2f}B"
+    if x >= 1_000_000:
+        return f"{x/1_000_000:.2f}M"
+    if x >= 1_000:
+        return f"{x/1_000:.1f}K"
+    return f"{int(x)}"
+
+
+def human_format_units(num):
+    num = float(num)
+    for unit in ['', 'K', 'M', 'B', 'T']:
+        if abs(num) < 1000.0:
+            return f"{num:.1f}{unit}"
+        num /= 1000.0
+    return f"{num:.1f}P"
+
+
+def _new_figure(figsize):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    fig.patch.set_alpha(0)
+    ax.patch.set_alpha(0)
+    return fig, ax
+
+
+# ---------- CHARTS ----------
+def brand_users_bars(brands, users, top_n):
+    from matplotlib.ticker import FuncFormatter
+
+    phonepe_colors = ["#7E57C2", "#5E35B1", "#26C6DA", "#4E79A7", "#59A14F",
+                      "#AB47BC", "#8E24AA", "#6A1B9A"]
+    fig, ax = _new_figure((10, 7))
+
+    # horizontal bars, largest on top
+    y_pos = range(len(brands))
+    colors = (phonepe_colors * ((len(brands) // len(phonepe_colors)) + 1))[:len(brands)]
+    bars = ax.barh(y_pos, users, color=colors, edgecolor='white', height=0.7)
+    ax.invert_yaxis()
+    ax.xaxis.set_major_formatter(FuncFormatter(human_format))
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(brands, fontsize=11, color='white')
+    ax.set_xlabel("Total Users", fontsize=12, color='white')
+    ax.set_title("Total Users by Device Brand (Top {})".format(top_n), fontsize=16, color='white')
+    ax.grid(False)
+
+    ax.spines['bottom'].set_color('white')
+    ax.spines['left'].set_color('white')
+    ax.tick_params(axis='x', colors='white')
+    ax.tick_params(axis='y', colors='white')
+
+    # annotate values at the end of bars
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width + max(users) * 0.005, bar.get_y() + bar.get_height()/2,
+                human_format(width), va='center', ha='left', fontsize=9, color='white', weight='bold', clip_on=False)
+
+    fig.tight_layout()
+    return fig
+
+
+def registered_users_bars(states, registered):
+    import pandas as pd
+    import seaborn as sns
+
+    top10 = pd.DataFrame({"State": states, "registered_users": registered})
+    fig, ax = _new_figure((5, 3))
+
+    sns.barplot(data=top10, x='registered_users', y='State', palette='viridis', ax=ax)
+    ax.set_title("Top 10 States — Registered Users", fontsize=12)
+    ax.set_xlabel("Registered Users", fontsize=10)
+    ax.set_ylabel("")
+    ax.tick_params(axis='y', labelsize=7)
+    ax.tick_params(axis='x', labelsize=5)
+
+    # annotation slightly (2%) to the RIGHT of each bar
+    for bar in ax.patches:
+        width = bar.get_width()
+        y = bar.get_y() + bar.get_height() / 2
+        ax.text(width + (width * 0.02), y, human_format_units(width), va='center', ha='left', fontsize=5, fontweight='bold')
+    return fig
+
+
+def app_opens_donut(states, app_opens):
+    from matplotlib.patches import Circle
+
+    phonepe_colors = [
+        "#7E57C2", "#5E35B1", "#A966A9", "#4E79A7", "#DB55CB",
+        "#AB47BC", "#8E24AA", "#6A1B9A", "#EFDFEE", "#4B2C5E", "#500845"
+    ]
+    fig, ax = _new_figure((4, 4))
+
+    # percentage only inside the donut
+    wedges, texts, autotexts = ax.pie(
+        app_opens,
+        labels=None,
+        autopct=lambda pct: f"{pct:.1f}%",
+        pctdistance=0.75,
+        startangle=90,
+        wedgeprops=dict(width=0.45),
+        colors=phonepe_colors,
+    )
+    for t in autotexts:
+        t.set(size=8, weight="bold", color="black")
+
+    ax.legend(wedges, states, title="State", bbox_to_anchor=(1.05, 1), loc="upper left", fontsize=6)
+    ax.add_artist(Circle((0, 0), 0.45, fc="black"))
+    ax.set_title("State Share by App Opens", fontsize=12)
+    return fig
+
+
+CHARTS = {
+    "brand_users": brand_users_bars,
+    "registered_users": registered_users_bars,
+    "app_opens": app_opens_donut,
+}
+
+
+# ---------- RENDERING ----------
+def render_bytes(name, args, style=STYLE, fmt="png"):
+    # runs in a worker process (or inline); only plain data crosses the process boundary
+    from matplotlib import style as mpl_style
+
+    with mpl_style.context(style):
+        fig = CHARTS[name](*args)
+        buf = io.BytesIO()
+        try:
+            fig.savefig(buf, format=fmt, dpi=CHART_DPI, bbox_inches="tight")
+        finally:
+            fig.clear()
+            del fig
+    return buf.getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: forking the threaded Streamlit server can copy a lock (logging,
+                # caches, ...) held by another thread into the child, which then deadlocks on it
+                _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _render(name, args, style, fmt):
+    global _pool
+    if CHART_WORKERS > 0:
+        try:
+            return _get_pool().submit(render_bytes, name, args, style, fmt).result()
+        except BrokenProcessPool:
+            # worker died (e.g. OOM): start a fresh pool next time, render here rather than fail the page
+            _pool = None
+    return render_bytes(name, args, style, fmt)
+
+
+def render(name, *args, tables=(), style=STYLE, fmt="png"):
+    digest = hashlib.sha1(pickle.dumps((args, style, fmt))).hexdigest()
+    return derived.get(("chart", name, digest), tables, lambda: _render(name, args, style, fmt), shared=True)
@@ -0,0 +1,105 @@
+# ===============================================
+# 🏹 COLUMNAR FETCH – RESULT SETS STRAIGHT INTO ARROW BATCHES
+# ===============================================
+# pyodbc hands a result set over row by row: every value becomes a Python object in a tuple,
+# and pandas then walks those tuples again, column by column, to build the frame. For the wide
+# pulls (the cube and insurance base frames, the Year × name leaderboards, the pincode tables)
+# that is most of the client time. arrow-odbc binds one buffer per column instead and fills it a
+# batch of rows per round-trip; the batches are Arrow arrays, and pandas adopts them without a
+# copy where the dtype allows (numbers without NULLs, strings as Arrow-backed `str`).
+#
+# Needs `arrow-odbc` (which needs the unixODBC driver manager off Windows) and `pyarrow`.
+# Without them, or with PHONEPE_ARROW_FETCH=0, db.py keeps the pyodbc path.
+
+import logging
+import os
+import re
+from functools import lru_cache
+
+ARROW_FETCH = os.environ.get("PHONEPE_ARROW_FETCH", "1") == "1"
+MAX_TEXT_SIZE = 4000       # bound for (N)VARCHAR(MAX) columns; the dashboard's text columns are short labels
+
+# arrow-odbc binds every parameter as VARCHAR; the typed ones are cast back, so `TOP (?)` and
+# comparisons on numeric columns see the type pyodbc would have bound
+_PLACEHOLDER = {int: "CAST(? AS BIGINT)", float: "CAST(? AS FLOAT)"}
+_LINK_ERROR = re.compile(r"State: (08|HYT)")
+
+log = logging.getLogger("phonepe.columnar")
+
+
+@lru_cache(maxsize=1)
+def available():
+    if not ARROW_FETCH:
+        return False
+    try:
+        import arrow_odbc  # noqa: F401
+        import pyarrow  # noqa: F401
+    except (ImportError, OSError) as e:
+        # OSError: the package is there but the ODBC driver manager library isn't
+        log.info("columnar fetch unavailable, using pyodbc rows: %s", e)
+        return False
+    return True
+
+
+# ---------- CONNECTIONS ----------
+def connect(conn_str):
+    import arrow_odbc
+
+    return arrow_odbc.connect(conn_str, autocommit=True)
+
+
+def ping(conn):
+    try:
+        conn.execute("SELECT 1")
+        return True
+    except Exception:
+        return False
+
+
+def errors():
+    import arrow_odbc
+
+    return (arrow_odbc.Error,)
+
+
+def link_error(e):
+    # connection-level failures (SQLSTATE 08xxx, HYT timeouts) – what pyodbc raises as
+    # OperationalError; arrow-odbc has one error type for everything
+    return isinstance(e, errors()) and bool(_LINK_ERROR.search(str(e)))
+
+
+# ---------- READING ----------
+def bind(qmark, values):
+    # -> (sql, [str | None]), or None when the placeholders can't be matched to the values
+    parts = qmark.split("?")
+    if len(parts) != len(values) + 1:
+        return None
+    sql = parts[0]
+    for v, rest in zip(values, parts[1:]):
+        sql += _PLACEHOLDER.get(type(v), "?") + rest
+    return sql, [None if v is None else str(v) for v in values]
+
+
+def _float_decimals(schema):
+    # DECIMAL columns come back as float64, as with pyodbc + coerce_float
+    import pyarrow as pa
+
+    return pa.schema([f.with_type(pa.float64()) if pa.types.is_decimal(f.type) else f for f in schema])
+
+
+def read(conn, sql, params, batch_size, timeout=None):
+    # -> arrow-odbc BatchReader: iterate it for pyarrow RecordBatches; `.schema` is known up front
+    return conn.read_arrow_batches(sql, batch_size=batch_size, parameters=params,
+                                   max_text_size=MAX_TEXT_SIZE, map_schema=_float_decimals,
+                                   query_timeout_sec=timeout)
+
+
+def to_frame(batches, schema):
+    # consumes `batches`. split_blocks keeps each column its own block, so a column can wrap its
+    # Arrow buffer instead of being copied into a consolidated 2-D block; self_destruct frees
+    # each Arrow column as soon as it is converted, so the result isn't held twice at the peak
+    import pyarrow as pa
+
+    table = pa.Table.from_batches(batches, schema=schema)
+    del batches[:]
+    return table.to_pandas(split_blocks=True, self_destruct=True)
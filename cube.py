@@ -0,0 +1,99 @@
+# ===============================================
+# 🧊 TRANSACTION ROLLUP CUBE – State × Year × Quarter × Transaction_type
+# ===============================================
+# Scenario 1 (Q1–Q4 + selectors), the Home map and Scenario 4's Year trend are all slices of
+# dbo.aggregated_transaction. The cube is read once at its finest grain (count and amount are
+# additive), the marginal totals are precomputed, and every slice is answered in memory.
+
+import pandas as pd
+
+import datasets
+from cache import derived
+
+SOURCE_TABLE = "aggregated_transaction"
+CUBE_SQL = """
+SELECT State, Year, Quarter, Transaction_type,
+       SUM(Transaction_count) AS Transaction_count, SUM(Transaction_amount) AS Transaction_amount
+FROM dbo.aggregated_transaction
+GROUP BY State, Year, Quarter, Transaction_type
+"""
+MEASURES = ["Transaction_count", "Transaction_amount"]
+
+
+class TransactionCube:
+    def __init__(self, base):
+        # `base` is this cube's own view of the shared dataset (copy-on-write, see datasets.py)
+        base["Transaction_amount"] = pd.to_numeric(base["Transaction_amount"], errors="coerce").fillna(0)
+        base["Transaction_count"] = pd.to_numeric(base["Transaction_count"], errors="coerce").fillna(0)
+        self.base = base
+
+        def rollup(*dims):
+            return base.groupby(list(dims), observed=True)[MEASURES].sum().sort_index()
+
+        # marginal totals for every slice the dashboard asks for
+        self.by_state = rollup("State")
+        self.by_year = rollup("Year")
+        self.by_state_year = rollup("State", "Year")
+        self.by_year_state = rollup("Year", "State")
+        self.by_state_year_quarter = rollup("State", "Year", "Quarter")
+        self.by_state_year_type = rollup("State", "Year", "Transaction_type")
+
+    @staticmethod
+    def _slice(frame, key):
+        try:
+            return frame.loc[key]
+        except KeyError:
+            return frame.iloc[0:0].droplevel(list(range(len(key) if isinstance(key, tuple) else 1)))
+
+    # ---------- selectors ----------
+    def states(self):
+        return self.by_state.index.tolist()
+
+    def years(self):
+        return self.by_year.index.tolist()
+
+    # ---------- Home ----------
+    def state_totals(self):
+        # State, Total_Transaction_Amount (largest first)
+        return (self.by_state["Transaction_amount"].rename("Total_Transaction_Amount")
+                .reset_index().sort_values("Total_Transaction_Amount", ascending=False, ignore_index=True))
+
+    # ---------- Scenario 1 ----------
+    def state_trend(self, state):
+        # Q1: Year, total_transaction_count, total_transaction_amount
+        d = self._slice(self.by_state_year, state)
+        return d.rename(columns={"Transaction_count": "total_transaction_count",
+                                 "Transaction_amount": "total_transaction_amount"}).reset_index()
+
+    def quarters(self, state, year):
+        # Q2: Quarter, Total_Transaction_Count, Total_Transaction_Amount
+        d = self._slice(self.by_state_year_quarter, (state, year))
+        return d.rename(columns={"Transaction_count": "Total_Transaction_Count",
+                                 "Transaction_amount": "Total_Transaction_Amount"}).reset_index()
+
+    def categories(self, state, year):
+        # Q3: Transaction_type, Count, Amount
+        d = self._slice(self.by_state_year_type, (state, year))
+        return d.rename(columns={"Transaction_count": "Count", "Transaction_amount": "Amount"}).reset_index()
+
+    def top_states(self, year, n=5):
+        # Q4: State, Transaction_amount
+        d = self._slice(self.by_year_state, year)["Transaction_amount"]
+        return d.nlargest(n).reset_index()
+
+    # ---------- Scenario 4 ----------
+    def year_totals(self, year=None):
+        # Year, total_amount (largest first); a single row when a year is selected
+        d = self.by_year["Transaction_amount"].rename("total_amount")
+        if year is not None:
+            d = d[d.index == year]
+        return d.reset_index().sort_values("total_amount", ascending=False, ignore_index=True)
+
+
+def build_cube():
+    return TransactionCube(datasets.load("transaction_cube", CUBE_SQL, [SOURCE_TABLE]))
+
+
+def get_cube():
+    # one cube per process, rebuilt after the cache TTL or when the source table is invalidated
+    return derived.get("transaction_cube", [SOURCE_TABLE], build_cube)
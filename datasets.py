@@ -0,0 +1,104 @@
+# ===============================================
+# 🧊 SHARED DATASETS – ONE COMPACT, READ-ONLY COPY PER PROCESS
+# ===============================================
+# A source frame is loaded once per process and data version, its columns downcast
+# (categoricals for the repeated labels, small ints for Year/Quarter/Pincode), and the shared
+# frame itself is never handed out. Sessions get views instead of copies: with pandas
+# copy-on-write a view shares the arrays until the session modifies a column, and only that
+# column is copied, so no session can change what the others see. The query cache stores and
+# hands out its frames the same way (see cache.ResultCache), without the compaction.
+
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLS = ("State", "District", "Transaction_type", "user_brand", "insurance_type")
+INT_COLS = {"Year": "int16", "Quarter": "int8", "Pincode": "int32"}
+# pandas >= 3 always copies on write; on older pandas a view has to be a real copy ("warn" only
+# warns about writes through views, it doesn't copy)
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+# ---------- COMPACTION ----------
+def compact(df):
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORY_COLS and not isinstance(s.dtype, pd.CategoricalDtype):
+            # only worth it when labels repeat (a 10-row TOP list stays as it is)
+            if len(s) and s.nunique(dropna=False) <= len(s) // 2:
+                s = s.astype("category")
+        elif col in INT_COLS:
+            n = s if pd.api.types.is_numeric_dtype(s) else pd.to_numeric(s, errors="coerce")
+            info = np.iinfo(INT_COLS[col])
+            if len(n) and n.notna().all() and (n % 1 == 0).all() and n.min() >= info.min and n.max() <= info.max:
+                s = n.astype(INT_COLS[col])
+        out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def view(df):
+    # no flag on the arrays: a view may outlive the shared frame (eviction, new data version)
+    # and then owns them, so in-place writes on it have to keep working
+    return df.copy(deep=not COPY_ON_WRITE)
+
+
+def nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# ---------- REGISTRY ----------
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = {}        # name -> (weakref to the shared frame, raw bytes, built_at)
+
+    def load(self, name, sql, tables, params=None, years=None):
+        import db
+        from cache import derived
+
+        def build():
+            # ttl=0: the shared frame is the only copy, the raw result isn't cached as well
+            raw = db.read_sql(sql, params, ttl=0, name=name)
+            df = compact(raw)
+            with self._lock:
+                self._frames[name] = (weakref.ref(df), nbytes(raw), time.time())
+            return df
+
+        key = ("dataset", name, tuple(sorted((params or {}).items())))
+        # another worker process may have built it (see shared_cache.py); then the raw size is unknown
+        df = derived.get(key, tables, build, years=years, shared=True)
+        with self._lock:
+            ref = self._frames.get(name)
+            if ref is None or ref[0]() is not df:
+                self._frames[name] = (weakref.ref(df), None, time.time())
+        return view(df)
+
+    def report(self):
+        # per-dataset footprint of the frames currently shared (dropped ones are skipped)
+        with self._lock:
+            items = list(self._frames.items())
+        out = {}
+        for name, (ref, raw, built_at) in items:
+            df = ref()
+            if df is None:
+                continue
+            size = nbytes(df)
+            out[name] = {"rows": len(df), "bytes": size, "raw_bytes": raw,
+                         "saved": round(1 - size / raw, 3) if raw else None,
+                         "built": time.strftime("%H:%M:%S", time.localtime(built_at))}
+        return out
+
+
+registry = Registry()
+
+
+def load(name, sql, tables, params=None, years=None):
+    return registry.load(name, sql, tables, params, years)
+
+
+def report():
+    return registry.report()
@@ -0,0 +1,795 @@
+# ===============================================
+# 🔌 DATABASE ACCESS – POOLED SQL SERVER CONNECTIONS
+# ===============================================
+
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pandas as pd
+
+import columnar
+import datasets
+import metrics
+import shared_cache
+import snapshot
+from cache import data_versions, frame_bytes, in_background, inflight, invalidate, query_cache, tables_in
+from datasets import view
+from schema import TABLES
+
+# ---------- SETTINGS ----------
+CONN_STR = os.environ.get(
+    "PHONEPE_CONN_STR",
+    r"DRIVER={ODBC Driver 17 for SQL Server};"
+    r"SERVER=VIGNESH\SQLEXPRESS;"
+    r"DATABASE=phonepe;"
+    r"Trusted_Connection=yes;",
+)
+POOL_SIZE = int(os.environ.get("PHONEPE_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.environ.get("PHONEPE_POOL_TIMEOUT", "30"))            # max seconds to wait for a free connection
+POOL_IDLE_TIMEOUT = float(os.environ.get("PHONEPE_POOL_IDLE_TIMEOUT", "300"))  # close connections idle longer than this
+POOL_PING_AFTER = float(os.environ.get("PHONEPE_POOL_PING_AFTER", "5"))        # re-check connections idle longer than this
+DATA_SOURCE = os.environ.get("PHONEPE_DATA_SOURCE", "sqlserver")                # "sqlserver" or "snapshot" (see snapshot.py)
+STATEMENTS_PER_CONN = int(os.environ.get("PHONEPE_STATEMENTS_PER_CONN", "32"))  # prepared cursors kept per connection
+CHUNK_ROWS = int(os.environ.get("PHONEPE_CHUNK_ROWS", "50000"))                 # rows per chunk of read_sql_chunks
+REFRESH_POLL = max(1.0, float(os.environ.get("PHONEPE_REFRESH_POLL", "30")))   # seconds between data-version probes
+QUERY_TIMEOUT = float(os.environ.get("PHONEPE_QUERY_TIMEOUT", "120"))            # seconds before a query is cancelled
+LATENCY_BUDGET = float(os.environ.get("PHONEPE_LATENCY_BUDGET", "2"))            # then serve the last good result, if any
+REFRESH_BACKOFF_MAX = 600.0    # longest wait between probes while the database is unreachable
+FIRST_PROBE_WAIT = 5.0         # seconds the first page run waits for the first probe
+
+log = logging.getLogger("phonepe.db")
+
+
+def connect():
+    # imported here: snapshot mode, the benchmarks and the tests run without the ODBC driver
+    # manager library pyodbc loads (the same reason columnar.available() guards arrow-odbc)
+    import pyodbc
+
+    # autocommit: the dashboard only reads, so no transaction is left open on a pooled connection
+    conn = pyodbc.connect(CONN_STR, autocommit=True)
+    if QUERY_TIMEOUT < float("inf"):
+        # server-side backstop for statements nobody waits for anymore (see read_sql)
+        conn.timeout = _statement_timeout()
+    return conn
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class QueryCancelled(Exception):
+    # the session that asked for the result moved on (rerun, another page) before it arrived
+    pass
+
+
+def _link_error(e):
+    # pyodbc not imported yet -> no SQL Server connection was ever made, so e isn't one of its errors
+    pyodbc = sys.modules.get("pyodbc")
+    return pyodbc is not None and isinstance(e, (pyodbc.OperationalError, pyodbc.InterfaceError))
+
+
+def _ping(conn):
+    try:
+        conn.cursor().execute("SELECT 1").fetchone()
+        return True
+    except Exception:
+        return False
+
+
+# ---------- CONNECTION POOL ----------
+class ConnectionPool:
+    # ping(conn) -> bool and broken(exc) -> bool adapt it to another driver (see get_arrow_pool)
+    def __init__(self, connect, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 idle_timeout=POOL_IDLE_TIMEOUT, ping_after=POOL_PING_AFTER, ping=_ping, broken=_link_error):
+        self._connect = connect
+        self._ping = ping
+        self._broken = broken
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(conn, last_used)] – most recently returned at the end
+        self._open = 0           # idle + checked out (+ being connected)
+        self._statements = {}    # id(conn) -> OrderedDict(sql -> cursor holding that prepared statement)
+        self._stats = {
+            "checkouts": 0,
+            "failures": 0,       # connect errors and checkout timeouts
+            "created": 0,
+            "discarded": 0,      # failed liveness check or returned broken
+            "evicted": 0,        # closed after idling too long
+            "wait_time": 0.0,
+            "max_wait": 0.0,
+        }
+
+    # ---- borrowing ----
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            stale = self._pop_stale()
+            if stale:
+                self._cond.notify(len(stale))
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["failures"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout:g}s (pool size {self.size})")
+                self._cond.wait(remaining)
+
+        for old in stale:
+            self._close(old)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self.ping_after and not self._ping(conn):
+                self._close(conn)
+                conn = None
+                with self._cond:
+                    self._stats["discarded"] += 1
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._stats["created"] += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._stats["failures"] += 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+        return conn
+
+    def release(self, conn, broken=False):
+        if broken:
+            self._close(conn)
+        with self._cond:
+            if broken:
+                self._open -= 1
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException as e:
+            # after a link-level failure, don't hand this connection to anyone else
+            self.release(conn, broken=self._broken(e))
+            raise
+        else:
+            self.release(conn)
+
+    # ---- housekeeping ----
+    def _pop_stale(self):
+        # called with the lock held; idle list is ordered oldest first
+        now = time.monotonic()
+        stale = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            stale.append(self._idle.pop(0)[0])
+        self._open -= len(stale)
+        self._stats["evicted"] += len(stale)
+        return stale
+
+    def evict_idle(self):
+        with self._cond:
+            stale = self._pop_stale()
+            if stale:
+                self._cond.notify(len(stale))
+        for conn in stale:
+            self._close(conn)
+        return len(stale)
+
+    def close_all(self):
+        with self._cond:
+            idle = [c for c, _ in self._idle]
+            self._idle = []
+            self._open -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+    def _close(self, conn):
+        self._statements.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ---- prepared statements ----
+    def statement(self, conn, sql):
+        # pyodbc prepares a parameterized statement once and re-uses the handle as long as
+        # the same SQL text is executed again on the same cursor, so keep one cursor per shape.
+        # Only the thread holding `conn` touches its entry.
+        cursors = self._statements.setdefault(id(conn), OrderedDict())
+        cur = cursors.pop(sql, None)
+        if cur is None:
+            cur = conn.cursor()
+            while len(cursors) >= STATEMENTS_PER_CONN:
+                _, old = cursors.popitem(last=False)
+                try:
+                    old.close()
+                except Exception:
+                    pass
+        cursors[sql] = cur
+        return cur
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s["size"] = self.size
+            s["open"] = self._open
+            s["idle"] = len(self._idle)
+            s["in_use"] = self._open - len(self._idle)
+        s["avg_wait"] = s["wait_time"] / s["checkouts"] if s["checkouts"] else 0.0
+        return s
+
+
+# ---------- PROCESS-WIDE POOL ----------
+# Streamlit re-executes the page script on every rerun but keeps imported modules,
+# so this pool is shared by every session served by the process.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(connect)
+    return _pool
+
+
+def connection():
+    return get_pool().connection()
+
+
+# arrow-odbc connections for the columnar fetch (see columnar.py); statements run on one or the
+# other, so they don't compete for each other's connections
+_arrow_pool = None
+
+
+def _arrow_broken(e):
+    # a statement cancelled between batches leaves unread results on the connection
+    return isinstance(e, QueryCancelled) or columnar.link_error(e)
+
+
+def get_arrow_pool():
+    global _arrow_pool
+    if _arrow_pool is None:
+        with _pool_lock:
+            if _arrow_pool is None:
+                _arrow_pool = ConnectionPool(lambda: columnar.connect(CONN_STR),
+                                             ping=columnar.ping, broken=_arrow_broken)
+    return _arrow_pool
+
+
+def pool_stats():
+    s = get_pool().stats()
+    if _arrow_pool is not None:
+        s["columnar"] = _arrow_pool.stats()
+    return s
+
+
+# ---------- CANCELLATION ----------
+# read_sql runs a statement on the statement executor and waits for it in short slices. Between
+# slices it checks the query's timeout, its latency budget and whether Streamlit has a rerun
+# pending for the session (a widget change, or navigating to another page). A statement nobody
+# waits for anymore is cancelled on the server: pyodbc Cursor.cancel / DuckDB interrupt.
+WAIT_SLICE = 0.05
+
+
+class Statement:
+    # the cursor a statement runs on, so another thread can cancel it
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cursor = None
+        self.cancelled = False
+
+    def attach(self, cursor):
+        with self._lock:
+            self._cursor = cursor
+            if self.cancelled:
+                _interrupt(cursor)
+
+    def detach(self):
+        # before the connection goes back to the pool, where its cursors run other statements
+        with self._lock:
+            self._cursor = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._cursor is not None:
+                _interrupt(self._cursor)
+
+
+def _interrupt(cursor):
+    try:
+        if hasattr(cursor, "cancel"):
+            cursor.cancel()          # pyodbc: SQLCancel, the statement fails with HY008
+        else:
+            cursor.interrupt()       # DuckDB
+    except Exception:
+        pass
+
+
+_statement = contextvars.ContextVar("phonepe_statement", default=None)
+_abandoned = contextvars.ContextVar("phonepe_abandoned", default=None)    # set by read_sql_many
+
+
+def _attach_cursor(cursor):
+    statement = _statement.get()
+    if statement is not None:
+        statement.attach(cursor)
+
+
+def _superseded():
+    # True when the session this query runs for doesn't need it anymore
+    abandoned = _abandoned.get()
+    if abandoned is not None and abandoned.is_set():
+        return True
+    scriptrunner = sys.modules.get("streamlit.runtime.scriptrunner")
+    if scriptrunner is None:
+        return False
+    # Streamlit has no public hook for it: a pending rerun/stop request of the run means the
+    # script will be restarted at its next st.* call anyway
+    ctx = scriptrunner.get_script_run_ctx(suppress_warning=True)
+    requests = getattr(ctx, "script_requests", None)
+    state = getattr(requests, "_state", None)
+    return state is not None and state.name != "CONTINUE"
+
+
+_statement_executor = None
+
+
+def get_statement_executor():
+    # separate from get_executor(): read_sql_many workers wait on statements, so statements
+    # must never queue behind them. POOL_SIZE threads – a statement needs a connection anyway.
+    global _statement_executor
+    if _statement_executor is None:
+        with _executor_lock:
+            if _statement_executor is None:
+                _statement_executor = ThreadPoolExecutor(max_workers=POOL_SIZE,
+                                                         thread_name_prefix="phonepe-statement")
+    return _statement_executor
+
+
+# ---------- PARAMETERIZED QUERIES ----------
+# Queries name their parameters (`WHERE State = :state AND Year = :year`); values are bound
+# through pyodbc `?` placeholders, so SQL Server sees one statement per query shape.
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+@lru_cache(maxsize=512)
+def compile_sql(sql):
+    names = tuple(_PARAM.findall(sql))
+    return _PARAM.sub("?", sql), names
+
+
+def _bind_value(v):
+    # numpy scalars (e.g. a Year picked from a DataFrame column) are not accepted by pyodbc
+    return v.item() if hasattr(v, "item") else v
+
+
+def bind_params(sql, params=None):
+    qmark, names = compile_sql(sql)
+    params = params or {}
+    missing = [n for n in names if n not in params]
+    if missing:
+        raise ValueError(f"Missing query parameter(s): {', '.join(sorted(set(missing)))}")
+    return qmark, [_bind_value(params[n]) for n in names]
+
+
+def query_years(sql, params=None):
+    # a query bound to one :year only depends on that year's rows (see cache.invalidate)
+    if "year" in compile_sql(sql)[1] and params.get("year") is not None:
+        return [params["year"]]
+    return None
+
+
+def query_name(sql):
+    # default metrics label: the tables a query reads
+    return "+".join(sorted(tables_in(sql))) or "query"
+
+
+def read_sql(sql, params=None, ttl=None, name=None, timeout=None):
+    # ttl: seconds the result may be served from the query cache (None = default, 0 = don't cache)
+    # name: label for the query's metrics (default: the tables it reads)
+    # timeout: seconds to wait for the result before the query is cancelled (None = QUERY_TIMEOUT)
+    start = time.perf_counter()
+    qmark, values = bind_params(sql, params)
+    years = query_years(sql, params)
+    key = query_cache.make_key(qmark, values, years)
+    df = query_cache.get(key)
+    if df is not None:
+        metrics.record_query(name or query_name(qmark), time.perf_counter() - start, len(df),
+                             frame_bytes(df), "hit")
+        return df
+    # another worker process may have run it already (ttl=0 results are never stored there)
+    df = shared_cache.get(key) if ttl != 0 else None
+    if df is not None:
+        query_cache.put(key, df, ttl, years)
+        metrics.record_query(name or query_name(qmark), time.perf_counter() - start, len(df),
+                             frame_bytes(df), "shared")
+        return view(df)
+    # the statement runs on the statement executor and this thread only waits for it; identical
+    # queries already running for other sessions are joined, not repeated
+    call, leader = inflight.join(key)
+    if leader:
+        call.statement = Statement()
+        ctx = contextvars.copy_context()
+        get_statement_executor().submit(ctx.run, _load, call, qmark, values, ttl, years)
+    foreground = not in_background()
+    if foreground:
+        _waiting(1)
+    try:
+        df, outcome = _wait(call, key, QUERY_TIMEOUT if timeout is None else timeout, start)
+    finally:
+        if foreground:
+            _waiting(-1)
+    if outcome is None:
+        outcome = "miss" if leader else "coalesced"
+    stages = call.stages if outcome == "miss" else {}
+    metrics.record_query(name or query_name(qmark), time.perf_counter() - start, len(df), frame_bytes(df),
+                         outcome, stages.get("db"), stages.get("frame"))
+    return view(df)
+
+
+def _load(call, qmark, values, ttl, years):
+    # on a statement executor thread: run, cache, and hand the result to everyone waiting
+    _statement.set(call.statement)
+    metrics.take_stages()
+    try:
+        df = _execute(qmark, values)
+    except BaseException as e:
+        if call.statement.cancelled:
+            e = QueryCancelled("Query cancelled")
+        inflight.finish(call, error=e)
+        return
+    finally:
+        call.statement.detach()
+    query_cache.put(call.key, df, ttl, years)
+    call.stages = metrics.take_stages()
+    inflight.finish(call, result=df)
+    # after the waiters have their result: the other worker processes can read it from here on
+    shared_cache.put(call.key, df, query_cache.default_ttl if ttl is None else ttl)
+
+
+def _wait(call, key, timeout, start):
+    # -> (df, outcome): outcome "stale" when the last good result was served instead
+    stale_checked = False
+    while not call.done.wait(WAIT_SLICE):
+        waited = time.perf_counter() - start
+        if _superseded():
+            _leave(call)
+            raise QueryCancelled("The session moved on before the query finished")
+        if waited > timeout:
+            _leave(call)
+            raise QueryTimeout(f"Query did not finish within {timeout:g}s")
+        if waited > LATENCY_BUDGET and not stale_checked:
+            stale_checked = True
+            df = query_cache.get_stale(key)
+            if df is not None:
+                # the statement keeps running and refreshes the cache in the background
+                inflight.leave(call, abandon=False)
+                return df, "stale"
+    if call.error is not None:
+        raise call.error
+    return call.result, None
+
+
+def _leave(call):
+    if inflight.leave(call):
+        call.statement.cancel()
+
+
+# sessions currently waiting for a query; background work (prefetch, warm-up) gives way to them
+_foreground = {"waiting": 0}
+_foreground_lock = threading.Lock()
+
+
+def _waiting(n):
+    with _foreground_lock:
+        _foreground["waiting"] += n
+
+
+def foreground_busy():
+    return _foreground["waiting"] > 0
+
+
+# ---------- CONCURRENT BATCHES ----------
+# A page's independent queries run side by side, each on its own pooled connection, so the
+# page waits for the slowest query instead of the sum of all of them.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="phonepe-query")
+    return _executor
+
+
+def read_query(name, query, ttl=None, compact=()):
+    # one entry of a read_sql_many batch: sql or (sql, params). Names in `compact` are loaded as
+    # shared, dtype-compacted datasets (see datasets.py) instead of plain cached results.
+    sql, params = (query, None) if isinstance(query, str) else query
+    if name in compact:
+        return datasets.load(name, sql, sorted(tables_in(sql)), params, query_years(sql, params))
+    return read_sql(sql, params, ttl, name)
+
+
+def read_sql_many(queries, ttl=None, compact=()):
+    # queries: {name: sql} or {name: (sql, params)} -> {name: DataFrame}, in the same order
+    start = time.perf_counter()
+    futures = {}
+    abandoned = threading.Event()
+    token = _abandoned.set(abandoned)
+    try:
+        for name, q in queries.items():
+            # each worker runs in a copy of the caller's context, so its metrics carry the page's
+            # labels and it sees `abandoned`
+            ctx = contextvars.copy_context()
+            futures[name] = get_executor().submit(ctx.run, read_query, name, q, ttl, compact)
+    finally:
+        _abandoned.reset(token)
+    try:
+        pending = set(futures.values())
+        while pending:
+            _, pending = wait(pending, timeout=WAIT_SLICE, return_when=FIRST_COMPLETED)
+            if pending and _superseded():
+                # the workers notice, stop waiting and cancel what nobody else needs
+                abandoned.set()
+                raise QueryCancelled("The session moved on before the queries finished")
+        return {name: f.result() for name, f in futures.items()}
+    finally:
+        metrics.record_batch(time.perf_counter() - start)
+
+
+def read_sql_chunks(sql, params=None, chunksize=CHUNK_ROWS):
+    # uncached; yields DataFrames of at most `chunksize` rows, so a large result (e.g. a full
+    # drill-down export) never has to be held in memory at once
+    qmark, values = bind_params(sql, params)
+    if DATA_SOURCE == "snapshot":
+        yield from snapshot.get_engine().read_chunks(qmark, values, chunksize)
+        return
+    bound = columnar.bind(qmark, values) if columnar.available() else None
+    if bound is not None:
+        with get_arrow_pool().connection() as conn:
+            reader = columnar.read(conn, *bound, chunksize, _statement_timeout())
+            try:
+                for batch in reader:
+                    yield columnar.to_frame([batch], reader.schema)
+            finally:
+                # closes the statement before the connection goes back to the pool
+                del reader
+        return
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(qmark, values)
+            columns = [d[0] for d in cur.description]
+            while True:
+                rows = cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records([tuple(r) for r in rows], columns=columns, coerce_float=True)
+        finally:
+            cur.close()
+
+
+def read_sql_uncached(sql, params=None):
+    # straight from SQL Server, e.g. when exporting a snapshot
+    return _execute_sqlserver(*bind_params(sql, params))
+
+
+def _execute(qmark, values):
+    if DATA_SOURCE == "snapshot":
+        with metrics.stage("db"):
+            return snapshot.get_engine().read(qmark, values, _attach_cursor)
+    try:
+        return _execute_sqlserver(qmark, values)
+    except Exception as e:
+        # DB host unreachable: keep the dashboard up on the last exported snapshot
+        # (a cancelled statement fails the same way, but must not be answered)
+        statement = _statement.get()
+        if not _unreachable(e) or not snapshot.available() or (statement is not None and statement.cancelled):
+            raise
+        with metrics.stage("db"):
+            return snapshot.get_engine().read(qmark, values, _attach_cursor)
+
+
+def _unreachable(e):
+    return _link_error(e) or isinstance(e, PoolTimeout) or (columnar.available() and columnar.link_error(e))
+
+
+def _execute_sqlserver(qmark, values):
+    if columnar.available():
+        bound = columnar.bind(qmark, values)
+        if bound is not None:
+            return _fetch_arrow(*bound)
+    return _fetch_rows(qmark, values)
+
+
+def _statement_timeout():
+    return max(1, int(QUERY_TIMEOUT)) if QUERY_TIMEOUT < float("inf") else None
+
+
+def _fetch_arrow(sql, params):
+    # column buffers filled a batch per round-trip (see columnar.py). arrow-odbc can't cancel a
+    # running statement, so a cancelled one stops at the next batch, and the statement timeout is
+    # the server-side backstop
+    statement = _statement.get()
+    with metrics.stage("db"), get_arrow_pool().connection() as conn:
+        reader = columnar.read(conn, sql, params, CHUNK_ROWS, _statement_timeout())
+        schema = reader.schema
+        batches = []
+        try:
+            for batch in reader:
+                if statement is not None and statement.cancelled:
+                    raise QueryCancelled("Query cancelled")
+                batches.append(batch)
+        finally:
+            del reader
+    with metrics.stage("frame"):
+        return columnar.to_frame(batches, schema)
+
+
+def _fetch_rows(qmark, values):
+    # pyodbc: a tuple of Python objects per row, turned into columns by pandas
+    pool = get_pool()
+    statement = _statement.get()
+    # a cancelled statement fails with OperationalError, so pool.connection() drops the connection
+    with metrics.stage("db"), pool.connection() as conn:
+        cur = pool.statement(conn, qmark)
+        _attach_cursor(cur)
+        try:
+            cur.execute(qmark, values)
+            columns = [d[0] for d in cur.description]
+            rows = [tuple(r) for r in cur.fetchall()]
+        finally:
+            if statement is not None:
+                statement.detach()
+    with metrics.stage("frame"):
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+# ---------- DATA VERSIONS ----------
+# A background thread probes the tables every REFRESH_POLL seconds and records a token per
+# (table, year). The tokens go into the cache keys (see cache.DataVersions), so cached results,
+# rollups and figures live until a load really changes what they read; the entries of changed
+# (table, year)s are dropped to free their memory.
+#
+# On SQL Server the probe reads the ETL watermarks (dbo.etl_watermark, one row per loaded
+# partition) for the tables etl.py loads; any other table gets a row count and checksum per
+# Year. A snapshot is not scanned: its manifest versions it (see snapshot.SnapshotEngine). An
+# unreachable database is tried once per round, and each failed round doubles the wait before
+# the next, up to REFRESH_BACKOFF_MAX.
+WATERMARK_SQL = "SELECT table_name, Year, Quarter, fingerprint FROM dbo.etl_watermark"
+
+_refresh = {"thread": None, "failures": 0}
+_refresh_lock = threading.Lock()
+_first_probe = threading.Event()
+
+
+def probe_sql(table):
+    # for tables without a watermark: the checksum also sees rows corrected in place
+    return (f"SELECT '{table}' AS table_name, Year, COUNT_BIG(*) AS n, "
+            f"CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS checksum FROM dbo.{table} GROUP BY Year")
+
+
+def _probe_execute(qmark):
+    # no snapshot fallback: an unreachable server has to fail the probe, not answer for it
+    return _execute_sqlserver(qmark, [])
+
+
+def _watermark_tokens(tables):
+    try:
+        df = _probe_execute(WATERMARK_SQL)
+    except Exception as e:
+        if _unreachable(e):
+            raise
+        return {}                  # nothing loaded by etl.py yet: every table is probed itself
+    quarters = {}
+    for table, year, quarter, fingerprint in df.itertuples(index=False, name=None):
+        if table in tables:
+            quarters.setdefault(table, {}).setdefault(int(year), []).append(f"{int(quarter)}:{fingerprint}")
+    return {t: {y: ",".join(sorted(q)) for y, q in per_year.items()} for t, per_year in quarters.items()}
+
+
+def probe(tables=TABLES):
+    # -> {table: {year: token}}; a table that can't be probed keeps its last known version.
+    # Raises when the database is unreachable, instead of trying each table in turn.
+    if DATA_SOURCE == "snapshot":
+        # the manifest versions a snapshot (a new one is picked up by get_engine's stat)
+        versions = snapshot.get_engine().versions
+        return {t: dict(versions[t]) for t in tables if t in versions}
+    tokens = _watermark_tokens(tables)
+    rest = [t for t in tables if t not in tokens]
+    if not rest:
+        return tokens
+    frames = {}
+    try:
+        frames = {None: _probe_execute(" UNION ALL ".join(probe_sql(t) for t in rest))}
+        probed = rest
+    except Exception as e:
+        if _unreachable(e):
+            raise
+        probed = []
+        for t in rest:
+            try:
+                frames[t] = _probe_execute(probe_sql(t))
+                probed.append(t)
+            except Exception as e:
+                if _unreachable(e):
+                    raise
+    tokens.update({t: {} for t in probed})
+    for df in frames.values():
+        for table, year, n, checksum in df.itertuples(index=False, name=None):
+            if not pd.isna(year):
+                tokens[table][int(year)] = f"{n}:{checksum}"
+    return tokens
+
+
+def refresh():
+    # one probe round, on the caller's thread; raises when the database is unreachable
+    for table, years in data_versions.update(probe()).items():
+        invalidate([table], years)
+
+
+def _refresh_loop():
+    while True:
+        try:
+            refresh()
+            if _refresh["failures"]:
+                log.info("data-version probe reaches the database again")
+            _refresh["failures"] = 0
+        except Exception as e:
+            if not _refresh["failures"]:
+                log.warning("data-version probe failed, backing off: %s", e)
+            _refresh["failures"] += 1
+        finally:
+            _first_probe.set()
+        time.sleep(min(REFRESH_POLL * 2 ** _refresh["failures"], max(REFRESH_BACKOFF_MAX, REFRESH_POLL)))
+
+
+def check_refresh(wait=FIRST_PROBE_WAIT):
+    # starts the probe thread once per process. Until the first probe is done, callers wait for it
+    # (up to `wait` seconds, None = until it is), so the first page is cached under probed versions.
+    with _refresh_lock:
+        if _refresh["thread"] is None:
+            _refresh["thread"] = threading.Thread(target=_refresh_loop, name="phonepe-refresh", daemon=True)
+            _refresh["thread"].start()
+    return _first_probe.wait(wait)
@@ -0,0 +1,394 @@
+# ===============================================
+# 🚚 PULSE JSON LOADER – PARALLEL BULK ETL
+# ===============================================
+# Loads a checkout of the PhonePe Pulse repository (its `data/` tree) into the ten dashboard
+# tables. The JSON files are parsed in a process pool, a chunk of files per task, and each
+# task hands back plain column lists; every table is then written in one columnar batch:
+#   - sqlserver: INSERT ... VALUES (?, ...) with pyodbc fast_executemany, one transaction per table
+#   - snapshot:  Parquet via snapshot.write_table, published atomically like `python snapshot.py`
+#
+#   python etl.py path/to/pulse/data                     # -> SQL Server (PHONEPE_CONN_STR)
+#   python etl.py path/to/pulse/data --target snapshot   # -> PHONEPE_SNAPSHOT_DIR
+#   python etl.py path/to/pulse/data --incremental       # only new or changed (Year, Quarter)s
+#
+# Every load records a watermark per table: a content fingerprint of each (Year, Quarter)
+# partition's source files (dbo.etl_watermark, or the snapshot manifest). --incremental
+# re-parses only the partitions whose fingerprint changed, replaces exactly those partitions
+# (delete + insert, so re-running is harmless). Running dashboards see the new data version
+# through their probes (db.check_refresh) and drop only what depends on the changed years.
+#
+# Uses `orjson` for parsing when it is installed.
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+from schema import COLUMNS, TABLES
+
+ETL_WORKERS = int(os.environ.get("PHONEPE_ETL_WORKERS", str(os.cpu_count() or 4)))
+FILES_PER_TASK = 64
+INSERT_BATCH = 50_000          # rows per executemany call
+
+
+# ---------- PARSERS ----------
+# One per table: (document, state, year, quarter) -> list of row tuples in COLUMNS order.
+# `state` is the directory slug (e.g. "andhra-pradesh"); country-level files list the states.
+def _slug(name):
+    return str(name).strip().lower().replace(" ", "-")
+
+
+def _payments(doc, state, year, quarter):
+    rows = []
+    for entry in (doc.get("data") or {}).get("transactionData") or []:
+        for pi in entry.get("paymentInstruments") or []:
+            rows.append((state, year, quarter, entry.get("name"), pi.get("count"), pi.get("amount")))
+    return rows
+
+
+def aggregated_user(doc, state, year, quarter):
+    devices = (doc.get("data") or {}).get("usersByDevice") or []
+    return [(state, year, quarter, d.get("brand"), d.get("count"), d.get("percentage")) for d in devices]
+
+
+def map_user(doc, state, year, quarter):
+    hover = (doc.get("data") or {}).get("hoverData") or {}
+    return [(state, year, quarter, district, v.get("registeredUsers"), v.get("appOpens"))
+            for district, v in hover.items()]
+
+
+def _top_transaction(key, slug=False):
+    def parse(doc, state, year, quarter):
+        rows = []
+        for e in (doc.get("data") or {}).get(key) or []:
+            m = e.get("metric") or {}
+            name = e.get("entityName")
+            if slug:
+                rows.append((_slug(name), year, quarter, m.get("count"), m.get("amount")))
+            else:
+                rows.append((state, year, quarter, str(name), m.get("count"), m.get("amount")))
+        return rows
+    return parse
+
+
+def _top_user(key, slug=False):
+    def parse(doc, state, year, quarter):
+        rows = []
+        for e in (doc.get("data") or {}).get(key) or []:
+            if slug:
+                rows.append((_slug(e.get("name")), year, quarter, e.get("registeredUsers")))
+            else:
+                rows.append((state, year, quarter, str(e.get("name")), e.get("registeredUsers")))
+        return rows
+    return parse
+
+
+# table -> (directory under data/, "state" = one file per state, "country" = one India-wide file, parser)
+SOURCES = {
+    "aggregated_transaction": ("aggregated/transaction", "state", _payments),
+    "aggregated_user": ("aggregated/user", "state", aggregated_user),
+    "aggregated_insurance": ("aggregated/insurance", "state", _payments),
+    "map_user": ("map/user/hover", "state", map_user),
+    "top_state_transaction": ("top/transaction", "country", _top_transaction("states", slug=True)),
+    "top_district_transaction": ("top/transaction", "state", _top_transaction("districts")),
+    "top_pincode_transaction": ("top/transaction", "state", _top_transaction("pincodes")),
+    "top_user_state": ("top/user", "country", _top_user("states", slug=True)),
+    "top_user_district": ("top/user", "state", _top_user("districts")),
+    "top_user_pincode": ("top/user", "state", _top_user("pincodes")),
+}
+
+# SQL Server column types for CREATE TABLE (the loader creates missing tables)
+SQL_TYPES = {
+    "State": "NVARCHAR(100)", "Year": "INT", "Quarter": "INT",
+    "Transaction_type": "NVARCHAR(100)", "user_brand": "NVARCHAR(100)", "insurance_type": "NVARCHAR(100)",
+    "District": "NVARCHAR(200)", "Pincode": "NVARCHAR(10)", "user_percentage": "FLOAT",
+    "Transaction_amount": "FLOAT", "insurance_amount": "FLOAT",
+}
+
+
+# ---------- DISCOVERY ----------
+def discover(root, table):
+    # -> {(year, quarter): [(path, state, year, quarter), ...]}
+    subdir, level, _ = SOURCES[table]
+    base = Path(root) / subdir / "country" / "india"
+    if level == "state":
+        pattern, states = "state/*/*/*.json", True
+    else:
+        pattern, states = "*/*.json", False
+    parts = {}
+    for path in sorted(base.glob(pattern)):
+        try:
+            year, quarter = int(path.parent.name), int(path.stem)
+        except ValueError:
+            continue
+        parts.setdefault((year, quarter), []).append(
+            (str(path), path.parent.parent.name if states else None, year, quarter))
+    return parts
+
+
+def fingerprint(root, files):
+    # content hash of one partition's source files (mtimes change on every fresh checkout)
+    h = hashlib.blake2b(digest_size=16)
+    for path, *_ in files:
+        h.update(os.path.relpath(path, root).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _pkey(year, quarter):
+    return f"{year}-{quarter}"
+
+
+def watermark(parts):
+    # latest (Year, Quarter) among a table's recorded partitions
+    keys = [tuple(int(v) for v in k.split("-")) for k in parts]
+    return max(keys) if keys else None
+
+
+# ---------- PARSING (worker processes) ----------
+def parse_files(table, files):
+    # runs in a worker; returns column lists rather than row tuples (cheaper to pickle back)
+    parse = SOURCES[table][2]
+    rows, nbytes = [], 0
+    for path, state, year, quarter in files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        nbytes += len(raw)
+        rows.extend(parse(_loads(raw), state, year, quarter))
+    columns = [list(c) for c in zip(*rows)] if rows else [[] for _ in COLUMNS[table]]
+    return table, columns, len(files), nbytes
+
+
+def extract(files, workers=ETL_WORKERS):
+    # files: {table: [(path, state, year, quarter)]} -> {table: DataFrame}, stats
+    import pandas as pd
+
+    jobs = [(t, chunk) for t, fs in files.items()
+            for chunk in (fs[i:i + FILES_PER_TASK] for i in range(0, len(fs), FILES_PER_TASK))]
+    parts = {t: [] for t in files}
+    stats = {"files": 0, "bytes": 0}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_files, *zip(*jobs)))
+    else:
+        results = [parse_files(t, chunk) for t, chunk in jobs]
+    for table, columns, nfiles, nbytes in results:
+        parts[table].append(columns)
+        stats["files"] += nfiles
+        stats["bytes"] += nbytes
+
+    frames = {}
+    for table in files:
+        cols = COLUMNS[table]
+        data = {c: [v for part in parts[table] for v in part[i]] for i, c in enumerate(cols)}
+        df = pd.DataFrame(data, columns=cols)
+        for c in cols:
+            if c in ("Year", "Quarter"):
+                df[c] = df[c].astype("int64")
+            elif SQL_TYPES.get(c, "BIGINT") in ("BIGINT", "FLOAT"):
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+        frames[table] = df
+    return frames, stats
+
+
+# ---------- SQL SERVER ----------
+def create_table_sql(table):
+    cols = ", ".join(f"[{c}] {SQL_TYPES.get(c, 'BIGINT')}" for c in COLUMNS[table])
+    return f"IF OBJECT_ID('dbo.{table}', 'U') IS NULL CREATE TABLE dbo.{table} ({cols})"
+
+
+WATERMARK_DDL = (
+    "IF OBJECT_ID('dbo.etl_watermark', 'U') IS NULL CREATE TABLE dbo.etl_watermark ("
+    "table_name NVARCHAR(100) NOT NULL, Year INT NOT NULL, Quarter INT NOT NULL, fingerprint CHAR(32) NOT NULL, "
+    "loaded_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(), PRIMARY KEY (table_name, Year, Quarter))"
+)
+
+
+def watermarks_sqlserver():
+    import db
+
+    try:
+        df = db.read_sql_uncached("SELECT table_name, Year, Quarter, fingerprint FROM dbo.etl_watermark")
+    except Exception:
+        return {}                  # nothing loaded with watermarks yet
+    seen = {}
+    for table, year, quarter, fp in df.itertuples(index=False, name=None):
+        seen.setdefault(table, {})[_pkey(year, quarter)] = fp
+    return seen
+
+
+def load_sqlserver(frames, fingerprints, changed=None):
+    # changed: {table: [(year, quarter)]} replaces just those partitions; None replaces whole tables
+    import db
+
+    conn = db.connect()
+    conn.autocommit = False
+    try:
+        cur = conn.cursor()
+        cur.execute(WATERMARK_DDL)
+        conn.commit()
+        for table, df in frames.items():
+            t0 = time.perf_counter()
+            cur = conn.cursor()
+            cur.fast_executemany = True
+            cur.execute(create_table_sql(table))
+            # data and watermarks commit together: a failed run leaves
+            # the table as it was, and re-running it repeats the same delete + insert
+            if changed is None:
+                cur.execute(f"TRUNCATE TABLE dbo.{table}")
+                cur.execute("DELETE FROM dbo.etl_watermark WHERE table_name = ?", table)
+            else:
+                parts = [(y, q) for y, q in changed[table]]
+                cur.executemany(f"DELETE FROM dbo.{table} WHERE Year = ? AND Quarter = ?", parts)
+                cur.executemany("DELETE FROM dbo.etl_watermark WHERE table_name = ? AND Year = ? AND Quarter = ?",
+                                [(table, y, q) for y, q in parts])
+            cols = ", ".join(f"[{c}]" for c in df.columns)
+            sql = f"INSERT INTO dbo.{table} ({cols}) VALUES ({', '.join('?' * len(df.columns))})"
+            # object dtype + None for NaN, so pyodbc sees plain Python values
+            rows = df.astype(object).where(df.notna(), None).values.tolist()
+            for i in range(0, len(rows), INSERT_BATCH):
+                cur.executemany(sql, rows[i:i + INSERT_BATCH])
+            marks = [(table, y, q, fp) for (y, q), fp in fingerprints[table].items()
+                     if changed is None or (y, q) in changed[table]]
+            if marks:
+                cur.executemany("INSERT INTO dbo.etl_watermark (table_name, Year, Quarter, fingerprint) "
+                                "VALUES (?, ?, ?, ?)", marks)
+            conn.commit()
+            cur.close()
+            _report(table, len(df), time.perf_counter() - t0)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ---------- SNAPSHOT ----------
+def _manifest(target):
+    import snapshot
+
+    path = Path(target) / snapshot.MANIFEST
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def watermarks_snapshot(target):
+    return _manifest(target).get("partitions", {})
+
+
+def load_snapshot(frames, fingerprints, target, source_root, changed=None):
+    import pyarrow.dataset as ds
+
+    import snapshot
+
+    target = Path(target)
+    old = _manifest(target)
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    if target.exists():
+        # start from the published snapshot; tables/partitions not being loaded carry over
+        shutil.copytree(target, tmp, ignore=shutil.ignore_patterns(snapshot.MANIFEST))
+    tmp.mkdir(parents=True, exist_ok=True)
+
+    partitions = {t: dict(v) for t, v in old.get("partitions", {}).items()}
+    rows = dict(old.get("rows", {}))
+    for table, df in frames.items():
+        t0 = time.perf_counter()
+        if changed is None:
+            shutil.rmtree(tmp / table, ignore_errors=True)
+            partitions[table] = {}
+        else:
+            for y, q in changed[table]:
+                shutil.rmtree(tmp / table / f"Year={y}" / f"Quarter={q}", ignore_errors=True)
+        if len(df):
+            snapshot.write_table(df, tmp, table)
+        rows[table] = ds.dataset(str(tmp / table), partitioning="hive").count_rows() if (tmp / table).exists() else 0
+        partitions.setdefault(table, {}).update(
+            (_pkey(y, q), fp) for (y, q), fp in fingerprints[table].items()
+            if changed is None or (y, q) in changed[table])
+        _report(table, len(df), time.perf_counter() - t0)
+
+    version = old.get("version", 0) + 1
+    snapshot.publish(tmp, target, {
+        "exported_at": time.time(), "source": "pulse-json", "pulse_root": str(source_root), "rows": rows,
+        "version": version, "previous_version": old.get("version"), "partitions": partitions,
+        # what this version changed: {table: [[year, quarter], ...]}, null = the whole table
+        "changed": {t: None if changed is None else [list(p) for p in changed[t]] for t in frames},
+    })
+    return version
+
+
+# ---------- RUN ----------
+def _report(table, rows, seconds):
+    rate = rows / seconds if seconds else 0
+    print(f"{table:<28} {rows:>10,} rows  {seconds:6.2f}s  {rate:>12,.0f} rows/s")
+
+
+def run(root, target="sqlserver", snapshot_dir=None, workers=ETL_WORKERS, tables=TABLES, incremental=False):
+    import snapshot
+
+    snapshot_dir = snapshot_dir or snapshot.SNAPSHOT_DIR
+    start = time.perf_counter()
+    found = {t: discover(root, t) for t in tables}
+    fingerprints = {t: {p: fingerprint(root, fs) for p, fs in parts.items()} for t, parts in found.items()}
+
+    changed = None
+    if incremental:
+        seen = watermarks_snapshot(snapshot_dir) if target == "snapshot" else watermarks_sqlserver()
+        changed = {t: sorted(p for p, fp in fingerprints[t].items() if seen.get(t, {}).get(_pkey(*p)) != fp)
+                   for t in tables}
+        changed = {t: ps for t, ps in changed.items() if ps}
+        for t in tables:
+            mark = watermark(seen.get(t, {}))
+            print(f"{t:<28} watermark {'%d Q%d' % mark if mark else '-':<10} "
+                  f"{len(changed.get(t, [])):>4} new/changed partition(s)")
+        if not changed:
+            print("Everything is up to date.")
+            return {}
+        files = {t: [f for p in ps for f in found[t][p]] for t, ps in changed.items()}
+    else:
+        files = {t: [f for fs in found[t].values() for f in fs] for t in tables}
+    fingerprints = {t: fingerprints[t] for t in files}
+
+    t0 = time.perf_counter()
+    frames, stats = extract(files, workers)
+    parsed = time.perf_counter() - t0
+    total_rows = sum(len(df) for df in frames.values())
+    print(f"Parsed {stats['files']:,} files ({stats['bytes'] / 2**20:.1f} MB) into {total_rows:,} rows "
+          f"in {parsed:.2f}s with {workers} worker(s) — {stats['files'] / parsed if parsed else 0:,.0f} files/s")
+
+    t0 = time.perf_counter()
+    if target == "snapshot":
+        load_snapshot(frames, fingerprints, snapshot_dir, root, changed)
+    else:
+        load_sqlserver(frames, fingerprints, changed)
+    written = time.perf_counter() - t0
+    total = time.perf_counter() - start
+    print(f"Wrote {total_rows:,} rows to {target} in {written:.2f}s; total {total:.2f}s "
+          f"({total_rows / total if total else 0:,.0f} rows/s)")
+    return {t: len(df) for t, df in frames.items()}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load the PhonePe Pulse JSON tree into the dashboard tables")
+    ap.add_argument("root", help="the Pulse repository's data/ directory")
+    ap.add_argument("--target", choices=["sqlserver", "snapshot"], default="sqlserver")
+    ap.add_argument("--snapshot-dir", default=None, help="with --target snapshot (default PHONEPE_SNAPSHOT_DIR)")
+    ap.add_argument("--workers", type=int, default=ETL_WORKERS)
+    ap.add_argument("--tables", nargs="*", default=TABLES, choices=TABLES)
+    ap.add_argument("--incremental", action="store_true", help="load only new or changed (Year, Quarter) partitions")
+    args = ap.parse_args()
+    if not Path(args.root).is_dir():
+        sys.exit(f"{args.root} is not a directory")
+    run(args.root, args.target, args.snapshot_dir, args.workers, args.tables, args.incremental)
@@ -0,0 +1,38 @@
+# ===============================================
+# 🧩 PAGE FRAGMENTS – PARTIAL RERUNS
+# ===============================================
+# A case study is split into sections wrapped in @fragment (st.fragment). A widget inside a
+# section reruns only that section; everything else on the page keeps what the previous run
+# drew. A section's dependencies are declared by where the widgets live: its own widgets sit
+# inside it, and anything it shares with other sections (sidebar selectors, widgets above it)
+# stays outside and is passed in as an argument, so changing those still reruns the page.
+# st.fragment can't draw into the sidebar, so sidebar widgets are always page-level.
+
+import functools
+
+import streamlit as st
+
+import db
+import metrics
+
+
+def fragment(fn):
+    # on a full run the section is part of the page run; a rerun of the section alone is
+    # recorded as its own run, labelled "<module>.<function>" (see metrics.page)
+    label = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__.lstrip('_')}"
+
+    @st.fragment
+    @functools.wraps(fn)
+    def section(*args, **kwargs):
+        if metrics.current_case() != "none":
+            return fn(*args, **kwargs)
+        with metrics.page(label):
+            try:
+                return fn(*args, **kwargs)
+            except db.QueryCancelled:
+                # superseded by a newer rerun (see test.show)
+                pass
+            except db.QueryTimeout as e:
+                st.error(f"{e}. Try a narrower selection, or reload to retry.")
+
+    return section
@@ -0,0 +1,161 @@
+# ===============================================
+# 🗺 INDIA STATE BOUNDARIES + CACHED HOME CHOROPLETH
+# ===============================================
+# The Home map used to hand plotly a remote gist URL, so every render shipped the full-resolution
+# boundaries to the browser and the page broke without internet. `python geo.py` fetches that
+# GeoJSON once, keeps only the ST_NM property, and writes simplified variants to assets/geo/.
+# The dashboard loads the chosen variant once per process and caches the finished figure JSON.
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import urllib.request
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from cache import derived
+
+GEOJSON_URL = "https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson"
+GEO_DIR = Path(__file__).resolve().parent / "assets" / "geo"
+FEATURE_KEY = "ST_NM"
+
+# Douglas–Peucker tolerance in degrees (~0.005° ≈ 500 m) per detail level
+TOLERANCES = {"high": 0.001, "medium": 0.005, "low": 0.02}
+GEO_DETAIL = os.environ.get("PHONEPE_GEO_DETAIL", "medium")
+COORD_DECIMALS = 4
+
+log = logging.getLogger("phonepe.geo")
+
+
+# ---------- SIMPLIFICATION ----------
+def _seg_dist(p, a, b):
+    (x, y), (x1, y1), (x2, y2) = p, a, b
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(x - x1, y - y1)
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def simplify_line(points, tol):
+    # iterative Douglas–Peucker; endpoints always kept
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        i, j = stack.pop()
+        far, far_d = None, tol
+        for k in range(i + 1, j):
+            d = _seg_dist(points[k], points[i], points[j])
+            if d > far_d:
+                far, far_d = k, d
+        if far is not None:
+            keep[far] = True
+            stack.append((i, far))
+            stack.append((far, j))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _ring(ring, tol):
+    out = [[round(x, COORD_DECIMALS), round(y, COORD_DECIMALS)] for x, y in simplify_line(ring, tol)]
+    return out if len(out) >= 4 else None   # collapsed (tiny island / hole) -> drop
+
+
+def simplify_geometry(geom, tol):
+    polys = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+    kept = []
+    for poly in polys:
+        outer = _ring(poly[0], tol)
+        if outer is None:
+            continue
+        kept.append([outer] + [h for h in (_ring(r, tol) for r in poly[1:]) if h is not None])
+    if not kept:
+        # the whole state collapsed: keep its largest polygon at a finer tolerance
+        largest = max(polys, key=lambda p: len(p[0]))
+        kept = [[_ring(largest[0], tol / 10) or largest[0]]]
+    if len(kept) == 1:
+        return {"type": "Polygon", "coordinates": kept[0]}
+    return {"type": "MultiPolygon", "coordinates": kept}
+
+
+def simplify_geojson(gj, tol):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {FEATURE_KEY: f["properties"][FEATURE_KEY]},
+                "geometry": simplify_geometry(f["geometry"], tol),
+            }
+            for f in gj["features"]
+        ],
+    }
+
+
+def build_geo_assets(source=GEOJSON_URL, out_dir=GEO_DIR):
+    # one-off: run on a machine with network access (or pass a local file) and commit the output
+    if str(source).startswith("http"):
+        with urllib.request.urlopen(source) as r:
+            gj = json.load(r)
+    else:
+        gj = json.loads(Path(source).read_text(encoding="utf-8"))
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    print(f"source: {len(json.dumps(gj, separators=(',', ':'))):>12,} bytes")
+    for level, tol in TOLERANCES.items():
+        path = out_dir / f"india_states.{level}.geojson"
+        path.write_text(json.dumps(simplify_geojson(gj, tol), separators=(",", ":")), encoding="utf-8")
+        print(f"{level:<7}{path.stat().st_size:>12,} bytes  (tolerance {tol}°)")
+
+
+# ---------- LOADING ----------
+@lru_cache(maxsize=None)
+def load_geojson(detail=GEO_DETAIL):
+    if detail not in TOLERANCES:
+        raise ValueError(f"Unknown PHONEPE_GEO_DETAIL: {detail} (expected one of {', '.join(TOLERANCES)})")
+    path = GEO_DIR / f"india_states.{detail}.geojson"
+    if not path.exists():
+        # the map still draws from the remote full-resolution file, but only with internet access
+        log.warning("%s is missing, the Home map falls back to %s; build the assets with `python geo.py`",
+                    path, GEOJSON_URL)
+        return GEOJSON_URL
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ---------- HOME CHOROPLETH ----------
+def frame_digest(df):
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    h.update(repr(list(df.columns)).encode())
+    return h.hexdigest()
+
+
+def _build_choropleth(df_map, detail):
+    import plotly.express as px
+
+    fig = px.choropleth(
+        df_map,
+        geojson=load_geojson(detail),
+        featureidkey=f"properties.{FEATURE_KEY}",
+        locations="State",
+        color="Total_Transaction_Amount",
+        color_continuous_scale="Reds",
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    return json.loads(fig.to_json())
+
+
+def choropleth_figure(df_map, detail=GEO_DETAIL):
+    # figure JSON (as a dict, which st.plotly_chart takes as is) is cached on the map data's content hash
+    key = ("home_choropleth", detail, frame_digest(df_map))
+    return derived.get(key, ["aggregated_transaction"], lambda: _build_choropleth(df_map, detail), shared=True)
+
+
+if __name__ == "__main__":
+    build_geo_assets(sys.argv[1] if len(sys.argv) > 1 else GEOJSON_URL)
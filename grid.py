@@ -0,0 +1,173 @@
+# ===============================================
+# 📑 DRILL-DOWN GRID – KEYSET PAGES WITH SORT/FILTER PUSHDOWN
+# ===============================================
+# Pages through a whole table (e.g. top_pincode_transaction) without ever loading it: filters
+# and the sort order go into the SQL, and each page is `TOP (page + 1)` rows after the last
+# row of the previous page (keyset pagination – no OFFSET scan, cost independent of the page
+# number). The session only keeps the cursors of the pages it has visited; the next page is
+# prefetched into the query cache (prefetch.py) while the current one is on screen, and the
+# CSV export streams the filtered table in chunks (db.read_sql_chunks) into a spooled file.
+#
+# Sort and key columns may hold NULLs. They sort after every value in both directions (spelled
+# out as a CASE, since SQL Server and DuckDB disagree on the default and SQL Server has no
+# NULLS LAST), and the cursor predicate matches: after a non-NULL value come the larger values
+# and then the NULLs; after a NULL, only the NULLs that tie-break later.
+
+import csv
+import io
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+import db
+import prefetch
+from cache import LOOKUP_TTL
+from fragments import fragment
+
+PAGE_SIZE = int(os.environ.get("PHONEPE_GRID_PAGE_SIZE", "50"))
+EXPORT_SPOOL_MB = 16          # the CSV export spills to a temp file beyond this
+
+
+# ---------- SQL ----------
+class KeysetQuery:
+    # key: columns that identify a row (tie-breakers after the sort column, always ascending)
+    # filters: {column: value} equality filters, bound as :<column in lower case>
+    def __init__(self, table, columns, key, sort, descending=False, filters=None):
+        self.table = table
+        self.columns = list(columns)
+        self.order = [sort] + [c for c in key if c != sort]
+        self.descending = descending
+        self.filters = {c: v for c, v in (filters or {}).items() if v is not None}
+
+    def _where(self, extra=None):
+        conds = [f"{c} = :{c.lower()}" for c in self.filters]
+        if extra:
+            conds.append(extra)
+        return f"WHERE {' AND '.join(conds)}" if conds else ""
+
+    def _order_by(self):
+        first, *rest = self.order
+        terms = [(first, " DESC" if self.descending else "")] + [(c, "") for c in rest]
+        return ", ".join(f"CASE WHEN {c} IS NULL THEN 1 ELSE 0 END, {c}{d}" for c, d in terms)
+
+    def _after(self, cursor, i=0):
+        # rows strictly after the cursor in ORDER BY order:
+        # (a > :c0 OR a IS NULL) OR (a = :c0 AND (b > :c1 OR b IS NULL OR ...)); a NULL cursor
+        # value has no larger values, only its NULL ties: a IS NULL AND (...)
+        col = self.order[i]
+        last = i + 1 == len(self.order)
+        if cursor[i] is None:
+            return "1 = 0" if last else f"{col} IS NULL AND ({self._after(cursor, i + 1)})"
+        op = "<" if i == 0 and self.descending else ">"
+        cond = f"{col} {op} :c{i} OR {col} IS NULL"
+        if not last:
+            cond = f"{cond} OR ({col} = :c{i} AND ({self._after(cursor, i + 1)}))"
+        return cond
+
+    def params(self, cursor=None):
+        params = {c.lower(): v for c, v in self.filters.items()}
+        if cursor is not None:
+            params.update({f"c{i}": v for i, v in enumerate(cursor) if v is not None})
+        return params
+
+    def page(self, cursor=None, size=PAGE_SIZE):
+        # one row more than the page, to know whether there is a next page
+        after = None if cursor is None else f"({self._after(cursor)})"
+        sql = (f"SELECT TOP (:page_rows) {', '.join(self.columns)} FROM dbo.{self.table} "
+               f"{self._where(after)} ORDER BY {self._order_by()}")
+        return sql, dict(self.params(cursor), page_rows=size + 1)
+
+    def all(self):
+        return (f"SELECT {', '.join(self.columns)} FROM dbo.{self.table} {self._where()} "
+                f"ORDER BY {self._order_by()}"), self.params()
+
+    def cursor_of(self, row):
+        # NULLs come back as None/NaN/NA depending on the column's dtype: all of them become None
+        return tuple(None if pd.isna(v) else v.item() if hasattr(v, "item") else v
+                     for v in (row[c] for c in self.order))
+
+
+def fetch_page(query, cursor=None, size=PAGE_SIZE):
+    sql, params = query.page(cursor, size)
+    df = db.read_sql(sql, params, name=f"grid_{query.table}")
+    return df.head(size), len(df) > size
+
+
+def prefetch_page(query, cursor, size=PAGE_SIZE):
+    # warm the query cache with the next page; errors surface when the page is really fetched
+    sql, params = query.page(cursor, size)
+    prefetch.queries("grid", {f"grid_{query.table}": (sql, params)})
+
+
+def export_csv(query):
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MB * 2**20, mode="w+b")
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(query.columns)
+    sql, params = query.all()
+    for chunk in db.read_sql_chunks(sql, params):
+        writer.writerows(chunk.itertuples(index=False, name=None))
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return out
+
+
+def warm(table, columns, key, filter_cols, sort_cols):
+    # what a grid shows when its expander is first opened: the filter lookups and the first page
+    # in the default order (see warmup.py)
+    for col in filter_cols:
+        _lookup(table, col)
+    fetch_page(KeysetQuery(table, columns, key, sort_cols[0], descending=True))
+
+
+# ---------- COMPONENT ----------
+def _lookup(table, col):
+    q = f"SELECT DISTINCT {col} FROM dbo.{table} ORDER BY {col}"
+    return db.read_sql(q, ttl=LOOKUP_TTL, name=f"distinct_{col.lower()}")[col].tolist()
+
+
+def _go(state, step):
+    if step > 0:
+        state["cursors"] = state["cursors"][:state["page"] + 1] + [state["next"]]
+    state["page"] = max(0, state["page"] + step)
+
+
+@fragment
+def drilldown(table, columns, key, filter_cols, sort_cols, title=None, page_size=PAGE_SIZE):
+    # table/column names are identifiers from the caller, never user input; paging, filters and
+    # sort rerun only the grid, not the page around it
+    sid = f"grid:{table}"
+    if title:
+        st.subheader(title)
+
+    cols = st.columns(len(filter_cols) + 2)
+    filters = {}
+    for box, col in zip(cols, filter_cols):
+        choice = box.selectbox(col, ["All"] + _lookup(table, col), key=f"{sid}:f:{col}")
+        filters[col] = None if choice == "All" else choice
+    sort = cols[-2].selectbox("Sort by", sort_cols, key=f"{sid}:sort")
+    descending = cols[-1].toggle("Descending", value=True, key=f"{sid}:desc")
+
+    query = KeysetQuery(table, columns, key, sort, descending, filters)
+    sig = (tuple(sorted(query.filters.items())), sort, descending)
+    state = st.session_state.get(sid)
+    if state is None or state["sig"] != sig:
+        # new filter/sort: start again from the first page
+        state = st.session_state[sid] = {"sig": sig, "cursors": [None], "page": 0, "next": None}
+
+    df, has_next = fetch_page(query, state["cursors"][state["page"]], page_size)
+    state["next"] = query.cursor_of(df.iloc[-1]) if has_next else None
+    if has_next:
+        prefetch_page(query, state["next"], page_size)
+
+    first = state["page"] * page_size
+    st.dataframe(df, hide_index=True)
+    nav = st.columns([1, 1, 4, 2])
+    nav[0].button("◀ Prev", key=f"{sid}:prev", disabled=state["page"] == 0, on_click=_go, args=(state, -1))
+    nav[1].button("Next ▶", key=f"{sid}:next", disabled=not has_next, on_click=_go, args=(state, 1))
+    nav[2].caption(f"Page {state['page'] + 1} · rows {first + 1:,}–{first + len(df):,}" if len(df) else "No rows")
+    nav[3].download_button("Export CSV", lambda: export_csv(query), f"{table}.csv", "text/csv",
+                           key=f"{sid}:export")
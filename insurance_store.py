@@ -0,0 +1,124 @@
+# ===============================================
+# 🛡 INSURANCE STORE – INDEXED, READ-ONLY STATE × YEAR AGGREGATE
+# ===============================================
+# Scenario 3 used to copy, mask and regroup the whole State×Year insurance frame on every
+# sidebar change. The store keeps it once per process as read-only numpy columns, sorted by
+# (state, year) with per-state offsets, plus a per-year ranking by amount with per-year offsets.
+# A state trend, a year's top-N or bottom-N is then a slice lookup – nothing is copied or regrouped.
+
+import numpy as np
+import pandas as pd
+
+import db
+from cache import derived
+
+SOURCE_TABLE = "aggregated_insurance"
+STORE_SQL = """
+SELECT State, Year, SUM(insurance_count) AS total_count, SUM(insurance_amount) AS total_amount
+FROM dbo.aggregated_insurance
+GROUP BY State, Year
+ORDER BY Year;
+"""
+
+
+def _readonly(a):
+    a = np.ascontiguousarray(a)
+    a.setflags(write=False)
+    return a
+
+
+class InsuranceStore:
+    def __init__(self, df):
+        df = df.rename(columns=str.lower).dropna(subset=["state", "year"])
+        df = df.assign(
+            year=df["year"].astype(int),
+            total_amount=pd.to_numeric(df["total_amount"], errors="coerce").fillna(0),
+            total_count=pd.to_numeric(df["total_count"], errors="coerce").fillna(0),
+        ).groupby(["state", "year"], as_index=False)[["total_amount", "total_count"]].sum()
+
+        codes, names = pd.factorize(df["state"], sort=True)
+        year = df["year"].to_numpy()
+        order = np.lexsort((year, codes))                     # by state, then year
+
+        self._names = _readonly(np.asarray(names, dtype=object))
+        self._state = _readonly(codes[order])
+        self._year = _readonly(year[order])
+        self._amount = _readonly(df["total_amount"].to_numpy(float)[order])
+        self._count = _readonly(df["total_count"].to_numpy()[order])
+
+        # rows of state i are [state_bounds[i], state_bounds[i+1])
+        self._state_bounds = np.searchsorted(self._state, np.arange(len(names) + 1))
+        self._state_index = {name: i for i, name in enumerate(names)}
+
+        # per-year ranking (amount desc); rows of a year are a contiguous run of _by_year
+        self._by_year = _readonly(np.lexsort((-self._amount, self._year)))
+        ranked_years = self._year[self._by_year]
+        self._years = _readonly(np.unique(ranked_years))
+        self._year_bounds = dict(zip(self._years.tolist(), zip(
+            np.searchsorted(ranked_years, self._years, side="left").tolist(),
+            np.searchsorted(ranked_years, self._years, side="right").tolist(),
+        )))
+
+        # all-states yearly totals and the overall ranking are small: precompute them
+        self._all_years = (df.groupby("year", as_index=False)[["total_amount", "total_count"]].sum()
+                           .sort_values("year", ignore_index=True))
+        self._overall = _readonly(np.argsort(-self._amount, kind="stable"))
+
+    def __len__(self):
+        return len(self._state)
+
+    def _frame(self, rows):
+        return pd.DataFrame({
+            "state": self._names[self._state[rows]],
+            "year": self._year[rows],
+            "total_count": self._count[rows],
+            "total_amount": self._amount[rows],
+        })
+
+    # ---------- selectors ----------
+    def states(self):
+        return self._names.tolist()
+
+    def years(self):
+        return self._years.tolist()
+
+    def latest_year(self):
+        return int(self._years[-1]) if len(self._years) else None
+
+    # ---------- slices ----------
+    def yearly(self, state=None):
+        # year, total_amount, total_count for one state, or summed over all states
+        if state is None:
+            return self._all_years.copy()
+        i = self._state_index.get(state)
+        if i is None:
+            return self._all_years.iloc[0:0].copy()
+        rows = slice(self._state_bounds[i], self._state_bounds[i + 1])
+        return pd.DataFrame({"year": self._year[rows], "total_amount": self._amount[rows],
+                             "total_count": self._count[rows]})
+
+    def _year_rows(self, year):
+        lo, hi = self._year_bounds.get(int(year), (0, 0))
+        return self._by_year[lo:hi]
+
+    def top(self, year, n):
+        # n states with the largest amount in `year`, largest first
+        return self._frame(self._year_rows(year)[:n])
+
+    def bottom(self, year, n):
+        # n states with the smallest positive amount in `year`, smallest first
+        rows = self._year_rows(year)[::-1]
+        return self._frame(rows[self._amount[rows] > 0][:n])
+
+    def preview(self, n=200):
+        return self._frame(self._overall[:n])
+
+
+def build_store():
+    # ttl=0: the store keeps its own arrays, no need for a second copy in the query cache
+    return InsuranceStore(db.read_sql(STORE_SQL, ttl=0, name="insurance_store"))
+
+
+def get_store():
+    # one store per process, shared by every session; rebuilt when the source table changes
+    return derived.get("insurance_store", [SOURCE_TABLE], build_store)
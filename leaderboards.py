@@ -0,0 +1,76 @@
+# ===============================================
+# 🏆 TOP-N LEADERBOARDS – SCENARIO 4 STATE / DISTRICT / PINCODE
+# ===============================================
+# Scenario 4 used to send a `SELECT TOP (:top_n) ... GROUP BY` (plus a yearly pivot) on every
+# move of the Top Levels slider or the Year selector. Each level's table is read once per
+# process at Year × name grain instead, and the ranked top DEPTH per year, the all-years top
+# DEPTH and the yearly trend are kept. The slider and selectors only slice these.
+
+import pandas as pd
+
+import datasets
+from cache import derived
+
+DEPTH = 25                 # the Top Levels slider goes up to 25
+LEVELS = {
+    "State": "top_state_transaction",
+    "District": "top_district_transaction",
+    "Pincode": "top_pincode_transaction",
+}
+LEADERBOARD_SQL = """
+SELECT Year, {level}, SUM(Transaction_amount) AS total_amount
+FROM dbo.{table}
+GROUP BY Year, {level}
+"""
+
+
+class Leaderboard:
+    def __init__(self, df, depth=DEPTH):
+        df = df.dropna(subset=["Year", "name"])
+        df = df.assign(
+            Year=df["Year"].astype(int),
+            total_amount=pd.to_numeric(df["total_amount"], errors="coerce").fillna(0),
+        )
+        self.depth = depth
+
+        def rank(d):
+            # name, total_amount – largest first, ties by name so the order is stable
+            totals = d.groupby("name", as_index=False, observed=True)["total_amount"].sum()
+            board = totals.sort_values(["total_amount", "name"], ascending=[False, True], ignore_index=True).head(depth)
+            # plain labels on the board, not the dataset's categories (a chart would list them all)
+            return board.assign(name=board["name"].to_numpy())
+
+        # None is the all-years board
+        self._boards = {None: rank(df)}
+        for year, d in df.groupby("Year"):
+            self._boards[int(year)] = rank(d)
+        self._trend = df.groupby("Year", as_index=False)["total_amount"].sum().sort_values("Year", ignore_index=True)
+
+    def years(self):
+        return sorted(y for y in self._boards if y is not None)
+
+    def top(self, year=None, n=DEPTH):
+        # the n largest names of `year` (None = all years); n is capped at the board depth
+        board = self._boards.get(None if year is None else int(year))
+        if board is None:
+            return self._boards[None].iloc[0:0].copy()
+        return board.head(min(n, self.depth)).copy()
+
+    def trend(self, year=None):
+        # Year, total_amount over all names; a single row when a year is selected
+        if year is None:
+            return self._trend.copy()
+        return self._trend[self._trend["Year"] == int(year)].reset_index(drop=True)
+
+
+def build_leaderboard(level):
+    table = LEVELS[level]
+    # the Year × name frame is a shared dataset: State/District compact to categoricals, Pincode
+    # and Year to small ints (see datasets.py)
+    df = datasets.load(f"leaderboard_{level.lower()}", LEADERBOARD_SQL.format(level=level, table=table), [table])
+    return Leaderboard(df.rename(columns={level: "name"}))
+
+
+def get_leaderboard(level):
+    # one board per level and process, shared by every session; rebuilt when its table changes
+    return derived.get(("leaderboard", level), [LEVELS[level]], lambda: build_leaderboard(level))
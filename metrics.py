@@ -0,0 +1,257 @@
+# ===============================================
+# ⏱ INSTRUMENTATION – PER-QUERY / PER-CHART TIMINGS
+# ===============================================
+# db.read_sql records every query (wall time, time in the database, DataFrame build time,
+# rows, bytes, cache hit/miss/coalesced/stale/shared), the views wrap each chart in
+# `metrics.chart(name)`, and test.py wraps the page in `metrics.page(case)`; whatever is left of
+# the page time is pandas post-processing. Events are labelled with the case study and query/chart name and kept in
+# process-wide histograms, which export as Prometheus text (optionally written to a textfile
+# for node_exporter) and, per event, as JSON log lines.
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# ---------- SETTINGS ----------
+METRICS_LOG = os.environ.get("PHONEPE_METRICS_LOG", "")      # JSON event log: "" off, "-" stderr, else a file path
+METRICS_FILE = os.environ.get("PHONEPE_METRICS_FILE", "")    # Prometheus textfile rewritten after each page run
+DEBUG_PANEL = os.environ.get("PHONEPE_DEBUG_PANEL", "0") == "1"   # always show the sidebar panel (else ?debug=1)
+RECENT_EVENTS = 500
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+log = logging.getLogger("phonepe.metrics")
+if METRICS_LOG and not log.handlers:
+    handler = logging.StreamHandler(sys.stderr) if METRICS_LOG == "-" else logging.FileHandler(METRICS_LOG)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+# ---------- PAGE RUNS ----------
+# The page run currently executing in this context (a Streamlit script thread). db.read_sql_many
+# copies the context into its worker threads, so their queries land on the same run.
+class PageRun:
+    def __init__(self, case):
+        self.case = case
+        self.thread = threading.current_thread()
+        self.events = []
+        self.totals = {"query": 0.0, "chart": 0.0}
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def add_time(self, phase, seconds):
+        # only time spent on the page thread adds up to the page: queries on the worker threads
+        # overlap, so a concurrent batch is counted once, as the wall time of the whole batch
+        if threading.current_thread() is self.thread:
+            with self._lock:
+                self.totals[phase] += seconds
+
+
+_run = contextvars.ContextVar("phonepe_page_run", default=None)
+
+
+def current_case():
+    run = _run.get()
+    return run.case if run is not None else "none"
+
+
+# ---------- REGISTRY ----------
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}       # (kind, labels) -> {"count", "sum", "buckets", "rows", "bytes"}
+        self.recent = deque(maxlen=RECENT_EVENTS)
+
+    def observe(self, kind, labels, seconds, rows=0, nbytes=0):
+        key = (kind, tuple(sorted(labels.items())))
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(self.buckets),
+                                         "rows": 0, "bytes": 0}
+            s["count"] += 1
+            s["sum"] += seconds
+            s["rows"] += rows
+            s["bytes"] += nbytes
+            for i, le in enumerate(self.buckets):
+                if seconds <= le:
+                    s["buckets"][i] += 1
+
+    def series(self):
+        with self._lock:
+            return [(kind, dict(labels), dict(s, buckets=list(s["buckets"])))
+                    for (kind, labels), s in self._series.items()]
+
+    def add_recent(self, event):
+        with self._lock:
+            self.recent.append(event)
+
+    def recent_events(self):
+        # a copy: the query/statement threads keep appending while it is exported
+        with self._lock:
+            return list(self.recent)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self.recent.clear()
+
+
+registry = Registry()
+
+
+def _emit(event, run=None):
+    registry.add_recent(event)
+    if run is not None:
+        run.add(event)
+    if log.handlers:
+        log.info(json.dumps(event, default=str))
+
+
+# ---------- HOOKS ----------
+def record_query(name, seconds, rows, nbytes, cache, db_seconds=None, frame_seconds=None):
+    event = {"ts": time.time(), "kind": "query", "case": current_case(), "name": name,
+             "seconds": round(seconds, 6), "rows": rows, "bytes": nbytes, "cache": cache}
+    if db_seconds is not None:
+        event["db_seconds"] = round(db_seconds, 6)
+    if frame_seconds is not None:
+        event["frame_seconds"] = round(frame_seconds, 6)
+    registry.observe("query", {"case": event["case"], "query": name, "cache": cache}, seconds, rows, nbytes)
+    run = _run.get()
+    _emit(event, run)
+    if run is not None:
+        run.add_time("query", seconds)
+
+
+def record_batch(seconds):
+    run = _run.get()
+    if run is not None:
+        run.add_time("query", seconds)
+
+
+@contextmanager
+def chart(name):
+    run = _run.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        event = {"ts": time.time(), "kind": "chart", "case": current_case(), "name": name,
+                 "seconds": round(seconds, 6)}
+        registry.observe("chart", {"case": event["case"], "chart": name}, seconds)
+        _emit(event, run)
+        if run is not None:
+            run.add_time("chart", seconds)
+
+
+# per-thread stage timers, filled by the execution path and collected by read_sql
+_stages = threading.local()
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        d = getattr(_stages, "d", None)
+        if d is None:
+            d = _stages.d = {}
+        d[name] = d.get(name, 0.0) + time.perf_counter() - start
+
+
+def take_stages():
+    d = getattr(_stages, "d", None) or {}
+    _stages.d = {}
+    return d
+
+
+@contextmanager
+def page(case):
+    run = PageRun(case)
+    token = _run.set(run)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+        seconds = time.perf_counter() - start
+        other = max(0.0, seconds - run.totals["query"] - run.totals["chart"])
+        event = {"ts": time.time(), "kind": "page", "case": case, "name": case, "seconds": round(seconds, 6),
+                 "query_seconds": round(run.totals["query"], 6), "chart_seconds": round(run.totals["chart"], 6),
+                 "other_seconds": round(other, 6)}
+        run.summary = event
+        registry.observe("page", {"case": case}, seconds)
+        registry.observe("page_other", {"case": case}, other)
+        _emit(event)
+        if METRICS_FILE:
+            try:
+                write_textfile(METRICS_FILE)
+            except OSError as e:
+                log.warning("could not write %s: %s", METRICS_FILE, e)
+
+
+# ---------- EXPORT ----------
+_HELP = {
+    "query": ("phonepe_query_seconds", "Wall time of a dashboard query, cache lookup included"),
+    "chart": ("phonepe_chart_seconds", "Time to build and emit a chart"),
+    "page": ("phonepe_page_seconds", "Time to render a page"),
+    "page_other": ("phonepe_page_other_seconds", "Page time outside queries and charts (pandas post-processing)"),
+}
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    series = registry.series()
+    lines = []
+    for kind, (metric, help_) in _HELP.items():
+        rows = [(labels, s) for k, labels, s in series if k == kind]
+        if not rows:
+            continue
+        lines += [f"# HELP {metric} {help_}", f"# TYPE {metric} histogram"]
+        for labels, s in rows:
+            for le, n in zip(registry.buckets, s["buckets"]):
+                lines.append(f"{metric}_bucket{_labels(labels, le=le)} {n}")
+            lines.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {s['count']}")
+            lines.append(f"{metric}_sum{_labels(labels)} {s['sum']:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {s['count']}")
+    queries = [(labels, s) for k, labels, s in series if k == "query"]
+    for metric, field, help_ in [("phonepe_query_rows_total", "rows", "Rows returned by dashboard queries"),
+                                 ("phonepe_query_bytes_total", "bytes", "Bytes of the result frames")]:
+        if queries:
+            lines += [f"# HELP {metric} {help_}", f"# TYPE {metric} counter"]
+            lines += [f"{metric}{_labels(labels)} {s[field]}" for labels, s in queries]
+    return "\n".join(lines) + "\n"
+
+
+def events_json(events=None):
+    events = registry.recent_events() if events is None else events
+    return "\n".join(json.dumps(e, default=str) for e in events) + "\n"
+
+
+def write_textfile(path):
+    # atomic replace, so a scraper never reads a half-written file
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
@@ -0,0 +1,122 @@
+# ===============================================
+# 🔮 PREFETCH – WARM THE NEXT LIKELY SELECTION IN THE BACKGROUND
+# ===============================================
+# After a view renders, the views queue what the user is likely to look at next: the adjacent
+# Year/Quarter filter in Scenario 5, the other modes' leaderboards in Scenario 4, the next page
+# of a drill-down grid. A couple of low-priority worker threads run the newest tasks first, each
+# only once no session is waiting for a query of its own (db.foreground_busy), and inside
+# cache.background() so the caches count what was prefetched and how much of it got used.
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import db
+from cache import background, derived, query_cache
+
+PREFETCH_WORKERS = int(os.environ.get("PHONEPE_PREFETCH_WORKERS", "2"))   # concurrent prefetch queries, 0 = off
+QUEUE_SIZE = 32            # oldest tasks are dropped beyond this: the user has moved on
+PATIENCE = 5.0             # seconds a task waits for the sessions' queries before it is skipped
+
+log = logging.getLogger("phonepe.prefetch")
+
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS):
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._queue = OrderedDict()      # label -> fn, newest last
+        self._threads = []
+        self._stats = {"queued": 0, "dropped": 0, "run": 0, "skipped_busy": 0, "errors": 0}
+
+    def submit(self, label, fn):
+        # label identifies the task, so a view rendered twice doesn't queue its neighbours twice
+        if self.workers <= 0:
+            return
+        with self._cond:
+            if label in self._queue:
+                self._queue.move_to_end(label)
+                return
+            self._queue[label] = fn
+            self._stats["queued"] += 1
+            while len(self._queue) > QUEUE_SIZE:
+                self._queue.popitem(last=False)
+                self._stats["dropped"] += 1
+            if len(self._threads) < self.workers:
+                t = threading.Thread(target=self._work, name=f"phonepe-prefetch-{len(self._threads)}", daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cond.notify()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                label, fn = self._queue.popitem(last=True)
+            deadline = time.monotonic() + PATIENCE
+            while db.foreground_busy() and time.monotonic() < deadline:
+                time.sleep(db.WAIT_SLICE)
+            if db.foreground_busy():
+                with self._cond:
+                    self._stats["skipped_busy"] += 1
+                continue
+            try:
+                with background():
+                    fn()
+                with self._cond:
+                    self._stats["run"] += 1
+            except Exception as e:
+                # a failed prefetch costs nothing: the session runs the query itself if it needs it
+                log.debug("prefetch %s failed: %s", label, e)
+                with self._cond:
+                    self._stats["errors"] += 1
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s["pending"] = len(self._queue)
+            s["workers"] = self.workers
+        q, d = query_cache.stats(), derived.stats()
+        s["prefetched"] = q["prefetched"] + d["prefetched"]
+        s["hits"] = q["prefetch_hits"] + d["prefetch_hits"]
+        s["hit_rate"] = s["hits"] / s["prefetched"] if s["prefetched"] else 0.0
+        return s
+
+
+prefetcher = Prefetcher()
+
+
+def submit(label, fn):
+    prefetcher.submit(label, fn)
+
+
+def queries(label, queries, ttl=None, compact=()):
+    # queries: {name: (sql, params)} as for db.read_sql_many, each warmed into the query cache,
+    # or into the dataset registry under the same name for the names in `compact`
+    def warm(name, sql, params):
+        if name in compact:
+            db.read_query(name, (sql, params), ttl, compact)
+        else:
+            db.read_sql(sql, params, ttl, f"{name}_prefetch")
+
+    for name, (sql, params) in queries.items():
+        submit((label, name, tuple(sorted((params or {}).items()))),
+               lambda sql=sql, params=params, name=name: warm(name, sql, params))
+
+
+def neighbours(values, current, n=1):
+    # the values next to `current` in `values` (e.g. the adjacent years), nearest first
+    if current not in values:
+        return []
+    i = values.index(current)
+    out = []
+    for d in range(1, n + 1):
+        out += [values[j] for j in (i + d, i - d) if 0 <= j < len(values)]
+    return out
+
+
+def stats():
+    return prefetcher.stats()
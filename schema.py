@@ -0,0 +1,31 @@
+# ===============================================
+# 🧾 DASHBOARD TABLE SCHEMA
+# ===============================================
+# Columns of the ten SQL Server tables the dashboard reads (all in the dbo schema).
+# Every table is keyed by State/Year/Quarter plus the level named in the table.
+
+COLUMNS = {
+    "aggregated_transaction": ["State", "Year", "Quarter", "Transaction_type", "Transaction_count", "Transaction_amount"],
+    "aggregated_user": ["State", "Year", "Quarter", "user_brand", "user_count", "user_percentage"],
+    "aggregated_insurance": ["State", "Year", "Quarter", "insurance_type", "insurance_count", "insurance_amount"],
+    "map_user": ["State", "Year", "Quarter", "District", "m_registered_Users", "m_app_Opens"],
+    "top_state_transaction": ["State", "Year", "Quarter", "Transaction_count", "Transaction_amount"],
+    "top_district_transaction": ["State", "Year", "Quarter", "District", "Transaction_count", "Transaction_amount"],
+    "top_pincode_transaction": ["State", "Year", "Quarter", "Pincode", "Transaction_count", "Transaction_amount"],
+    "top_user_state": ["State", "Year", "Quarter", "registeredUsers"],
+    "top_user_district": ["State", "Year", "Quarter", "District", "registeredUsers"],
+    "top_user_pincode": ["State", "Year", "Quarter", "Pincode", "registeredUsers"],
+}
+
+TABLES = list(COLUMNS)
+
+STATES = [
+    "andaman-&-nicobar-islands", "andhra-pradesh", "arunachal-pradesh", "assam", "bihar",
+    "chandigarh", "chhattisgarh", "dadra-&-nagar-haveli-&-daman-&-diu", "delhi", "goa",
+    "gujarat", "haryana", "himachal-pradesh", "jammu-&-kashmir", "jharkhand", "karnataka",
+    "kerala", "ladakh", "lakshadweep", "madhya-pradesh", "maharashtra", "manipur", "meghalaya",
+    "mizoram", "nagaland", "odisha", "puducherry", "punjab", "rajasthan", "sikkim", "tamil-nadu",
+    "telangana", "tripura", "uttar-pradesh", "uttarakhand", "west-bengal",
+]
+YEARS = list(range(2018, 2025))
+QUARTERS = [1, 2, 3, 4]
@@ -0,0 +1,531 @@
+# ===============================================
+# 🗄 SHARED RESULT CACHE – ONE TIER FOR EVERY WORKER PROCESS
+# ===============================================
+# Several Streamlit processes run behind the load balancer, each with its own query cache and
+# derived objects (cache.py). Below those sits this tier, keyed by the same versioned keys: query
+# results, shared datasets and rendered figures that one worker computed are read by the others
+# instead of being queried or drawn again. The default backend is a directory of files that are
+# read through memory maps, so the OS page cache holds one copy for all processes on the host.
+# DataFrames are stored as Arrow IPC (the columns come back without a parse step), rendered
+# images as their bytes and figure dicts as JSON; nothing is unpickled, so whoever can write an
+# entry still can't run code in the workers. Other values aren't shared. An entry is written to a
+# temp file and renamed into place, so a reader sees all of it or nothing; once the directory
+# outgrows its budget the least recently used entries are deleted. A network backend (redis)
+# shares between hosts; the memory backend stands in for it in a single process.
+#
+# Entries outlive the process, so only keys that carry a probed version for every table they
+# read are shared: before the first probe a key can't tell one load of the data from the next.
+# Invalidating tables (or some of their years) bumps a generation token per table and per
+# (table, year) that the backend keeps for all workers; entry names include the tokens of what
+# they read, so the old entries are out of reach from then on and age out with the LRU.
+
+import getpass
+import hashlib
+import logging
+import mmap
+import json
+import os
+import secrets
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+# ---------- SETTINGS ----------
+_USER = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+SHARED_CACHE = os.environ.get("PHONEPE_SHARED_CACHE", "disk")                  # disk | memory | off | redis://host:port/db
+SHARED_CACHE_DIR = Path(os.environ.get("PHONEPE_SHARED_CACHE_DIR",
+                                       Path(tempfile.gettempdir()) / f"phonepe-cache-{_USER}"))
+SHARED_CACHE_MB = float(os.environ.get("PHONEPE_SHARED_CACHE_MB", "1024"))      # size budget of the tier
+RESCAN_EVERY = 60.0        # seconds before a worker re-reads the directory size the others add to
+TEMP_MAX_AGE = 3600.0      # temp files older than this were left by a crashed writer
+
+FORMAT = 2                 # part of every key: a new layout never reads the old one's entries
+_HEADER = struct.Struct("<4sc3xd")   # magic, kind, expires_at (epoch); 16 bytes keep the Arrow body aligned
+_MAGIC = b"PPSC"
+_FRAME, _BYTES, _JSON = b"F", b"B", b"J"
+
+log = logging.getLogger("phonepe.shared_cache")
+
+
+# ---------- SERIALIZATION ----------
+def encode(value, ttl):
+    # -> [chunks]: header + body, written one after the other (no joined copy for big frames),
+    # or None for a value the tier doesn't store
+    expires_at = time.time() + ttl
+    if isinstance(value, pd.DataFrame):
+        try:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(value)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return [_HEADER.pack(_MAGIC, _FRAME, expires_at), sink.getvalue()]
+        except (ImportError, ValueError, TypeError):
+            # no pyarrow, or a column Arrow can't type (mixed objects)
+            return None
+    if isinstance(value, bytes):
+        return [_HEADER.pack(_MAGIC, _BYTES, expires_at), value]
+    if isinstance(value, dict):
+        try:
+            return [_HEADER.pack(_MAGIC, _JSON, expires_at), json.dumps(value).encode()]
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def expired(buf):
+    magic, _, expires_at = _HEADER.unpack_from(buf)
+    return magic != _MAGIC or expires_at <= time.time()
+
+
+def decode(buf):
+    # buf: bytes or a memory map; a frame's numeric columns stay backed by the map (copy-on-write
+    # copies a column the first time a session modifies it)
+    _, kind, _ = _HEADER.unpack_from(buf)
+    if kind == _FRAME:
+        import pyarrow as pa
+
+        return pa.ipc.open_file(pa.py_buffer(buf).slice(_HEADER.size)).read_all().to_pandas()
+    if kind == _BYTES:
+        return bytes(memoryview(buf)[_HEADER.size:])
+    if kind == _JSON:
+        return json.loads(bytes(memoryview(buf)[_HEADER.size:]))
+    raise ValueError(f"unknown shared cache entry kind {kind!r}")
+
+
+def _size(chunks):
+    return sum(memoryview(c).nbytes for c in chunks)
+
+
+# ---------- DISK BACKEND ----------
+def private_dir(path):
+    # creates `path` for this user only, or checks that an existing one is: anyone who can write
+    # entries decides what every worker serves
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if hasattr(os, "getuid"):
+        if st.st_uid != os.getuid():
+            raise PermissionError(f"{path} is owned by uid {st.st_uid}, not this user")
+        if st.st_mode & 0o077:
+            raise PermissionError(f"{path} is accessible to other users (mode {stat.S_IMODE(st.st_mode):o})")
+    return path
+
+
+class DiskBackend:
+    # one file per entry in a directory all workers on the host share
+    kind = "disk"
+
+    def __init__(self, root=SHARED_CACHE_DIR, max_bytes=int(SHARED_CACHE_MB * 1024 * 1024)):
+        self.root = private_dir(Path(root))
+        self.gens = self.root / "generations"     # never evicted: a lost token would orphan entries, not revive them
+        self.gens.mkdir(mode=0o700, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = None       # this worker's estimate of the directory size; None = scan first
+        self._scanned = 0.0
+        self._stats = {"evictions": 0, "write_errors": 0}
+
+    def get(self, name):
+        path = self.root / name
+        try:
+            with open(path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            # eviction goes by modification time, so a read counts as a use
+            os.utime(path)
+        except OSError:
+            pass
+        return buf
+
+    def put(self, name, chunks, ttl):
+        size = _size(chunks)
+        if size > self.max_bytes // 4:
+            return False
+        tmp = self.root / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                for c in chunks:
+                    f.write(c)
+            os.replace(tmp, self.root / name)
+        except OSError:
+            # e.g. on Windows the target is mapped by a reader: the entry is there already
+            with self._lock:
+                self._stats["write_errors"] += 1
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            rescan = self._bytes is None or time.monotonic() - self._scanned > RESCAN_EVERY
+            self._bytes = (self._bytes or 0) + size
+            over = self._bytes > self.max_bytes
+        if rescan or over:
+            self.evict()
+        return True
+
+    def delete(self, name):
+        try:
+            os.unlink(self.root / name)
+        except OSError:
+            pass
+
+    def generations(self, names):
+        return [self._generation(n) for n in names]
+
+    def _generation(self, name):
+        path = self.gens / name
+        try:
+            return path.read_text()
+        except FileNotFoundError:
+            pass
+        # first use: a new random token; link() fails if another worker created one meanwhile
+        tmp = self.gens / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(secrets.token_hex(8))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+        return path.read_text()
+
+    def bump(self, names):
+        for name in names:
+            tmp = self.gens / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp.write_text(secrets.token_hex(8))
+            os.replace(tmp, self.gens / name)
+
+    def clear(self):
+        # temp files belong to writes in progress
+        for e in os.scandir(self.root):
+            if e.is_file() and not e.name.startswith("."):
+                self.delete(e.name)
+        with self._lock:
+            self._bytes = 0
+
+    def evict(self):
+        # the other workers write here too, so the real size only comes from a scan
+        now = time.time()
+        entries, total = [], 0
+        for e in os.scandir(self.root):
+            if not e.is_file():
+                continue
+            try:
+                st = e.stat()
+            except OSError:
+                continue
+            if e.name.startswith("."):
+                if now - st.st_mtime > TEMP_MAX_AGE:
+                    self.delete(e.name)
+                continue
+            entries.append((st.st_mtime, st.st_size, e.name))
+            total += st.st_size
+        evicted = 0
+        if total > self.max_bytes:
+            # down to 90% of the budget, so the next few writes don't each trigger a scan
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.unlink(self.root / name)
+                except OSError:
+                    # gone already (another worker evicted it), or mapped by a reader on Windows
+                    continue
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._bytes = total
+            self._scanned = time.monotonic()
+            self._stats["evictions"] += evicted
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["bytes"] = self._bytes
+        s.update(backend=self.kind, dir=str(self.root), max_bytes=self.max_bytes)
+        return s
+
+
+# ---------- MEMORY BACKEND ----------
+class MemoryBackend:
+    # the network backend's interface in one process: a local stand-in for tests and development
+    kind = "memory"
+
+    def __init__(self, max_bytes=int(SHARED_CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # name -> bytes; least recently used first
+        self._gens = {}
+        self._bytes = 0
+        self._stats = {"evictions": 0}
+
+    def get(self, name):
+        with self._lock:
+            data = self._entries.get(name)
+            if data is not None:
+                self._entries.move_to_end(name)
+            return data
+
+    def put(self, name, chunks, ttl):
+        data = b"".join(chunks)
+        if len(data) > self.max_bytes // 4:
+            return False
+        with self._lock:
+            self._bytes -= len(self._entries.pop(name, b""))
+            self._entries[name] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+                self._stats["evictions"] += 1
+        return True
+
+    def delete(self, name):
+        with self._lock:
+            self._bytes -= len(self._entries.pop(name, b""))
+
+    def generations(self, names):
+        with self._lock:
+            return [self._gens.setdefault(n, secrets.token_hex(8)) for n in names]
+
+    def bump(self, names):
+        with self._lock:
+            for n in names:
+                self._gens[n] = secrets.token_hex(8)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["bytes"] = self._bytes
+            s["entries"] = len(self._entries)
+        s.update(backend=self.kind, max_bytes=self.max_bytes)
+        return s
+
+
+# ---------- REDIS BACKEND ----------
+class RedisBackend:
+    # shared between hosts; entries expire with their TTL, and the server's maxmemory policy
+    # (allkeys-lru) bounds the size. Needs the `redis` package.
+    kind = "redis"
+    PREFIX = "phonepe:cache:"
+    GEN_PREFIX = "phonepe:gen:"
+
+    def __init__(self, url, max_bytes=int(SHARED_CACHE_MB * 1024 * 1024)):
+        import redis
+
+        self.url = url
+        self.max_bytes = max_bytes
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0)
+
+    def get(self, name):
+        return self._client.get(self.PREFIX + name)
+
+    def put(self, name, chunks, ttl):
+        data = b"".join(chunks)
+        if len(data) > self.max_bytes // 4:
+            return False
+        px = int(ttl * 1000) if ttl < float("inf") else None
+        self._client.set(self.PREFIX + name, data, px=px)
+        return True
+
+    def delete(self, name):
+        self._client.delete(self.PREFIX + name)
+
+    def generations(self, names):
+        # an evicted token is replaced by a new one, which orphans its entries instead of reviving them
+        keys = [self.GEN_PREFIX + n for n in names]
+        tokens = self._client.mget(keys)
+        for key, token in zip(keys, tokens):
+            if token is None:
+                self._client.set(key, secrets.token_hex(8), nx=True)
+        if None in tokens:
+            tokens = self._client.mget(keys)
+        return [t.decode() if isinstance(t, bytes) else t for t in tokens]
+
+    def bump(self, names):
+        with self._client.pipeline() as pipe:
+            for n in names:
+                pipe.set(self.GEN_PREFIX + n, secrets.token_hex(8))
+            pipe.execute()
+
+    def clear(self):
+        for key in self._client.scan_iter(self.PREFIX + "*"):
+            self._client.delete(key)
+
+    def stats(self):
+        return {"backend": self.kind, "url": self.url, "max_bytes": self.max_bytes}
+
+
+BACKENDS = {"disk": DiskBackend, "memory": MemoryBackend, "redis": RedisBackend}
+
+
+def make_backend(spec=SHARED_CACHE):
+    # "disk" | "memory" | "off" | "<scheme>://..." for a network backend registered in BACKENDS
+    if spec in ("", "off"):
+        return None
+    scheme = spec.split("://", 1)[0]
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown PHONEPE_SHARED_CACHE backend: {spec}")
+    return BACKENDS[scheme](spec) if "://" in spec else BACKENDS[scheme]()
+
+
+# ---------- SHARED CACHE ----------
+def versioned(key):
+    # cache.py keys end with their data versions: ((table, tokens), ...)
+    return all(tokens is not None for _, tokens in key[-1])
+
+
+def generation_names(versions):
+    # the table, and each year the key's versions cover: "aggregated_transaction", "aggregated_transaction.2023"
+    for table, tokens in versions:
+        yield table
+        for year, _ in tokens:
+            yield f"{table}.{year}"
+
+
+class SharedCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "unversioned": 0, "errors": 0,
+                       "unsupported": 0, "invalidations": 0}
+
+    def name(self, key):
+        gens = self.backend.generations(list(generation_names(key[-1])))
+        return hashlib.sha256(repr((FORMAT, key, gens)).encode()).hexdigest()
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _usable(self, key):
+        if self.backend is None:
+            return False
+        if not versioned(key):
+            self._count("unversioned")
+            return False
+        return True
+
+    def get(self, key):
+        # -> the value another worker (or this one) stored under `key`, or None
+        if not self._usable(key):
+            return None
+        try:
+            name = self.name(key)
+            buf = self.backend.get(name)
+            if buf is not None and expired(buf):
+                self.backend.delete(name)
+                self._count("expired")
+                buf = None
+            value = None if buf is None else decode(buf)
+        except Exception as e:
+            # the tier is an optimization: a broken entry or an unreachable server is a miss
+            log.debug("shared cache read failed: %s", e)
+            self._count("errors")
+            return None
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def put(self, key, value, ttl):
+        if ttl <= 0 or not self._usable(key):
+            return False
+        chunks = encode(value, ttl)
+        if chunks is None:
+            self._count("unsupported")
+            return False
+        try:
+            written = self.backend.put(self.name(key), chunks, ttl)
+        except Exception as e:
+            log.debug("shared cache write failed: %s", e)
+            self._count("errors")
+            return False
+        if written:
+            self._count("writes")
+        return written
+
+    def invalidate(self, tables, years=None):
+        # years=None: every entry that read the tables; otherwise those that read one of the years
+        if self.backend is None:
+            return
+        tables = {t.lower().split(".")[-1] for t in tables}
+        names = sorted(tables) if years is None else [f"{t}.{int(y)}" for t in sorted(tables) for y in years]
+        try:
+            self.backend.bump(names)
+        except Exception as e:
+            log.warning("shared cache invalidation failed: %s", e)
+            self._count("errors")
+            return
+        self._count("invalidations")
+
+    def clear(self):
+        if self.backend is not None:
+            try:
+                self.backend.clear()
+            except Exception as e:
+                log.debug("shared cache clear failed: %s", e)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        if self.backend is not None:
+            s.update(self.backend.stats())
+        else:
+            s["backend"] = "off"
+        return s
+
+
+def _default_backend():
+    try:
+        return make_backend()
+    except Exception as e:
+        # e.g. a read-only or foreign cache directory, or redis not installed: run with the per-process caches only
+        log.warning("shared cache disabled: %s", e)
+        return None
+
+
+shared = SharedCache(_default_backend())
+
+
+def get(key):
+    return shared.get(key)
+
+
+def put(key, value, ttl):
+    return shared.put(key, value, ttl)
+
+
+def set_backend(backend):
+    # swap the backend, e.g. for a MemoryBackend standing in for a network one
+    shared.backend = backend
+
+
+def invalidate(tables, years=None):
+    shared.invalidate(tables, years)
+
+
+def clear():
+    shared.clear()
+
+
+def stats():
+    return shared.stats()
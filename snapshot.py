@@ -0,0 +1,209 @@
+# ===============================================
+# 📦 LOCAL SNAPSHOT – PARQUET EXPORT + EMBEDDED DUCKDB ENGINE
+# ===============================================
+# The dashboard only reads ten small tables. `python snapshot.py` copies them from SQL Server
+# into Parquet (partitioned by Year/Quarter); with PHONEPE_DATA_SOURCE=snapshot every query is
+# then answered in-process by DuckDB, and SQL Server is only needed to refresh the snapshot.
+# In the default (sqlserver) mode the snapshot is still used as a fallback when the DB is down.
+#
+# Needs `pyarrow` and `duckdb`; both are imported only when a snapshot is written or read.
+
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+from schema import TABLES
+
+SNAPSHOT_DIR = Path(os.environ.get("PHONEPE_SNAPSHOT_DIR", Path(__file__).resolve().parent / "snapshot"))
+MANIFEST = "_manifest.json"
+
+PARTITION_COLS = ["Year", "Quarter"]
+
+
+# ---------- EXPORT (SQL Server -> Parquet) ----------
+def write_table(df, root, table):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parts = [c for c in PARTITION_COLS if c in df.columns]
+    data = pa.Table.from_pandas(df, preserve_index=False)
+    if parts:
+        pq.write_to_dataset(data, root_path=str(Path(root) / table), partition_cols=parts)
+    else:
+        (Path(root) / table).mkdir(parents=True, exist_ok=True)
+        pq.write_table(data, str(Path(root) / table / "part-0.parquet"))
+    return data.num_rows
+
+
+def publish(tmp_dir, target=SNAPSHOT_DIR, manifest=None):
+    # swap the finished snapshot in with renames, so a reader never sees a half-written one
+    target = Path(target)
+    (Path(tmp_dir) / MANIFEST).write_text(json.dumps(manifest or {}, indent=2))
+    old = target.with_name(target.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        target.rename(old)
+    Path(tmp_dir).rename(target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def export_snapshot(target=SNAPSHOT_DIR, tables=TABLES):
+    import db
+
+    target = Path(target)
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    rows = {}
+    start = time.perf_counter()
+    for table in tables:
+        t0 = time.perf_counter()
+        df = db.read_sql_uncached(f"SELECT * FROM dbo.{table}")
+        rows[table] = write_table(df, tmp, table)
+        print(f"{table:<28} {rows[table]:>10,} rows  {time.perf_counter() - t0:6.2f}s")
+
+    publish(tmp, target, {"exported_at": time.time(), "source": "sqlserver", "rows": rows})
+    print(f"Snapshot written to {target} in {time.perf_counter() - start:.2f}s")
+    return rows
+
+
+# ---------- EMBEDDED ENGINE ----------
+# SQL Server's `SELECT TOP n` / `TOP (?)` becomes a trailing LIMIT; everything else the
+# scenarios use (dbo. schema, CAST AS BIGINT, COALESCE) runs on DuckDB unchanged.
+_TOP = re.compile(r"^(\s*SELECT\s+)TOP\s*(?:\(\s*(\?|\d+)\s*\)|(\d+))\s+", re.IGNORECASE)
+
+
+def to_duckdb(sql, values=()):
+    values = list(values)
+    m = _TOP.match(sql)
+    if not m:
+        return sql, values
+    limit = m.group(2) or m.group(3)
+    sql = m.group(1) + sql[m.end():]
+    sql = sql.rstrip().rstrip(";") + f" LIMIT {limit}"
+    if limit == "?":
+        # TOP's placeholder comes first in the statement, LIMIT's comes last
+        values = values[1:] + values[:1]
+    return sql, values
+
+
+def arrow_reader(cur, batch_rows):
+    # DuckDB >= 1.4 renamed fetch_record_batch
+    fetch = getattr(cur, "to_arrow_reader", None) or cur.fetch_record_batch
+    return fetch(batch_rows)
+
+
+class SnapshotEngine:
+    def __init__(self, root=SNAPSHOT_DIR):
+        import duckdb
+
+        self.root = Path(root)
+        self.manifest = json.loads((self.root / MANIFEST).read_text())
+        self.versions = self._versions()
+        self._con = duckdb.connect(":memory:")
+        self._con.execute("CREATE SCHEMA IF NOT EXISTS dbo")
+        for table in TABLES:
+            path = self.root / table
+            if not path.exists():
+                continue
+            # tables are small: load them into DuckDB memory once instead of scanning files per query
+            self._con.execute(
+                f"CREATE TABLE dbo.{table} AS SELECT * FROM read_parquet(?, hive_partitioning = true)",
+                [(path / "**" / "*.parquet").as_posix()],
+            )
+
+    def _versions(self):
+        # {table: {year: token}} from the manifest, so probing a snapshot scans nothing (see db.probe).
+        # etl.py fingerprints every (Year, Quarter) partition it loads; an export replaces the whole
+        # snapshot, so its version or export time stands for every year.
+        stamp = self.manifest.get("version", self.manifest.get("exported_at"))
+        if stamp is None:
+            stamp = (self.root / MANIFEST).stat().st_mtime
+        out = {}
+        for table in TABLES:
+            path = self.root / table
+            if not path.exists():
+                continue
+            quarters = {}
+            for key, fingerprint in self.manifest.get("partitions", {}).get(table, {}).items():
+                year, quarter = key.split("-")
+                quarters.setdefault(int(year), []).append(f"{quarter}:{fingerprint}")
+            out[table] = {}
+            for part in path.glob("Year=*"):
+                year = part.name.split("=", 1)[1]
+                if year.isdigit():
+                    out[table][int(year)] = ",".join(sorted(quarters.get(int(year), []))) or f"v{stamp}"
+        return out
+
+    def read(self, sql, values=(), attach=None):
+        # attach(cursor): lets the caller interrupt the statement from another thread (see db.Statement)
+        sql, values = to_duckdb(sql, values)
+        # one cursor per call: DuckDB cursors are cheap, thread-local connections to the same DB
+        cur = self._con.cursor()
+        try:
+            if attach is not None:
+                attach(cur)
+            return cur.execute(sql, values).df()
+        finally:
+            cur.close()
+
+
+    def read_chunks(self, sql, values=(), chunksize=50_000):
+        # Arrow record batches, not row tuples (see columnar.py)
+        from columnar import to_frame
+
+        sql, values = to_duckdb(sql, values)
+        cur = self._con.cursor()
+        try:
+            reader = arrow_reader(cur.execute(sql, values), chunksize)
+            for batch in reader:
+                yield to_frame([batch], reader.schema)
+        finally:
+            cur.close()
+
+
+def available(root=SNAPSHOT_DIR):
+    return (Path(root) / MANIFEST).exists()
+
+
+_engine = None
+_engine_mtime = None
+_engine_lock = threading.Lock()
+
+
+def changes(old, new):
+    # [(tables, years)] to invalidate when manifest `new` replaces `old`; a version published
+    # by an incremental load (etl.py) names what it changed, anything else clears everything
+    if new.get("previous_version") is None or new.get("previous_version") != old.get("version"):
+        return [(None, None)]
+    out = []
+    for table, parts in (new.get("changed") or {}).items():
+        out.append(([table], None if parts is None else sorted({y for y, _ in parts})))
+    return out
+
+
+def get_engine(root=SNAPSHOT_DIR):
+    # reload when a refresh has published a new snapshot (cheap stat of the manifest)
+    global _engine, _engine_mtime
+    mtime = (Path(root) / MANIFEST).stat().st_mtime
+    if _engine is None or mtime != _engine_mtime:
+        with _engine_lock:
+            if _engine is None or mtime != _engine_mtime:
+                old = _engine
+                _engine = SnapshotEngine(root)
+                _engine_mtime = mtime
+                if old is not None:
+                    from cache import invalidate
+                    for tables, years in changes(old.manifest, _engine.manifest):
+                        invalidate(tables, years)
+    return _engine
+
+
+if __name__ == "__main__":
+    export_snapshot(Path(sys.argv[1]) if len(sys.argv) > 1 else SNAPSHOT_DIR)
@@ -0,0 +1,83 @@
+# ===============================================
+# ⏱ STARTUP PROFILE – PER-PAGE IMPORT COST
+# ===============================================
+# `python test.py --profile-startup` (or `python startup.py`) imports the app shell and then each
+# page module in a fresh interpreter, so every number is a cold start. Under each step it lists
+# that module's heaviest direct imports as reported by `python -X importtime`.
+
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SHELL = ["streamlit", "pandas", "db", "cache"]          # what test.py imports before any page
+PAGES = {
+    "Home": "views.home",
+    "Scenario 1": "views.scenario1",
+    "Scenario 2": "views.scenario2",
+    "Scenario 3": "views.scenario3",
+    "Scenario 4": "views.scenario4",
+    "Scenario 5": "views.scenario5",
+}
+# Scenario 2 draws in chart workers; time their first-use imports too
+FIRST_USE = {"views.scenario2": ["matplotlib.figure", "seaborn"]}
+
+_DRIVER = """
+import json, sys, time
+out = {}
+for mod in sys.argv[1:]:
+    t = time.perf_counter()
+    __import__(mod)
+    out[mod] = time.perf_counter() - t
+print(json.dumps(out))
+"""
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(modules):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _DRIVER, *modules],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    steps = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # importtime lists a module's imports right before the module itself, two spaces deeper
+    children, pending = {}, []
+    for m in _IMPORTTIME.finditer(proc.stderr):
+        depth, name, cumulative = len(m.group(3)), m.group(4), int(m.group(2)) / 1e6
+        if depth == 3:
+            pending.append((cumulative, name))
+        elif depth == 1:
+            children[name] = sorted(pending, reverse=True)
+            pending = []
+    return steps, children
+
+
+def main(top=5):
+    shell_steps, _ = profile(SHELL)
+    shell_total = sum(shell_steps.values())
+    print(f"{'app shell':<14}{shell_total * 1000:9.0f} ms  ({', '.join(SHELL)})")
+    for mod, secs in shell_steps.items():
+        print(f"{'':<16}{mod:<28}{secs * 1000:9.0f} ms")
+
+    for page, module in PAGES.items():
+        extra = FIRST_USE.get(module, [])
+        try:
+            steps, children = profile(SHELL + [module] + extra)
+        except RuntimeError as e:
+            print(f"{page:<14}   failed  ({e})")
+            continue
+        own = sum(steps[m] for m in [module] + extra)
+        print(f"{page:<14}{own * 1000:9.0f} ms  on top of the shell")
+        for mod in [module] + extra:
+            print(f"{'':<16}{mod:<28}{steps[mod] * 1000:9.0f} ms")
+            for secs, child in children.get(mod, [])[:top]:
+                print(f"{'':<18}- {child:<26}{secs * 1000:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
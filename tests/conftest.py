@@ -0,0 +1,12 @@
+# The app modules are flat and read their settings at import time: put them on the path, with
+# the in-process shared cache and nothing started in the background.
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("PHONEPE_SHARED_CACHE", "memory")
+os.environ.setdefault("PHONEPE_WARMUP", "0")
+os.environ.setdefault("PHONEPE_PREFETCH_WORKERS", "0")
@@ -0,0 +1,158 @@
+import time
+
+import pandas as pd
+
+import cache
+import db
+from cache import DataVersions, DerivedCache, ResultCache, frame_bytes, normalize_sql, tables_in
+
+SQL = "SELECT Year, SUM(Transaction_amount) AS amount FROM dbo.aggregated_transaction GROUP BY Year"
+
+
+def key(sql=SQL, values=()):
+    return ResultCache.make_key(sql, values)
+
+
+def frame(n=100):
+    return pd.DataFrame({"Year": range(n), "amount": [float(i) for i in range(n)]})
+
+
+# ---------- QUERY RESULTS ----------
+def test_sql_is_normalized_and_tables_found():
+    assert normalize_sql("  SELECT *\n   FROM  dbo.map_user ; ") == "SELECT * FROM dbo.map_user"
+    assert tables_in("SELECT * FROM dbo.map_user u JOIN top_user_state s ON 1 = 1") == {"map_user", "top_user_state"}
+    assert key("SELECT 1\n  FROM t;") == key("SELECT 1 FROM t")
+
+
+def test_hit_returns_a_frame_the_caller_can_modify():
+    qc = ResultCache()
+    qc.put(key(), frame())
+    out = qc.get(key())
+    out["amount"] = 0.0
+    assert qc.get(key())["amount"].sum() == frame()["amount"].sum()
+    assert qc.stats()["hits"] == 2 and qc.stats()["misses"] == 0
+
+
+def test_expired_entry_misses():
+    qc = ResultCache()
+    qc.put(key(), frame(), ttl=0.01)
+    time.sleep(0.02)
+    assert qc.get(key()) is None
+    assert qc.stats()["expired"] == 1
+
+
+def test_zero_ttl_is_not_cached():
+    qc = ResultCache()
+    qc.put(key(), frame(), ttl=0)
+    assert qc.get(key()) is None and qc.stats()["entries"] == 0
+
+
+def test_frame_over_the_budget_is_not_cached():
+    qc = ResultCache(max_bytes=frame_bytes(frame()) // 2)
+    qc.put(key(), frame())
+    assert qc.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    size = frame_bytes(frame())
+    qc = ResultCache(max_bytes=int(size * 2.5))
+    a, b, c = (key(values=(v,)) for v in "abc")
+    qc.put(a, frame())
+    qc.put(b, frame())
+    qc.get(a)                        # b is now the least recently used
+    qc.put(c, frame())
+    assert qc.get(b) is None
+    assert qc.get(a) is not None and qc.get(c) is not None
+    assert qc.stats()["evictions"] == 1 and qc.stats()["bytes"] <= qc.max_bytes
+
+
+def test_invalidate_expires_the_tables_entries():
+    qc = ResultCache()
+    qc.put(key(), frame())
+    other = key("SELECT * FROM dbo.map_user")
+    qc.put(other, frame())
+    assert qc.invalidate(["dbo.aggregated_transaction"]) == 1
+    assert qc.get(key()) is None and qc.get(other) is not None
+    assert qc.invalidate() == 1 and qc.get(other) is None
+    # still there as the stale fallback, until the LRU needs the room
+    assert qc.stats()["entries"] == 2 and qc.get_stale(other) is not None
+
+
+def test_stale_fallback_is_the_last_result_of_the_same_query(monkeypatch):
+    dv = DataVersions()
+    monkeypatch.setattr(cache, "data_versions", dv)
+    qc = ResultCache()
+    dv.update({"aggregated_transaction": {2023: "a"}})
+    old = key(SQL, (1,))
+    qc.put(old, frame(3))
+    dv.update({"aggregated_transaction": {2023: "b"}})
+    new = key(SQL, (1,))
+    assert qc.get(new) is None and len(qc.get_stale(new)) == 3
+    assert qc.get_stale(key(SQL, (2,))) is None
+    qc.put(new, frame(5))                        # replaces the old version's entry
+    assert qc.stats()["entries"] == 1 and len(qc.get_stale(new)) == 5
+    assert qc.stats()["stale_served"] == 2
+
+
+def test_quarter_refresh_keeps_other_years():
+    qc = ResultCache()
+    y2022, y2023 = key(SQL, (2022,)), key(SQL, (2023,))
+    qc.put(y2022, frame(), years=[2022])
+    qc.put(y2023, frame(), years=[2023])
+    qc.put(key(), frame())                       # all years
+    assert qc.invalidate(["aggregated_transaction"], years=[2023]) == 2
+    assert qc.get(y2022) is not None and qc.get(y2023) is None and qc.get(key()) is None
+
+
+def test_query_bound_to_one_year_records_it():
+    assert db.query_years("SELECT * FROM t WHERE Year = :year", {"year": 2023}) == [2023]
+    assert db.query_years("SELECT * FROM t WHERE (:year IS NULL OR Year = :year)", {"year": None}) is None
+    assert db.query_years("SELECT * FROM t WHERE State = :state", {"state": "goa"}) is None
+
+
+# ---------- DATA VERSIONS ----------
+def test_data_versions_report_the_changed_years():
+    dv = DataVersions()
+    assert dv.update({"map_user": {2022: "a", 2023: "b"}}) == {}          # first probe: nothing to drop
+    assert dv.update({"map_user": {2022: "a", 2023: "c", 2024: "d"}}) == {"map_user": [2023, 2024]}
+    assert dv.of(["dbo.map_user", "top_user_state"], years=[2022]) == (("map_user", ((2022, "a"),)),
+                                                                        ("top_user_state", None))
+
+
+def test_new_data_version_changes_the_key(monkeypatch):
+    dv = DataVersions()
+    monkeypatch.setattr(cache, "data_versions", dv)
+    dv.update({"aggregated_transaction": {2022: "a", 2023: "b"}})
+    before, year_2022 = key(), ResultCache.make_key(SQL, (), years=[2022])
+    dv.update({"aggregated_transaction": {2022: "a", 2023: "c"}})
+    assert key() != before
+    assert ResultCache.make_key(SQL, (), years=[2022]) == year_2022
+
+
+# ---------- DERIVED OBJECTS ----------
+def test_derived_objects_build_once_and_go_with_their_tables():
+    dc = DerivedCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"rollup": len(builds)}
+
+    assert dc.get("cube", ["aggregated_transaction"], build) == {"rollup": 1}
+    assert dc.get("cube", ["aggregated_transaction"], build) == {"rollup": 1}
+    assert dc.invalidate(["map_user"]) == 0
+    assert dc.invalidate(["aggregated_transaction"]) == 1
+    assert dc.get("cube", ["aggregated_transaction"], build) == {"rollup": 2}
+
+
+def test_derived_ttl_expires():
+    dc = DerivedCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return len(builds)
+
+    assert dc.get("k", ["map_user"], build, ttl=0.01) == 1
+    time.sleep(0.02)
+    assert dc.get("k", ["map_user"], build, ttl=0.01) == 2
@@ -0,0 +1,32 @@
+import charts
+from cache import derived
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+def test_human_format():
+    assert [charts.human_format(x) for x in (12, 1_500, 2_340_000, 7_000_000_000)] == ["12", "1.5K", "2.34M", "7.00B"]
+    assert charts.human_format_units(1_234_567) == "1.2M"
+
+
+def test_render_is_cached_on_the_chart_data(monkeypatch):
+    monkeypatch.setattr(charts, "CHART_WORKERS", 0)
+    png = charts.render("registered_users", ["goa", "kerala"], [10, 20], tables=["map_user"])
+    assert png.startswith(PNG)
+    assert charts.render("registered_users", ["goa", "kerala"], [10, 20], tables=["map_user"]) is png
+    assert charts.render("registered_users", ["goa", "kerala"], [10, 21], tables=["map_user"]) is not png
+    derived.invalidate(["map_user"])
+    assert charts.render("registered_users", ["goa", "kerala"], [10, 20], tables=["map_user"]) is not png
+
+
+def test_worker_process_renders_the_same_chart(monkeypatch):
+    args = (["samsung", "xiaomi", "vivo"], [30, 20, 10], 3)
+    inline = charts.render_bytes("brand_users", args)
+    monkeypatch.setattr(charts, "CHART_WORKERS", 1)
+    try:
+        assert charts._render("brand_users", args, charts.STYLE, "png") == inline
+        svg = charts._render("app_opens", (["goa", "Others"], [5, 1]), charts.STYLE, "svg")
+        assert svg.lstrip().startswith(b"<?xml")
+    finally:
+        charts._get_pool().shutdown()
+        charts._pool = None
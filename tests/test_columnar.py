@@ -0,0 +1,104 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import columnar
+import db
+
+
+# ---------- PARAMETERS ----------
+def test_numeric_parameters_are_cast_back_from_text():
+    sql, params = columnar.bind("SELECT TOP (?) * FROM t WHERE State = ? AND amount > ? AND Year = ?",
+                                [10, "goa", 1.5, None])
+    assert sql == "SELECT TOP (CAST(? AS BIGINT)) * FROM t WHERE State = ? AND amount > CAST(? AS FLOAT) AND Year = ?"
+    assert params == ["10", "goa", "1.5", None]
+
+
+def test_unmatched_placeholders_are_not_bound():
+    assert columnar.bind("SELECT '?' AS q WHERE Year = ?", [2023]) is None
+    assert columnar.bind("SELECT 1", []) == ("SELECT 1", [])
+
+
+# ---------- ARROW -> PANDAS ----------
+def test_decimals_come_back_as_floats():
+    schema = columnar._float_decimals(pa.schema([("State", pa.string()), ("amount", pa.decimal128(18, 2))]))
+    assert schema.field("amount").type == pa.float64() and schema.field("State").type == pa.string()
+
+
+def test_to_frame_consumes_the_batches():
+    schema = pa.schema([("State", pa.string()), ("Year", pa.int16())])
+    batches = [pa.record_batch([pa.array(["goa", "kerala"]), pa.array([2022, 2023], pa.int16())], schema=schema),
+               pa.record_batch([pa.array(["assam"]), pa.array([2024], pa.int16())], schema=schema)]
+    df = columnar.to_frame(batches, schema)
+    assert batches == []
+    assert df["State"].tolist() == ["goa", "kerala", "assam"] and df["Year"].dtype == "int16"
+
+
+# ---------- FETCH ----------
+class FakeReader:
+    def __init__(self, batches, schema, on_batch=None):
+        self.batches, self.schema, self.on_batch = batches, schema, on_batch
+
+    def __iter__(self):
+        for b in self.batches:
+            yield b
+            if self.on_batch:
+                self.on_batch()
+
+
+class FakeConn:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def arrow(monkeypatch):
+    # the columnar path over a fake arrow-odbc connection; returns the pool and a slot for the reader to serve
+    pool = db.ConnectionPool(FakeConn, size=1, ping=lambda conn: True, broken=db._arrow_broken)
+    served = {}
+    monkeypatch.setattr(db, "get_arrow_pool", lambda: pool)
+    monkeypatch.setattr(columnar, "read", lambda conn, sql, params, batch_size, timeout: served["reader"])
+    return pool, served
+
+
+def test_fetch_builds_the_frame_from_arrow_batches(arrow):
+    pool, served = arrow
+    schema = pa.schema([("State", pa.string()), ("amount", pa.float64())])
+    served["reader"] = FakeReader([pa.record_batch([pa.array(["goa"] * 3), pa.array([1.0, 2.0, 3.0])], schema=schema)
+                                   for _ in range(2)], schema)
+    df = db._fetch_arrow("SELECT State, amount FROM t", [])
+    assert len(df) == 6 and df["amount"].sum() == 12.0
+    assert pool.stats()["in_use"] == 0 and pool.stats()["discarded"] == 0
+
+
+def test_cancelled_fetch_stops_and_drops_the_connection(arrow):
+    pool, served = arrow
+    statement = db.Statement()
+    schema = pa.schema([("n", pa.int64())])
+    served["reader"] = FakeReader([pa.record_batch([pa.array([i])], schema=schema) for i in range(5)], schema,
+                                  on_batch=statement.cancel)
+    token = db._statement.set(statement)
+    try:
+        with pytest.raises(db.QueryCancelled):
+            db._fetch_arrow("SELECT n FROM t", [])
+    finally:
+        db._statement.reset(token)
+    # unread results are left on it, so it isn't handed to the next statement
+    assert pool.stats()["discarded"] == 1 and pool.stats()["open"] == 0
+
+
+def test_pool_uses_the_drivers_ping():
+    pings = []
+    pool = db.ConnectionPool(FakeConn, size=1, ping_after=0, ping=lambda conn: pings.append(conn) or False)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert pings == [first] and second is not first
+
+
+def test_without_arrow_odbc_queries_use_pyodbc_rows(monkeypatch):
+    monkeypatch.setattr(columnar, "available", lambda: False)
+    monkeypatch.setattr(db, "_fetch_arrow", lambda *a: pytest.fail("columnar path used"))
+    monkeypatch.setattr(db, "_fetch_rows", lambda qmark, values: pd.DataFrame({"n": [len(values)]}))
+    assert db._execute_sqlserver("SELECT ? AS n", [1])["n"].tolist() == [1]
@@ -0,0 +1,95 @@
+import itertools
+import random
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+import db
+from cube import CUBE_SQL, TransactionCube
+from snapshot import to_duckdb
+
+STATES = ["bihar", "goa", "kerala", "punjab", "tamil-nadu", "uttar-pradesh"]
+YEARS = [2021, 2022, 2023]
+TYPES = ["Financial Services", "Merchant payments", "Peer-to-peer payments", "Recharge & bill payments"]
+
+# the queries Scenario 1, Home and Scenario 4 ran before they were answered by the cube
+Q1 = """SELECT Year, SUM(Transaction_count) AS total_transaction_count,
+SUM(Transaction_amount) AS total_transaction_amount FROM dbo.aggregated_transaction WHERE State = :state GROUP BY Year ORDER BY Year"""
+Q2 = """SELECT Quarter, SUM(Transaction_count) AS Total_Transaction_Count,
+SUM(Transaction_amount) AS Total_Transaction_Amount FROM dbo.aggregated_transaction WHERE State = :state AND Year = :year GROUP BY Quarter ORDER BY Quarter"""
+Q3 = """SELECT Transaction_type, SUM(Transaction_count) AS Count, SUM(Transaction_amount) AS Amount
+FROM dbo.aggregated_transaction WHERE State = :state AND Year = :year GROUP BY Transaction_type"""
+Q4 = """SELECT TOP 5 State, SUM(Transaction_amount) AS Transaction_amount
+FROM dbo.aggregated_transaction WHERE Year = :year GROUP BY State ORDER BY Transaction_amount DESC"""
+MAP = """SELECT State, SUM(Transaction_amount) AS Total_Transaction_Amount
+FROM dbo.aggregated_transaction GROUP BY State ORDER BY Total_Transaction_Amount DESC"""
+YEAR_TOTALS = "SELECT Year, SUM(Transaction_amount) AS total_amount FROM dbo.aggregated_transaction GROUP BY Year"
+
+
+@pytest.fixture(scope="module")
+def con():
+    # one row per State × Year × Quarter × Transaction_type; punjab has no 2023 data
+    rng = random.Random(5)
+    rows = [(s, y, q, t, rng.randint(1, 10**6), rng.uniform(1, 10**9))
+            for s, y, q, t in itertools.product(STATES, YEARS, range(1, 5), TYPES)
+            if not (s == "punjab" and y == 2023)]
+    df = pd.DataFrame(rows, columns=["State", "Year", "Quarter", "Transaction_type",
+                                     "Transaction_count", "Transaction_amount"])
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA dbo")
+    con.execute("CREATE TABLE dbo.aggregated_transaction AS SELECT * FROM df")
+    return con
+
+
+@pytest.fixture(scope="module")
+def cube(con):
+    return TransactionCube(run(con, CUBE_SQL))
+
+
+def run(con, sql, params=None):
+    return con.execute(*to_duckdb(*db.bind_params(sql, params))).df()
+
+
+def same(got, expected, sort=None):
+    if sort:
+        got, expected = got.sort_values(sort, ignore_index=True), expected.sort_values(sort, ignore_index=True)
+    assert list(got.columns) == list(expected.columns)
+    assert len(got) == len(expected)
+    for col in got.columns:
+        if pd.api.types.is_numeric_dtype(expected[col]):
+            np.testing.assert_allclose(got[col].to_numpy(float), expected[col].to_numpy(float))
+        else:
+            assert got[col].tolist() == expected[col].tolist(), col
+
+
+def test_selectors_list_every_state_and_year(cube):
+    assert cube.states() == STATES and cube.years() == YEARS
+
+
+def test_home_map_totals(con, cube):
+    same(cube.state_totals(), run(con, MAP))
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_scenario1_state_trend(con, cube, state):
+    same(cube.state_trend(state), run(con, Q1, {"state": state}))
+
+
+@pytest.mark.parametrize("state, year", [("goa", 2022), ("kerala", 2023), ("punjab", 2023)])
+def test_scenario1_quarters_and_categories(con, cube, state, year):
+    params = {"state": state, "year": year}
+    same(cube.quarters(state, year), run(con, Q2, params))
+    same(cube.categories(state, year), run(con, Q3, params), sort="Transaction_type")
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_scenario1_top_states(con, cube, year):
+    same(cube.top_states(year, 5), run(con, Q4, {"year": year}))
+
+
+def test_scenario4_year_totals(con, cube):
+    expected = run(con, YEAR_TOTALS + " ORDER BY total_amount DESC")
+    same(cube.year_totals(), expected)
+    same(cube.year_totals(2022), expected[expected["Year"] == 2022].reset_index(drop=True))
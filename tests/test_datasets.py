@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+import cache
+import datasets
+import db
+
+
+def raw(n=40):
+    return pd.DataFrame({
+        "State": ["goa", "kerala"] * (n // 2),
+        "District": [f"district {i}" for i in range(n)],
+        "Year": [2022, 2023] * (n // 2),
+        "Quarter": [1, 2, 3, 4] * (n // 4),
+        "Pincode": ["403001"] * n,
+        "Transaction_amount": np.linspace(0, 1e9, n),
+    })
+
+
+# ---------- COMPACTION ----------
+def test_compact_downcasts_labels_and_keys():
+    df = datasets.compact(raw())
+    assert isinstance(df["State"].dtype, pd.CategoricalDtype)
+    assert df["District"].dtype == raw()["District"].dtype        # unique labels: not worth a category
+    assert (df["Year"].dtype, df["Quarter"].dtype, df["Pincode"].dtype) == (np.int16, np.int8, np.int32)
+    assert df["Transaction_amount"].dtype == np.float64
+    pd.testing.assert_frame_equal(df.drop(columns="Pincode"), raw().drop(columns="Pincode"),
+                                  check_dtype=False, check_categorical=False)
+    assert datasets.nbytes(df) < datasets.nbytes(raw())
+
+
+def test_compact_leaves_values_that_do_not_fit():
+    df = pd.DataFrame({"Year": [2023.5, 2024.0], "Pincode": [None, 403001], "Quarter": [1, 300]})
+    assert datasets.compact(df).dtypes.equals(df.dtypes)
+
+
+# ---------- SHARED FRAMES ----------
+def test_a_view_can_be_modified_without_touching_the_shared_frame():
+    shared = datasets.compact(raw())
+    v = datasets.view(shared)
+    v["Transaction_amount"] = 0.0
+    v.loc[0, "Year"] = 1999
+    assert shared["Transaction_amount"].iloc[-1] == 1e9 and shared["Year"].iloc[0] == 2022
+
+
+def test_dataset_is_loaded_once_and_reported(monkeypatch):
+    calls = []
+
+    def read_sql(sql, params=None, ttl=None, name=None):
+        calls.append((name, ttl))
+        return raw()
+
+    monkeypatch.setattr(db, "read_sql", read_sql)
+    monkeypatch.setattr(cache, "derived", cache.DerivedCache())
+    monkeypatch.setattr(datasets, "registry", datasets.Registry())
+    a = datasets.load("base", "SELECT * FROM dbo.aggregated_transaction", ["aggregated_transaction"])
+    b = datasets.load("base", "SELECT * FROM dbo.aggregated_transaction", ["aggregated_transaction"])
+    assert calls == [("base", 0)] and a is not b and a.equals(b)
+    report = datasets.report()["base"]
+    assert report["rows"] == 40 and 0 < report["saved"] < 1
+
+
+def test_read_sql_many_loads_the_compact_names_as_datasets(monkeypatch):
+    monkeypatch.setattr(datasets, "load", lambda name, sql, tables, params, years: ("dataset", name, tables))
+    monkeypatch.setattr(db, "read_sql", lambda sql, params=None, ttl=None, name=None: ("query", name))
+    out = db.read_sql_many({"brands": "SELECT user_brand FROM dbo.aggregated_user", "opens": "SELECT 1"},
+                           compact=("brands",))
+    assert out == {"brands": ("dataset", "brands", ["aggregated_user"]), "opens": ("query", "opens")}
@@ -0,0 +1,221 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import db
+
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n
+        self.alive = True
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        if not self.alive:
+            raise RuntimeError("connection lost")
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kw):
+    made = []
+
+    def connect():
+        made.append(FakeConn(len(made)))
+        return made[-1]
+
+    return db.ConnectionPool(connect, **kw), made
+
+
+# ---------- CONNECTION POOL ----------
+def test_returned_connection_is_reused():
+    pool, made = make_pool(size=2)
+    with pool.connection() as a:
+        pass
+    with pool.connection() as b:
+        assert b is a
+    s = pool.stats()
+    assert len(made) == 1 and s["created"] == 1 and s["checkouts"] == 2 and s["in_use"] == 0
+
+
+def test_checkout_waits_for_a_free_connection():
+    pool, made = make_pool(size=1, timeout=5)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, [conn]).start()
+    assert pool.acquire() is conn
+    assert len(made) == 1 and pool.stats()["max_wait"] > 0
+
+
+def test_full_pool_times_out():
+    pool, _ = make_pool(size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(db.PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["failures"] == 1
+
+
+def test_dead_idle_connection_is_replaced_after_ping():
+    pool, made = make_pool(size=1, ping_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    time.sleep(0.01)
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert len(made) == 2 and pool.stats()["discarded"] == 1
+
+
+def test_recently_used_connection_skips_the_ping():
+    pool, _ = make_pool(size=1, ping_after=60)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    assert pool.acquire() is conn
+
+
+def test_idle_connections_are_evicted():
+    pool, _ = make_pool(size=2, idle_timeout=0)
+    a, b = pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    time.sleep(0.01)
+    assert pool.evict_idle() == 2
+    assert a.closed and b.closed
+    s = pool.stats()
+    assert s["evicted"] == 2 and s["open"] == 0
+
+
+def test_error_in_the_block_returns_the_connection():
+    pool, made = make_pool(size=1)
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("bad query")
+    s = pool.stats()
+    assert s["idle"] == 1 and s["discarded"] == 0 and not made[0].closed
+
+
+def test_broken_connection_frees_its_slot():
+    pool, made = make_pool(size=1, timeout=0.05)
+    conn = pool.acquire()
+    pool.release(conn, broken=True)
+    assert conn.closed and pool.acquire() is not conn
+    assert pool.stats()["discarded"] == 1
+
+
+def test_failed_connect_frees_its_slot():
+    def connect():
+        raise OSError("server down")
+
+    pool = db.ConnectionPool(connect, size=1, timeout=0.05)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.acquire()
+    assert pool.stats()["open"] == 0
+
+
+# ---------- PARAMETERIZED QUERIES ----------
+def test_named_parameters_become_placeholders_in_order():
+    qmark, names = db.compile_sql("SELECT * FROM t WHERE State = :state AND (:year IS NULL OR Year = :year)")
+    assert qmark == "SELECT * FROM t WHERE State = ? AND (? IS NULL OR Year = ?)"
+    assert names == ("state", "year", "year")
+
+
+def test_casts_and_literals_are_not_parameters():
+    sql = "SELECT CAST(x AS INT)::text, '10:30' AS t FROM t WHERE a = :a"
+    assert db.compile_sql(sql) == ("SELECT CAST(x AS INT)::text, '10:30' AS t FROM t WHERE a = ?", ("a",))
+
+
+def test_bind_params_orders_values_and_unwraps_numpy():
+    qmark, values = db.bind_params("SELECT 1 WHERE y = :year AND s = :state AND q = :year",
+                                   {"state": "goa", "year": np.int64(2023), "unused": 1})
+    assert qmark == "SELECT 1 WHERE y = ? AND s = ? AND q = ?"
+    assert values == [2023, "goa", 2023] and type(values[0]) is int
+
+
+def test_missing_parameter_is_an_error():
+    with pytest.raises(ValueError, match="state"):
+        db.bind_params("SELECT 1 WHERE s = :state AND y = :year", {"year": 2023})
+
+
+def test_statement_cursor_is_reused_per_sql_shape(monkeypatch):
+    class Conn(FakeConn):
+        def cursor(self):
+            return FakeConn(self.n)
+
+    monkeypatch.setattr(db, "STATEMENTS_PER_CONN", 2)
+    pool = db.ConnectionPool(lambda: Conn(0), size=1)
+    conn = pool.acquire()
+    a = pool.statement(conn, "SELECT ?")
+    assert pool.statement(conn, "SELECT ?") is a
+    b = pool.statement(conn, "SELECT ?, ?")
+    pool.statement(conn, "SELECT ?, ?, ?")        # over the limit: the least recently used goes
+    assert a.closed and not b.closed
+    assert pool.statement(conn, "SELECT ?") is not a
+
+
+# ---------- CONCURRENT QUERIES ----------
+def test_read_sql_many_runs_the_queries_together(monkeypatch):
+    # each query waits for the other two: they only finish if all three run at once
+    barrier = threading.Barrier(3, timeout=5)
+
+    def read_sql(sql, params=None, ttl=None, name=None):
+        barrier.wait()
+        return (sql, params)
+
+    monkeypatch.setattr(db, "read_sql", read_sql)
+    out = db.read_sql_many({"c": "SELECT 3", "a": ("SELECT :x", {"x": 1}), "b": "SELECT 2"})
+    assert list(out) == ["c", "a", "b"]
+    assert out["a"] == ("SELECT :x", {"x": 1}) and out["b"] == ("SELECT 2", None)
+
+
+# ---------- DATA VERSIONS ----------
+def test_probe_reads_watermarks_and_checksums_the_other_tables(monkeypatch):
+    sqls = []
+
+    def execute(qmark):
+        sqls.append(qmark)
+        if qmark == db.WATERMARK_SQL:
+            return pd.DataFrame([("map_user", 2023, 2, "bb"), ("map_user", 2023, 1, "aa"), ("other", 2023, 1, "x")],
+                                columns=["table_name", "Year", "Quarter", "fingerprint"])
+        return pd.DataFrame([("top_user_state", 2022, 40, 123), ("top_user_state", None, 3, 7)],
+                            columns=["table_name", "Year", "n", "checksum"])
+
+    monkeypatch.setattr(db, "_probe_execute", execute)
+    assert db.probe(["map_user", "top_user_state"]) == {"map_user": {2023: "1:aa,2:bb"},
+                                                        "top_user_state": {2022: "40:123"}}
+    assert sqls == [db.WATERMARK_SQL, db.probe_sql("top_user_state")]
+
+
+def test_unreachable_database_fails_the_probe_at_once(monkeypatch):
+    calls = []
+
+    def execute(qmark):
+        calls.append(qmark)
+        raise db.PoolTimeout("no connection")
+
+    monkeypatch.setattr(db, "_probe_execute", execute)
+    with pytest.raises(db.PoolTimeout):
+        db.probe(["map_user", "top_user_state"])
+    assert calls == [db.WATERMARK_SQL]
+
+
+def test_snapshot_probe_scans_nothing(monkeypatch):
+    class Engine:
+        versions = {"map_user": {2023: "v1"}}
+
+    monkeypatch.setattr(db, "DATA_SOURCE", "snapshot")
+    monkeypatch.setattr(db.snapshot, "get_engine", lambda: Engine)
+    monkeypatch.setattr(db, "_probe_execute", None)
+    assert db.probe(["map_user", "top_user_state"]) == {"map_user": {2023: "v1"}}
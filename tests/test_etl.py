@@ -0,0 +1,143 @@
+import json
+
+import duckdb
+import pytest
+
+import etl
+import snapshot
+
+QUARTERS = [(2022, 4), (2023, 1)]
+
+
+def transaction_doc(amount):
+    return {"data": {"transactionData": [
+        {"name": "Peer-to-peer payments", "paymentInstruments": [{"type": "TOTAL", "count": 10, "amount": amount}]},
+        {"name": "Merchant payments", "paymentInstruments": [{"type": "TOTAL", "count": 5, "amount": 2.5}]},
+    ]}}
+
+
+def write(path, doc):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc))
+
+
+@pytest.fixture
+def pulse(tmp_path):
+    # a two-state, two-quarter corner of the Pulse data/ tree
+    root = tmp_path / "data"
+    for state in ("goa", "kerala"):
+        for year, quarter in QUARTERS:
+            write(root / "aggregated/transaction/country/india/state" / state / str(year) / f"{quarter}.json",
+                  transaction_doc(100.0))
+    for year, quarter in QUARTERS:
+        write(root / "top/user/country/india" / str(year) / f"{quarter}.json",
+              {"data": {"states": [{"name": "tamil nadu", "registeredUsers": 7}]}})
+    return root
+
+
+def amounts(target):
+    # {(state, year, quarter): peer-to-peer amount} of the published aggregated_transaction
+    return dict(((s, y, q), a) for s, y, q, a in duckdb.connect().execute(
+        "SELECT State, Year, Quarter, Transaction_amount FROM read_parquet(?, hive_partitioning = true) "
+        "WHERE Transaction_type = 'Peer-to-peer payments'",
+        [f"{target}/aggregated_transaction/**/*.parquet"]).fetchall())
+
+
+# ---------- PARSERS ----------
+def test_payment_parser_flattens_instruments():
+    assert etl._payments(transaction_doc(1.5), "goa", 2023, 1) == [
+        ("goa", 2023, 1, "Peer-to-peer payments", 10, 1.5),
+        ("goa", 2023, 1, "Merchant payments", 5, 2.5),
+    ]
+
+
+def test_parsers_tolerate_missing_sections():
+    for table, (_, _, parse) in etl.SOURCES.items():
+        assert parse({"data": None}, "goa", 2023, 1) == [], table
+        assert parse({}, "goa", 2023, 1) == [], table
+
+
+def test_user_parsers():
+    doc = {"data": {"usersByDevice": [{"brand": "Xiaomi", "count": 3, "percentage": 0.5}],
+                    "hoverData": {"north goa district": {"registeredUsers": 9, "appOpens": 4}}}}
+    assert etl.aggregated_user(doc, "goa", 2023, 1) == [("goa", 2023, 1, "Xiaomi", 3, 0.5)]
+    assert etl.map_user(doc, "goa", 2023, 1) == [("goa", 2023, 1, "north goa district", 9, 4)]
+
+
+def test_top_parsers_slug_country_level_names():
+    top = {"data": {"states": [{"entityName": "Andaman & Nicobar Islands", "metric": {"count": 1, "amount": 2.0}}],
+                    "pincodes": [{"entityName": 403001, "metric": {"count": 3, "amount": 4.0}}]}}
+    assert etl.SOURCES["top_state_transaction"][2](top, None, 2023, 1) == [
+        ("andaman-&-nicobar-islands", 2023, 1, 1, 2.0)]
+    assert etl.SOURCES["top_pincode_transaction"][2](top, "goa", 2023, 1) == [("goa", 2023, 1, "403001", 3, 4.0)]
+    users = {"data": {"districts": [{"name": "north goa", "registeredUsers": 5}]}}
+    assert etl.SOURCES["top_user_district"][2](users, "goa", 2023, 1) == [("goa", 2023, 1, "north goa", 5)]
+
+
+# ---------- DISCOVERY AND WATERMARKS ----------
+def test_discover_groups_files_by_partition(pulse):
+    parts = etl.discover(pulse, "aggregated_transaction")
+    assert sorted(parts) == QUARTERS
+    assert sorted(state for _, state, _, _ in parts[(2023, 1)]) == ["goa", "kerala"]
+    country = etl.discover(pulse, "top_user_state")
+    assert [state for _, state, _, _ in country[(2022, 4)]] == [None]
+
+
+def test_fingerprint_follows_content_not_mtime(pulse):
+    files = etl.discover(pulse, "aggregated_transaction")[(2023, 1)]
+    before = etl.fingerprint(pulse, files)
+    for path, *_ in files:
+        (pulse / path).touch()
+    assert etl.fingerprint(pulse, files) == before
+    write(pulse / files[0][0], transaction_doc(999.0))
+    assert etl.fingerprint(pulse, files) != before
+
+
+def test_watermark_is_the_latest_partition():
+    assert etl.watermark({"2022-4": "x", "2023-1": "y", "2022-10": "z"}) == (2023, 1)
+    assert etl.watermark({}) is None
+
+
+def test_extract_types_the_columns(pulse):
+    files = {"aggregated_transaction": [f for fs in etl.discover(pulse, "aggregated_transaction").values() for f in fs]}
+    frames, stats = etl.extract(files, workers=1)
+    df = frames["aggregated_transaction"]
+    assert list(df.columns) == etl.COLUMNS["aggregated_transaction"]
+    assert len(df) == 8 and stats["files"] == 4
+    assert str(df["Year"].dtype) == "int64" and df["Transaction_amount"].dtype.kind == "f"
+
+
+def test_worker_processes_parse_the_same_rows(pulse, monkeypatch):
+    monkeypatch.setattr(etl, "FILES_PER_TASK", 1)
+    files = {"aggregated_transaction": [f for fs in etl.discover(pulse, "aggregated_transaction").values() for f in fs]}
+    serial, _ = etl.extract(files, workers=1)
+    parallel, _ = etl.extract(files, workers=2)
+    assert parallel["aggregated_transaction"].equals(serial["aggregated_transaction"])
+
+
+# ---------- INCREMENTAL LOADS ----------
+def test_incremental_load_replaces_only_changed_partitions(pulse, tmp_path):
+    target = tmp_path / "snapshot"
+    tables = ["aggregated_transaction", "top_user_state"]
+    assert etl.run(pulse, "snapshot", target, workers=1, tables=tables) == {"aggregated_transaction": 8,
+                                                                             "top_user_state": 2}
+    first = json.loads((target / snapshot.MANIFEST).read_text())
+    assert sorted(first["partitions"]["aggregated_transaction"]) == ["2022-4", "2023-1"]
+
+    # nothing changed: nothing is parsed or published
+    assert etl.run(pulse, "snapshot", target, workers=1, tables=tables, incremental=True) == {}
+
+    # a new quarter and one changed file: only their partitions of that table are reloaded
+    write(pulse / "aggregated/transaction/country/india/state/goa/2023/2.json", transaction_doc(50.0))
+    write(pulse / "aggregated/transaction/country/india/state/kerala/2022/4.json", transaction_doc(70.0))
+    assert etl.run(pulse, "snapshot", target, workers=1, tables=tables, incremental=True) == {
+        "aggregated_transaction": 6}
+
+    manifest = json.loads((target / snapshot.MANIFEST).read_text())
+    assert manifest["previous_version"] == first["version"]
+    assert manifest["changed"] == {"aggregated_transaction": [[2022, 4], [2023, 2]]}
+    assert manifest["partitions"]["top_user_state"] == first["partitions"]["top_user_state"]
+    assert snapshot.changes(first, manifest) == [(["aggregated_transaction"], [2022, 2023])]
+
+    assert amounts(target) == {("goa", 2022, 4): 100.0, ("goa", 2023, 1): 100.0, ("goa", 2023, 2): 50.0,
+                               ("kerala", 2022, 4): 70.0, ("kerala", 2023, 1): 100.0}
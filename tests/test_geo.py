@@ -0,0 +1,79 @@
+import json
+import math
+
+import pytest
+
+import geo
+
+
+def square(x0, y0, size, n=40):
+    # a closed ring with n points per side
+    side = [i / n * size for i in range(n)]
+    pts = ([[x0 + d, y0] for d in side] + [[x0 + size, y0 + d] for d in side]
+           + [[x0 + size - d, y0 + size] for d in side] + [[x0, y0 + size - d] for d in side])
+    return pts + [pts[0]]
+
+
+# ---------- SIMPLIFICATION ----------
+def test_collinear_points_collapse_to_the_endpoints():
+    line = [(x / 10, 2 * x / 10) for x in range(11)]
+    assert geo.simplify_line(line, 0.001) == [line[0], line[-1]]
+
+
+def test_points_off_the_line_by_more_than_the_tolerance_are_kept():
+    line = [(0, 0), (1, 0.05), (2, 0), (3, 0.5), (4, 0)]
+    assert geo.simplify_line(line, 0.1) == [(0, 0), (2, 0), (3, 0.5), (4, 0)]
+    assert geo.simplify_line(line, 0.01) == line
+    assert geo.simplify_line(line[:2], 10) == line[:2]
+
+
+def test_simplified_line_stays_within_the_tolerance():
+    line = [(x / 100, math.sin(x / 7) + 0.01 * ((x * 37) % 11)) for x in range(500)]
+    for tol in (0.001, 0.01, 0.1):
+        kept = geo.simplify_line(line, tol)
+        assert kept[0] == line[0] and kept[-1] == line[-1]
+        for p in line:
+            assert min(geo._seg_dist(p, a, b) for a, b in zip(kept, kept[1:])) <= tol + 1e-12
+    assert len(geo.simplify_line(line, 0.1)) < len(geo.simplify_line(line, 0.01)) < len(line)
+
+
+def test_geojson_keeps_the_state_key_and_valid_rings():
+    gj = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"ST_NM": "Goa", "id": 1},
+         "geometry": {"type": "MultiPolygon", "coordinates": [[square(0, 0, 1)], [square(5, 5, 0.001)]]}},
+    ]}
+    out = geo.simplify_geojson(gj, 0.01)
+    (feature,) = out["features"]
+    assert feature["properties"] == {"ST_NM": "Goa"}
+    # the tiny island collapses and is dropped; the square keeps its corners
+    assert feature["geometry"]["type"] == "Polygon"
+    (ring,) = feature["geometry"]["coordinates"]
+    assert ring[0] == ring[-1] and len(ring) == 5
+
+
+def test_build_writes_every_detail_level(tmp_path):
+    source = tmp_path / "india.geojson"
+    ring = [[x + 0.003 * math.sin(i), y] for i, (x, y) in enumerate(square(70, 10, 5, n=400))]
+    ring[-1] = ring[0]
+    source.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"ST_NM": "Goa"}, "geometry": {"type": "Polygon", "coordinates": [ring]}},
+    ]}))
+    geo.build_geo_assets(source, tmp_path / "out")
+    sizes = [(tmp_path / "out" / f"india_states.{level}.geojson").stat().st_size for level in geo.TOLERANCES]
+    assert sizes == sorted(sizes, reverse=True) and sizes[0] > sizes[-1]
+
+
+def test_unknown_detail_is_an_error():
+    with pytest.raises(ValueError, match="PHONEPE_GEO_DETAIL"):
+        geo.load_geojson("tiny")
+
+
+# ---------- BUNDLED ASSETS ----------
+@pytest.mark.parametrize("level", list(geo.TOLERANCES))
+def test_bundled_boundaries_are_committed(level):
+    # the Home map only works offline with these; build them with `python geo.py`
+    path = geo.GEO_DIR / f"india_states.{level}.geojson"
+    assert path.exists(), f"{path} is missing: run `python geo.py` and commit assets/geo/"
+    gj = json.loads(path.read_text(encoding="utf-8"))
+    names = [f["properties"][geo.FEATURE_KEY] for f in gj["features"]]
+    assert len(names) == len(set(names)) >= 30
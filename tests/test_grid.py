@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+import db
+from grid import KeysetQuery
+from snapshot import to_duckdb
+
+
+@pytest.fixture(scope="module")
+def con():
+    # ids are unique; amount and name have NULLs and ties
+    rng = random.Random(7)
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA dbo")
+    con.execute("CREATE TABLE dbo.t (id INTEGER, amount INTEGER, name VARCHAR)")
+    con.executemany("INSERT INTO dbo.t VALUES (?, ?, ?)",
+                    [(i, rng.choice([None, 1, 2, 3]), rng.choice([None, "a", "b"])) for i in range(40)])
+    return con
+
+
+def run(con, sql, params):
+    return con.execute(*to_duckdb(*db.bind_params(sql, params))).df()
+
+
+def pages(con, query, size):
+    cursor, ids = None, []
+    while True:
+        df = run(con, *query.page(cursor, size))
+        page = df.head(size)
+        ids += page["id"].tolist()
+        if len(df) <= size:
+            return ids
+        cursor = query.cursor_of(page.iloc[-1])
+
+
+def test_page_sql_binds_filters_cursor_and_size():
+    q = KeysetQuery("top_user_pincode", ["State", "Pincode", "registeredUsers"], ["State", "Pincode"],
+                    "registeredUsers", descending=True, filters={"Year": 2023, "Quarter": None})
+    sql, params = q.page(("x", "y", "z"), 50)
+    assert sql.startswith("SELECT TOP (:page_rows) State, Pincode, registeredUsers FROM dbo.top_user_pincode WHERE Year = :year AND (")
+    assert "registeredUsers < :c0 OR registeredUsers IS NULL" in sql
+    assert sql.endswith("ORDER BY CASE WHEN registeredUsers IS NULL THEN 1 ELSE 0 END, registeredUsers DESC, "
+                        "CASE WHEN State IS NULL THEN 1 ELSE 0 END, State, "
+                        "CASE WHEN Pincode IS NULL THEN 1 ELSE 0 END, Pincode")
+    assert params == {"year": 2023, "c0": "x", "c1": "y", "c2": "z", "page_rows": 51}
+
+
+def test_null_cursor_values_are_not_bound():
+    q = KeysetQuery("t", ["id", "amount"], ["id"], "amount")
+    sql, params = q.page((None, 7), 10)
+    assert "amount IS NULL AND (id > :c1 OR id IS NULL)" in sql
+    assert ":c0" not in sql and "c0" not in params and params["c1"] == 7
+
+
+def test_cursor_of_maps_missing_values_to_none():
+    q = KeysetQuery("t", ["id", "amount", "name"], ["id"], "amount")
+    row = pd.Series({"id": np.int64(3), "amount": np.nan, "name": None})
+    assert q.cursor_of(row) == (None, 3)
+    # numpy scalars become Python values, which the drivers bind
+    assert all(type(v) is float for v in q.cursor_of(pd.Series({"id": np.int64(3), "amount": np.float64(2.0)})))
+
+
+@pytest.mark.parametrize("sort, descending, key, size", list(itertools.product(
+    ["amount", "name", "id"], [True, False], [["id"], ["name", "id"]], [1, 3, 7])))
+def test_pages_cover_every_row_once_in_export_order(con, sort, descending, key, size):
+    query = KeysetQuery("t", ["id", "amount", "name"], key, sort, descending)
+    ids = pages(con, query, size)
+    assert ids == run(con, *query.all())["id"].tolist()
+    assert sorted(ids) == list(range(40))
+
+
+def test_nulls_sort_last_in_both_directions(con):
+    for descending in (True, False):
+        df = run(con, *KeysetQuery("t", ["id", "amount"], ["id"], "amount", descending).all())
+        nulls = df["amount"].isna().to_numpy()
+        assert nulls.any() and not nulls[:nulls.argmax()].any() and nulls[nulls.argmax():].all()
+
+
+def test_filters_apply_to_every_page(con):
+    query = KeysetQuery("t", ["id", "amount", "name"], ["id"], "amount", True, filters={"name": "a"})
+    ids = pages(con, query, 4)
+    expected = con.execute("SELECT id FROM dbo.t WHERE name = 'a'").fetchall()
+    assert sorted(ids) == sorted(r[0] for r in expected)
@@ -0,0 +1,89 @@
+import itertools
+import random
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+import db
+from insurance_store import STORE_SQL, InsuranceStore
+from snapshot import to_duckdb
+
+STATES = ["assam", "bihar", "goa", "kerala", "ladakh", "punjab", "tamil-nadu"]
+YEARS = [2020, 2021, 2022]
+
+# the per-year rankings Scenario 3 computed before the store, as SQL
+TOP = """SELECT TOP 3 State AS state, Year AS year, SUM(insurance_count) AS total_count,
+SUM(insurance_amount) AS total_amount FROM dbo.aggregated_insurance WHERE Year = :year
+GROUP BY State, Year ORDER BY total_amount DESC"""
+BOTTOM = """SELECT TOP 5 State AS state, Year AS year, SUM(insurance_count) AS total_count,
+SUM(insurance_amount) AS total_amount FROM dbo.aggregated_insurance WHERE Year = :year
+GROUP BY State, Year HAVING SUM(insurance_amount) > 0 ORDER BY total_amount"""
+YEARLY = """SELECT Year AS year, SUM(insurance_amount) AS total_amount, SUM(insurance_count) AS total_count
+FROM dbo.aggregated_insurance WHERE (:state IS NULL OR State = :state) GROUP BY Year ORDER BY Year"""
+
+
+@pytest.fixture(scope="module")
+def con():
+    # several quarters per State × Year; ladakh has no 2020 data and only zero amounts in 2021
+    rng = random.Random(11)
+    rows = []
+    for s, y, q in itertools.product(STATES, YEARS, range(1, 5)):
+        if s == "ladakh" and y == 2020:
+            continue
+        amount = 0.0 if (s == "ladakh" and y == 2021) else rng.uniform(1, 10**8)
+        rows.append((s, y, q, rng.randint(1, 10**5), amount))
+    df = pd.DataFrame(rows, columns=["State", "Year", "Quarter", "insurance_count", "insurance_amount"])
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA dbo")
+    con.execute("CREATE TABLE dbo.aggregated_insurance AS SELECT * FROM df")
+    return con
+
+
+@pytest.fixture(scope="module")
+def store(con):
+    return InsuranceStore(run(con, STORE_SQL))
+
+
+def run(con, sql, params=None):
+    return con.execute(*to_duckdb(*db.bind_params(sql, params))).df()
+
+
+def same(got, expected):
+    assert list(got.columns) == list(expected.columns)
+    assert len(got) == len(expected)
+    for col in got.columns:
+        if pd.api.types.is_numeric_dtype(expected[col]):
+            np.testing.assert_allclose(got[col].to_numpy(float), expected[col].to_numpy(float))
+        else:
+            assert got[col].tolist() == expected[col].tolist(), col
+
+
+def test_selectors(store):
+    assert store.states() == STATES and store.years() == YEARS and store.latest_year() == 2022
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_top_states(con, store, year):
+    same(store.top(year, 3), run(con, TOP, {"year": year}))
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_bottom_states_skip_zero_amounts(con, store, year):
+    same(store.bottom(year, 5), run(con, BOTTOM, {"year": year}))
+
+
+@pytest.mark.parametrize("state", [None, "goa", "ladakh"])
+def test_yearly_trend(con, store, state):
+    same(store.yearly(state), run(con, YEARLY, {"state": state}))
+
+
+def test_unknown_state_or_year_is_empty(store):
+    assert store.yearly("atlantis").empty
+    assert store.top(1999, 3).empty and store.bottom(1999, 5).empty
+
+
+def test_columns_are_read_only(store):
+    with pytest.raises(ValueError):
+        store._amount[0] = 1
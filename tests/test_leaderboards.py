@@ -0,0 +1,76 @@
+import itertools
+import random
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+import db
+from leaderboards import LEADERBOARD_SQL, Leaderboard
+from snapshot import to_duckdb
+
+YEARS = [2021, 2022, 2023]
+DISTRICTS = [f"district {i:02d}" for i in range(40)]
+
+# the per-mode queries Scenario 4 ran before the leaderboards, with the Year filter bound
+TOP = """SELECT TOP (:n) District AS name, SUM(Transaction_amount) AS total_amount
+FROM dbo.top_district_transaction WHERE (:year IS NULL OR Year = :year)
+GROUP BY District ORDER BY total_amount DESC"""
+TREND = """SELECT Year, SUM(Transaction_amount) AS total_amount FROM dbo.top_district_transaction
+WHERE (:year IS NULL OR Year = :year) GROUP BY Year ORDER BY Year"""
+
+
+@pytest.fixture(scope="module")
+def con():
+    # several rows per District × Year (one per state and quarter); no ties in the totals
+    rng = random.Random(3)
+    rows = [(s, y, q, d, rng.uniform(1, 10**9))
+            for s, y, q, d in itertools.product(["goa", "kerala"], YEARS, range(1, 5), DISTRICTS)
+            if rng.random() < 0.8]
+    df = pd.DataFrame(rows, columns=["State", "Year", "Quarter", "District", "Transaction_amount"])
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA dbo")
+    con.execute("CREATE TABLE dbo.top_district_transaction AS SELECT * FROM df")
+    return con
+
+
+def run(con, sql, params=None):
+    return con.execute(*to_duckdb(*db.bind_params(sql, params))).df()
+
+
+@pytest.fixture(scope="module")
+def board(con):
+    # built from the compacted dataset, as build_leaderboard does
+    sql = LEADERBOARD_SQL.format(level="District", table="top_district_transaction")
+    return Leaderboard(datasets.compact(run(con, sql)).rename(columns={"District": "name"}))
+
+
+def same(got, expected):
+    assert list(got.columns) == list(expected.columns)
+    assert got.iloc[:, 0].tolist() == expected.iloc[:, 0].tolist()
+    np.testing.assert_allclose(got["total_amount"].to_numpy(float), expected["total_amount"].to_numpy(float))
+
+
+@pytest.mark.parametrize("year", [None] + YEARS)
+@pytest.mark.parametrize("n", [5, 10, 25])
+def test_top_matches_the_query(con, board, year, n):
+    same(board.top(year, n), run(con, TOP, {"n": n, "year": year}))
+
+
+@pytest.mark.parametrize("year", [None, 2022])
+def test_trend_matches_the_query(con, board, year):
+    same(board.trend(year), run(con, TREND, {"year": year}))
+
+
+def test_board_has_plain_labels_and_is_a_copy(board):
+    top = board.top(2022, 5)
+    assert not isinstance(top["name"].dtype, pd.CategoricalDtype)
+    top["total_amount"] = 0.0
+    assert board.top(2022, 5)["total_amount"].min() > 0
+
+
+def test_depth_caps_n_and_unknown_year_is_empty(board):
+    assert len(board.top(None, 100)) == board.depth and board.years() == YEARS
+    assert board.top(1999, 5).empty
@@ -0,0 +1,71 @@
+import json
+import threading
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    reg = metrics.Registry(buckets=(0.1, 1.0))
+    monkeypatch.setattr(metrics, "registry", reg)
+    return reg
+
+
+# ---------- REGISTRY ----------
+def test_histogram_buckets_are_cumulative(registry):
+    for seconds in (0.05, 0.5, 2.0):
+        registry.observe("query", {"query": "q1"}, seconds, rows=10, nbytes=100)
+    ((kind, labels, s),) = registry.series()
+    assert kind == "query" and labels == {"query": "q1"}
+    assert s["count"] == 3 and s["buckets"] == [1, 2] and s["rows"] == 30 and s["bytes"] == 300
+
+
+# ---------- PAGE RUNS ----------
+def test_page_run_collects_its_queries_and_charts():
+    with metrics.page("1. Transactions") as run:
+        metrics.record_query("trend", 0.2, rows=5, nbytes=50, cache="miss", db_seconds=0.15)
+        with metrics.chart("trend line"):
+            pass
+    assert [e["kind"] for e in run.events] == ["query", "chart"]
+    assert {e["case"] for e in run.events} == {"1. Transactions"}
+    assert run.summary["query_seconds"] == 0.2 and run.events[0]["db_seconds"] == 0.15
+    assert metrics.current_case() == "none"
+
+
+def test_queries_on_other_threads_do_not_add_to_the_page_time():
+    with metrics.page("2. Devices") as run:
+        t = threading.Thread(target=run.add_time, args=("query", 5.0))
+        t.start()
+        t.join()
+    assert run.totals["query"] == 0.0
+
+
+# ---------- EXPORT ----------
+def test_prometheus_text():
+    metrics.record_query('top "states"', 0.05, rows=7, nbytes=700, cache="hit")
+    text = metrics.prometheus_text()
+    labels = 'cache="hit",case="none",query="top \\"states\\""'
+    assert "# TYPE phonepe_query_seconds histogram" in text
+    assert f'phonepe_query_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'phonepe_query_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"phonepe_query_seconds_count{{{labels}}} 1" in text
+    assert f"phonepe_query_rows_total{{{labels}}} 7" in text
+    assert "phonepe_chart_seconds" not in text
+
+
+def test_events_json_is_one_object_per_line():
+    metrics.record_query("a", 0.01, rows=1, nbytes=8, cache="miss")
+    with metrics.chart("b"):
+        pass
+    lines = metrics.events_json().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["a", "b"]
+
+
+def test_textfile_is_replaced_atomically(tmp_path):
+    metrics.record_query("a", 0.01, rows=1, nbytes=8, cache="miss")
+    path = tmp_path / "phonepe.prom"
+    metrics.write_textfile(str(path))
+    assert path.read_text() == metrics.prometheus_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["phonepe.prom"]
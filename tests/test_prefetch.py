@@ -0,0 +1,55 @@
+import threading
+
+import cache
+import db
+import prefetch
+from cache import DerivedCache, in_background
+from prefetch import Prefetcher
+
+
+def test_neighbours_nearest_first():
+    years = ["All", 2021, 2022, 2023]
+    assert prefetch.neighbours(years, 2022) == [2023, 2021]
+    assert prefetch.neighbours(years, "All") == [2021]
+    assert prefetch.neighbours(years, 2022, n=2) == [2023, 2021, "All"]
+    assert prefetch.neighbours(years, 1999) == []
+
+
+def test_disabled_prefetcher_queues_nothing():
+    p = Prefetcher(workers=0)
+    p.submit("k", lambda: None)
+    assert p.stats()["queued"] == 0 and p.stats()["pending"] == 0
+
+
+def test_task_runs_in_the_background_once(monkeypatch):
+    monkeypatch.setattr(db, "foreground_busy", lambda: False)
+    done, seen = threading.Event(), []
+
+    def task():
+        seen.append(in_background())
+        done.set()
+
+    p = Prefetcher(workers=1)
+    p.submit("k", task)
+    assert done.wait(5)
+    assert seen == [True]
+
+
+def test_prefetched_entry_counts_one_hit():
+    dc = DerivedCache()
+    with cache.background():
+        dc.get("cube", ["aggregated_transaction"], lambda: {"rollup": 1})
+    dc.get("cube", ["aggregated_transaction"], lambda: None)
+    dc.get("cube", ["aggregated_transaction"], lambda: None)
+    s = dc.stats()
+    assert s["prefetched"] == 1 and s["prefetch_hits"] == 1 and s["builds"] == 1
+
+
+def test_queries_warm_the_compact_names_as_datasets(monkeypatch):
+    calls = []
+    monkeypatch.setattr(prefetch, "submit", lambda label, fn: fn())
+    monkeypatch.setattr(db, "read_query", lambda name, query, ttl, compact: calls.append(("dataset", name)))
+    monkeypatch.setattr(db, "read_sql", lambda sql, params, ttl, name: calls.append(("query", name)))
+    prefetch.queries("top_user", {"state": ("SELECT 1", {}), "district": ("SELECT 2", {})},
+                     compact=("district",))
+    assert calls == [("query", "state_prefetch"), ("dataset", "district")]
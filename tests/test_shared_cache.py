@@ -0,0 +1,125 @@
+import os
+import stat
+import time
+
+import pandas as pd
+import pytest
+
+import cache
+import shared_cache
+from shared_cache import DiskBackend, MemoryBackend, SharedCache, decode, encode, private_dir
+
+VERSIONS = (("aggregated_transaction", ((2022, "a"), (2023, "b"))), ("map_user", ((2023, "c"),)))
+
+
+def qkey(sql, versions=VERSIONS):
+    return sql, (), versions
+
+
+def roundtrip(value):
+    return decode(b"".join(bytes(c) for c in encode(value, 60)))
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == "memory" else DiskBackend(tmp_path / "cache")
+
+
+def test_frames_bytes_and_figures_round_trip():
+    df = pd.DataFrame({"State": pd.Categorical(["goa", "kerala"]), "Year": pd.array([2022, 2023], dtype="int16")})
+    out = roundtrip(df)
+    pd.testing.assert_frame_equal(out, df)
+    assert roundtrip(b"\x89PNG...") == b"\x89PNG..."
+    assert roundtrip({"data": [{"type": "bar"}], "layout": {}}) == {"data": [{"type": "bar"}], "layout": {}}
+
+
+def test_other_values_are_not_stored():
+    # nothing is unpickled from the tier, so only frames, bytes and JSON dicts go in
+    assert encode(object(), 60) is None
+    sc = SharedCache(MemoryBackend())
+    assert not sc.put(qkey("q"), {"a", "set"}, 60)
+    assert sc.stats()["unsupported"] == 1
+
+
+def test_unversioned_keys_are_not_shared(backend):
+    sc = SharedCache(backend)
+    key = qkey("q", (("map_user", None),))
+    assert not sc.put(key, b"x", 60)
+    assert sc.get(key) is None and sc.stats()["unversioned"] == 2
+
+
+def test_expired_entry_is_a_miss(backend):
+    sc = SharedCache(backend)
+    sc.put(qkey("q"), b"x", 0.01)
+    time.sleep(0.02)
+    assert sc.get(qkey("q")) is None and sc.stats()["expired"] == 1
+
+
+def test_invalidation_is_scoped_to_tables_and_years(backend):
+    sc = SharedCache(backend)
+    both = qkey("both")
+    y2022 = qkey("2022", (("aggregated_transaction", ((2022, "a"),)),))
+    users = qkey("users", (("map_user", ((2023, "c"),)),))
+    for key in (both, y2022, users):
+        assert sc.put(key, b"x", 60)
+
+    sc.invalidate(["aggregated_transaction"], years=[2023])
+    assert sc.get(both) is None
+    assert sc.get(y2022) == b"x" and sc.get(users) == b"x"
+
+    sc.invalidate(["dbo.Aggregated_Transaction"])
+    assert sc.get(y2022) is None and sc.get(users) == b"x"
+    # a fresh result under the new generation is shared again
+    assert sc.put(y2022, b"y", 60) and sc.get(y2022) == b"y"
+
+
+def test_invalidation_reaches_every_worker(tmp_path):
+    # two workers on one host: separate processes' backends over the same directory
+    one, two = SharedCache(DiskBackend(tmp_path / "cache")), SharedCache(DiskBackend(tmp_path / "cache"))
+    one.put(qkey("q"), b"x", 60)
+    assert two.get(qkey("q")) == b"x"
+    two.invalidate(["map_user"], years=[2023])
+    assert one.get(qkey("q")) is None
+
+
+def test_lost_generation_token_orphans_entries(tmp_path):
+    sc = SharedCache(DiskBackend(tmp_path / "cache"))
+    sc.put(qkey("q"), b"x", 60)
+    for name in os.listdir(sc.backend.gens):
+        os.unlink(sc.backend.gens / name)
+    assert sc.get(qkey("q")) is None
+
+
+def test_cache_invalidate_reaches_the_shared_tier():
+    previous = shared_cache.shared.backend
+    shared_cache.set_backend(MemoryBackend())
+    try:
+        shared_cache.put(qkey("q"), b"x", 60)
+        cache.invalidate(["map_user"], [2023])
+        assert shared_cache.get(qkey("q")) is None
+        shared_cache.put(qkey("q"), b"x", 60)
+        cache.invalidate()
+        assert shared_cache.get(qkey("q")) is None
+    finally:
+        shared_cache.set_backend(previous)
+
+
+def test_disk_budget_evicts_least_recently_used(tmp_path):
+    backend = DiskBackend(tmp_path / "cache", max_bytes=4096)
+    sc = SharedCache(backend)
+    for i in range(8):
+        sc.put(qkey(f"q{i}"), bytes(900), 60)
+    assert backend.stats()["bytes"] <= 4096 and backend.stats()["evictions"] > 0
+    assert sc.get(qkey("q7")) is not None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_cache_directory_is_private(tmp_path):
+    path = private_dir(tmp_path / "new")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o755)
+    with pytest.raises(PermissionError):
+        DiskBackend(shared)
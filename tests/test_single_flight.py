@@ -0,0 +1,110 @@
+import threading
+
+from cache import DerivedCache, SingleFlight
+
+
+def run_together(n, fn):
+    threads = [threading.Thread(target=fn) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+
+def test_followers_share_the_leaders_result():
+    sf = SingleFlight()
+    call, leader = sf.join("k")
+    others = [sf.join("k") for _ in range(3)]
+    assert leader and not any(lead for _, lead in others)
+    assert all(c is call for c, _ in others)
+
+    sf.finish(call, result=42)
+    assert call.done.is_set() and call.result == 42
+    assert sf.stats() == {"executed": 1, "coalesced": 3, "abandoned": 0, "in_flight": 0}
+
+
+def test_error_reaches_every_waiter():
+    sf = SingleFlight()
+    call, _ = sf.join("k")
+    sf.join("k")
+    sf.finish(call, error=ValueError("boom"))
+    assert isinstance(call.error, ValueError) and call.result is None
+
+
+def test_finished_key_starts_a_new_call():
+    sf = SingleFlight()
+    first, _ = sf.join("k")
+    sf.finish(first, result=1)
+    second, leader = sf.join("k")
+    assert leader and second is not first
+
+
+def test_concurrent_callers_execute_once():
+    sf = SingleFlight()
+    joined = threading.Barrier(8)
+    results, runs = [], []
+
+    def session():
+        call, leader = sf.join("k")
+        joined.wait()
+        if leader:
+            runs.append(1)
+            sf.finish(call, result="df")
+        call.done.wait(5)
+        results.append(call.result)
+        sf.leave(call)
+
+    run_together(8, session)
+    assert runs == [1] and results == ["df"] * 8
+    assert sf.stats()["coalesced"] == 7 and sf.stats()["abandoned"] == 0
+
+
+def test_last_waiter_leaving_abandons_the_call():
+    sf = SingleFlight()
+    call, _ = sf.join("k")
+    sf.join("k")
+    assert not sf.leave(call)           # someone still waits
+    assert sf.leave(call)               # nobody does: the statement can be cancelled
+    assert sf.stats()["abandoned"] == 1 and sf.stats()["in_flight"] == 0
+
+    # an abandoned call is forgotten: the next caller leads a fresh one instead of joining it
+    fresh, leader = sf.join("k")
+    assert leader and fresh is not call
+
+    # the abandoned leader finishing late doesn't disturb the new call
+    sf.finish(call, result="late")
+    assert sf.stats()["in_flight"] == 1 and not fresh.done.is_set()
+
+
+def test_leave_without_abandon_keeps_the_call():
+    sf = SingleFlight()
+    call, _ = sf.join("k")
+    assert not sf.leave(call, abandon=False)
+    follower, leader = sf.join("k")
+    assert follower is call and not leader
+
+
+def test_leave_after_finish_is_not_an_abandon():
+    sf = SingleFlight()
+    call, _ = sf.join("k")
+    sf.finish(call, result=1)
+    assert not sf.leave(call)
+    assert sf.stats()["abandoned"] == 0
+
+
+def test_derived_object_is_built_once_and_its_lock_dropped():
+    dc = DerivedCache()
+    gate = threading.Barrier(8)
+    builds, values = [], []
+
+    def build():
+        builds.append(1)
+        return {"rollup": 1}
+
+    def session():
+        gate.wait()
+        values.append(dc.get("cube", ["aggregated_transaction"], build))
+
+    run_together(8, session)
+    assert builds == [1] and len(values) == 8 and all(v is values[0] for v in values)
+    assert dc._building == {}
@@ -0,0 +1,68 @@
+import duckdb
+import pandas as pd
+import pytest
+
+import snapshot
+from snapshot import to_duckdb
+
+
+@pytest.mark.parametrize("sql, values, expected", [
+    ("SELECT TOP (?) a FROM t WHERE b = ? AND c = ? ORDER BY a", [10, "x", 2],
+     ("SELECT a FROM t WHERE b = ? AND c = ? ORDER BY a LIMIT ?", ["x", 2, 10])),
+    ("SELECT TOP ( ? ) a FROM t ORDER BY a;", [3],
+     ("SELECT a FROM t ORDER BY a LIMIT ?", [3])),
+    ("select top 5 a FROM t WHERE b = ?", ["x"],
+     ("select a FROM t WHERE b = ? LIMIT 5", ["x"])),
+    ("SELECT TOP (25) a FROM t", [],
+     ("SELECT a FROM t LIMIT 25", [])),
+    ("SELECT a FROM t WHERE b = ?", ["x"],
+     ("SELECT a FROM t WHERE b = ?", ["x"])),
+])
+def test_top_becomes_limit(sql, values, expected):
+    assert to_duckdb(sql, values) == expected
+
+
+def test_top_placeholder_binds_the_limit():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT range AS a, range % 2 AS b FROM range(20)")
+    sql, values = to_duckdb("SELECT TOP (?) a FROM t WHERE b = ? AND a > ? ORDER BY a", [3, 1, 4])
+    assert [r[0] for r in con.execute(sql, values).fetchall()] == [5, 7, 9]
+
+
+def test_engine_reads_the_published_snapshot(tmp_path):
+    df = pd.DataFrame({"State": ["goa", "goa", "kerala"], "Year": [2022, 2023, 2023], "Quarter": [4, 1, 1],
+                       "Transaction_amount": [1.0, 2.0, 4.0]})
+    tmp = tmp_path / "tmp"
+    assert snapshot.write_table(df, tmp, "aggregated_transaction") == 3
+    snapshot.publish(tmp, tmp_path / "snap", {"source": "test"})
+    assert snapshot.available(tmp_path / "snap") and not tmp.exists()
+
+    engine = snapshot.SnapshotEngine(tmp_path / "snap")
+    out = engine.read("SELECT TOP (?) State, SUM(Transaction_amount) AS amount FROM dbo.aggregated_transaction "
+                      "WHERE Year = ? GROUP BY State ORDER BY amount DESC", [1, 2023])
+    assert out.to_dict("records") == [{"State": "kerala", "amount": 4.0}]
+
+
+def test_engine_versions_come_from_the_manifest(tmp_path):
+    df = pd.DataFrame({"State": ["goa", "goa"], "Year": [2022, 2023], "Quarter": [4, 1],
+                       "Transaction_amount": [1.0, 2.0]})
+    for name, manifest in [("export", {"version": "7"}),
+                           ("etl", {"partitions": {"aggregated_transaction": {"2022-4": "ab", "2023-1": "cd"}}})]:
+        snapshot.write_table(df, tmp_path / name / "tmp", "aggregated_transaction")
+        snapshot.publish(tmp_path / name / "tmp", tmp_path / name / "snap", manifest)
+    assert snapshot.SnapshotEngine(tmp_path / "export" / "snap").versions == {
+        "aggregated_transaction": {2022: "v7", 2023: "v7"}}
+    assert snapshot.SnapshotEngine(tmp_path / "etl" / "snap").versions == {
+        "aggregated_transaction": {2022: "4:ab", 2023: "1:cd"}}
+
+
+def test_engine_streams_chunks(tmp_path):
+    df = pd.DataFrame({"State": ["goa"] * 5, "Year": [2023] * 5, "Quarter": [1, 2, 3, 4, 4],
+                       "Transaction_amount": [1.0, 2.0, 3.0, 4.0, 5.0]})
+    snapshot.write_table(df, tmp_path / "tmp", "aggregated_transaction")
+    snapshot.publish(tmp_path / "tmp", tmp_path / "snap")
+    engine = snapshot.SnapshotEngine(tmp_path / "snap")
+    chunks = list(engine.read_chunks("SELECT Transaction_amount FROM dbo.aggregated_transaction "
+                                     "WHERE Year = ? ORDER BY Transaction_amount", [2023], chunksize=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert pd.concat(chunks)["Transaction_amount"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
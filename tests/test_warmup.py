@@ -0,0 +1,54 @@
+import threading
+
+import cache
+import db
+import warmup
+from cache import DataVersions, DerivedCache
+from warmup import Warmup
+
+
+def test_run_reports_progress_and_failures(monkeypatch):
+    def boom():
+        raise ValueError("no table")
+
+    ran = []
+    monkeypatch.setattr(db, "foreground_busy", lambda: False)
+    monkeypatch.setattr(warmup, "tasks", lambda: [("a", lambda: ran.append("a")), ("b", boom),
+                                                  ("c", lambda: ran.append("c"))])
+    w = Warmup(workers=2)
+    w.run()
+    s = w.status()
+    assert sorted(ran) == ["a", "c"]
+    assert (s["state"], s["total"], s["done"], s["failed"], s["progress"]) == ("done", 3, 2, 1, 1.0)
+
+
+def test_warmed_entries_do_not_count_as_prefetched(monkeypatch):
+    dc = DerivedCache()
+    monkeypatch.setattr(db, "foreground_busy", lambda: False)
+    monkeypatch.setattr(warmup, "tasks", lambda: [("cube", lambda: dc.get("cube", ["aggregated_transaction"], dict))])
+    Warmup(workers=1).run()
+    dc.get("cube", ["aggregated_transaction"], dict)
+    s = dc.stats()
+    assert s["builds"] == 1 and s["hits"] == 1 and s["prefetched"] == 0 and s["prefetch_hits"] == 0
+
+
+def test_starts_once_per_data_version(monkeypatch):
+    dv = DataVersions()
+    monkeypatch.setattr(warmup, "data_versions", dv)
+    runs = []
+    done = threading.Semaphore(0)
+    w = Warmup(workers=1)
+    monkeypatch.setattr(w, "run", lambda generation: (runs.append(generation), done.release()))
+    dv.update({"map_user": {2023: "a"}})
+    assert w.start() and not w.start()
+    dv.update({"map_user": {2023: "b"}})
+    assert w.start()
+    assert done.acquire(timeout=5) and done.acquire(timeout=5)
+    assert sorted(runs) == [1, 2]
+
+
+def test_newer_version_supersedes_a_running_warmup():
+    w = Warmup(workers=1)
+    w._generation = 2
+    assert not w._task(1, lambda: None) and w._task(2, lambda: None)
+    assert not cache.in_background()
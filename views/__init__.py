@@ -0,0 +1,6 @@
+# =====================================================
+# 📄 PAGE MODULES
+# =====================================================
+# One module per page, each with a render() function. test.py imports a page module the first
+# time it is shown, so a page's heavy dependencies (plotly, matplotlib/seaborn) are only loaded
+# when somebody actually opens that page.
@@ -0,0 +1,69 @@
+# =====================================================
+# 🏠 HOME PAGE WITH INDIA MAP VISUALIZATION
+# =====================================================
+
+import streamlit as st
+
+import geo
+import metrics
+from cube import get_cube
+
+# DB state slugs -> ST_NM names used by the GeoJSON
+STATE_NAMES = {
+    'andaman-&-nicobar-islands': "Andaman & Nicobar",
+    'andhra-pradesh': "Andhra Pradesh",
+    'arunachal-pradesh': "Arunachal Pradesh",
+    'assam': 'Assam',
+    'bihar': 'Bihar',
+    'chandigarh': 'Chandigarh',
+    'chhattisgarh': 'Chhattisgarh',
+    'dadra-&-nagar-haveli-&-daman-&-diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'delhi': 'Delhi',
+    'goa': 'Goa',
+    'gujarat':'Gujarat',
+    'haryana': 'Haryana',
+    'himachal-pradesh': 'Himachal Pradesh',
+    'jammu-&-kashmir': 'Jammu & Kashmir',
+    'jharkhand': 'Jharkhand',
+    'karnataka': 'Karnataka',
+    'kerala': 'Kerala',
+    'ladakh':'Ladakh',
+    'madhya-pradesh': 'Madhya Pradesh',
+    'maharashtra': 'Maharashtra',
+    'manipur': 'Manipur',
+    'meghalaya': 'Meghalaya',
+    'mizoram': 'Mizoram',
+    'nagaland': 'Nagaland',
+    'odisha': 'Odisha',
+    'puducherry': 'Puducherry',
+    'punjab': 'Punjab',
+    'rajasthan': 'Rajasthan',
+    'sikkim': 'Sikkim',
+    'tamil-nadu': 'Tamil Nadu',
+    'telangana': 'Telangana',
+    'tripura': 'Tripura',
+    'uttar-pradesh': 'Uttar Pradesh',
+    'uttarakhand': 'Uttarakhand',
+    'west-bengal': 'West Bengal',
+}
+
+
+def map_frame():
+    # State wise Transaction Amount (precomputed in the transaction cube), with GeoJSON state names
+    df_map = get_cube().state_totals()
+    df_map["State"] = df_map["State"].map(lambda s: STATE_NAMES.get(s, s))
+    return df_map
+
+
+def render():
+    st.title("📱 PhonePe Pulse – Interactive Analytics Dashboard")
+    st.write("Explore India's digital transaction insights powered by PhonePe Pulse Data.")
+
+    df_map = map_frame()
+
+    # Bundled, simplified India state boundaries; the figure is cached on the map data (see geo.py)
+    st.markdown("<h3 style='text-align:Center;'>🗺 India State-wise Transaction Amount Overview</h3>", unsafe_allow_html=True)
+    with metrics.chart("state_map"):
+        fig = geo.choropleth_figure(df_map)
+        st.plotly_chart(fig, use_container_width=True)
+    st.write(df_map)
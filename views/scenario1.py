@@ -0,0 +1,201 @@
+# =====================================================
+# 1️⃣ SCENARIO 1 – DECODING TRANSACTION DYNAMICS
+# =====================================================
+
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+import metrics
+from cube import get_cube
+from fragments import fragment
+
+
+def render():
+    st.header("1️⃣ Decoding Transaction Dynamics on PhonePe")
+
+    # every Scenario 1 query is a slice of the State × Year × Quarter × Transaction_type cube
+    cube = get_cube()
+
+    State_sel = st.selectbox("Select a State", cube.states())
+
+
+
+    # Q1 — State-wise trend
+    df1 = cube.state_trend(State_sel)
+
+
+    col1, col2 = st.columns(2)
+    with col1:
+
+
+        with metrics.chart("count_trend"):
+            fig = px.line(
+                df1,
+                x="Year",
+                y="total_transaction_count",
+                markers=True,
+                title="Transaction Count Over Years",
+                )
+
+            # Customize marker and line
+            fig.update_traces(marker=dict(size=10, symbol="square", line=dict(width=2)),
+                            line=dict(width=3, color="#7E57C2"))
+
+            # Show values on hover
+            fig.update_layout(hovermode="x unified")
+
+            st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        with metrics.chart("amount_trend"):
+            fig = px.line(
+                df1,
+                x="Year",
+                y="total_transaction_amount",
+                markers=True,
+                title="Transaction Amount Over Years",
+                )
+
+            # Customize marker and line
+            fig.update_traces(marker=dict(size=10, symbol="square", line=dict(width=2)),
+                            line=dict(width=3, color="#7E57C2"))
+
+            # Show values on hover
+            fig.update_layout(hovermode="x unified")
+
+            st.plotly_chart(fig, use_container_width=True)
+
+    # Year only drives Q2–Q4: changing it reruns that section, not the state trends above
+    _year_section(State_sel)
+
+
+@fragment
+def _year_section(State_sel):
+    cube = get_cube()
+    Year_sel = st.selectbox("Select a Year", cube.years())
+
+
+    # Q2 — Quarter-wise
+    df2 = cube.quarters(State_sel, Year_sel)
+
+    df2["Quarter"] = df2["Quarter"].astype(str)
+
+
+    phonepe_colors = ["#5A31F4", "#7B4DFF", "#A78BFA", "#7E57C2"]
+
+    with metrics.chart("quarters"):
+        fig = px.bar(
+            df2,
+            x="Quarter",
+            y="Total_Transaction_Amount",
+            title="Quarter-wise Transaction Amount",
+            color="Quarter",
+            color_discrete_sequence=phonepe_colors,
+        )
+
+        # Force x-axis to show only 1,2,3,4
+        fig.update_xaxes(
+            tickmode="array",
+            tickvals=[1, 2, 3, 4],
+            ticktext=["1", "2", "3", "4"]
+        )
+
+        # Improve layout and visuals
+        fig.update_traces(marker=dict(line=dict(width=1)))
+        fig.update_layout(
+            hovermode="x unified",
+            showlegend=False
+        )
+
+        st.plotly_chart(fig, use_container_width=True)
+
+
+
+    # Q3 — Category-wise
+    df3 = cube.categories(State_sel, Year_sel)
+    df3 ["Transaction_type"] = df3["Transaction_type"].astype(str)
+
+    phonepe_colors = ["#5A31F4", "#7B4DFF", "#A78BFA", "#7E57C2"]
+
+    col3, col4 = st.columns(2)
+    with col3:
+    # Create interactive pie chart
+        with metrics.chart("category_count"):
+            fig = px.pie(
+            df3,
+            names="Transaction_type",
+            values="Count",
+            title="Category-wise Count",
+            color="Transaction_type",
+            color_discrete_sequence=phonepe_colors
+            )
+
+        # Show label + percent on the chart and detailed hover (value + percent)
+            fig.update_traces(
+            textinfo="label+percent",           # label and percentage shown on slices
+            hovertemplate="<b>%{label}</b><br>Count: %{value:,}<br>Percent: %{percent}", 
+            marker=dict(line=dict(color="white", width=1))  # white separators between slices
+            )
+
+        # Optional: make it a donut by setting hole (0.3 - 0.5)
+        # fig.update_traces(hole=0.35)
+
+            fig.update_layout(margin=dict(t=60, b=20, l=20, r=20), showlegend=True)
+
+        # Render in Streamlit
+            st.plotly_chart(fig, use_container_width=True)
+
+    df3["Transaction_type"] = df3["Transaction_type"].astype(str)
+    phonepe_colors = ["#5A31F4", "#7B4DFF", "#A78BFA", "#D8CCFF"]
+
+    with col4:
+        with metrics.chart("category_amount"):
+            fig = px.pie(
+            df3,
+            names="Transaction_type",
+            values="Amount",
+            title="Category Share Amount",
+            color="Transaction_type",
+            color_discrete_sequence=phonepe_colors
+            )
+
+            fig.update_traces(
+                textinfo="label+percent",
+                hovertemplate="<b>%{label}</b><br>Amount: %{value:,}<br>Share: %{percent}",
+                marker=dict(line=dict(color="white", width=1))
+            )
+
+            fig.update_layout(margin=dict(t=60, b=20, l=20, r=20))
+
+            st.plotly_chart(fig, use_container_width=True)
+
+
+    # Q4 — Top 5 States
+    df4 = cube.top_states(Year_sel, 5)
+    # df4: DataFrame with 'State' and 'Transaction_amount' columns (numeric)
+    df4['Transaction_amount'] = pd.to_numeric(df4['Transaction_amount'], errors='coerce').fillna(0)
+
+    phonepe_colors = ["#7E57C2", "#5E35B1", "#26C6DA", "#4E79A7", "#59A14F"]  # will cycle as needed
+
+    with metrics.chart("top_states"):
+        fig = px.bar(
+            df4,
+            x='State',
+            y='Transaction_amount',
+            text=df4['Transaction_amount'].apply(lambda v: f"{int(v):,}"),
+            title=f"Top {len(df4)} States in {Year_sel}",
+            color_discrete_sequence=phonepe_colors
+        )
+
+        fig.update_layout(
+            template='plotly_dark',          # dark background
+            xaxis_tickangle=-45,
+            margin=dict(l=40, r=20, t=60, b=120),
+            hovermode='x',
+            showlegend=True
+        )
+        fig.update_traces(hovertemplate='<b>%{x}</b><br>Amount: %{y:,}<extra></extra>',
+                        marker_line_color='black', marker_line_width=0.5, textposition='inside')
+
+        st.plotly_chart(fig, use_container_width=True)
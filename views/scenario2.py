@@ -0,0 +1,99 @@
+# =====================================================
+# 2️⃣ SCENARIO 2 – DEVICE DOMINANCE & USER ENGAGEMENT
+# =====================================================
+
+import streamlit as st
+import pandas as pd
+
+import charts
+import db
+import metrics
+
+
+QUERIES = {
+    "brands": """  
+    SELECT 
+        user_brand, 
+        SUM(user_count) AS total_users
+    FROM dbo.aggregated_user
+    GROUP BY user_brand
+    ORDER BY total_users DESC
+    """,
+    "registered": """
+    SELECT 
+        State, 
+        SUM(m_registered_Users) AS registered_users
+    FROM dbo.map_user
+    GROUP BY State
+    ORDER BY registered_users DESC
+    """,
+    "opens": """ 
+    SELECT
+        State,
+        SUM(CAST(COALESCE(m_app_Opens, 0) AS BIGINT)) AS app_opens
+    FROM dbo.map_user
+    GROUP BY State
+    ORDER BY app_opens DESC
+    """,
+}
+# user_brand labels are loaded as a shared, compacted dataset (see datasets.py)
+DATASETS = ("brands",)
+
+
+# charts are rendered off the script thread and cached as PNG bytes (see charts.py)
+def brand_users_png(df):
+    # aggregate in case query returned duplicates, sort desc
+    df = df.groupby('user_brand', as_index=False)['total_users'].sum().sort_values('total_users', ascending=False)
+
+    # choose how many brands to show (top N)
+    top_n = 20
+    df_top = df.head(top_n)
+    return charts.render("brand_users", df_top['user_brand'].tolist(), df_top['total_users'].tolist(), top_n,
+                         tables=["aggregated_user"])
+
+
+def registered_users_png(df):
+    top10 = df.sort_values('registered_users', ascending=False).head(10)
+    return charts.render("registered_users", top10['State'].tolist(), top10['registered_users'].tolist(),
+                         tables=["map_user"])
+
+
+def app_opens_png(df):
+    df = df.sort_values("app_opens", ascending=False).reset_index(drop=True)
+
+    # Top 10 + Others
+    top = df.head(10).copy()
+    others_sum = df.iloc[10:]["app_opens"].sum()
+    if others_sum > 0:
+        top = pd.concat(
+            [top, pd.DataFrame([{"State": "Others", "app_opens": others_sum}])],
+            ignore_index=True
+        )
+    return charts.render("app_opens", top["State"].tolist(), top["app_opens"].tolist(), tables=["map_user"])
+
+
+def render():
+    st.header("📱 Device Dominance & User Engagement Analysis")
+    # the three aggregates are independent – fetch them concurrently
+    frames = db.read_sql_many(QUERIES, compact=DATASETS)
+
+    df = frames["brands"]
+    if not df.empty:
+        with metrics.chart("brand_users"):
+            st.image(brand_users_png(df), use_container_width=True)
+    else:
+        st.warning("No user data available.")
+
+    df = frames["registered"]
+    if not df.empty:
+        with metrics.chart("registered_users"):
+            st.image(registered_users_png(df), use_container_width=True)
+    else:
+        st.warning("No data available.")
+
+    df = frames["opens"]
+    if not df.empty:
+        with metrics.chart("app_opens"):
+            st.image(app_opens_png(df), use_container_width=False)
+    else:
+        st.warning("No data available.")
@@ -0,0 +1,93 @@
+# =====================================================
+# 3️⃣ SCENARIO 3 – INSURANCE PENETRATION & GROWTH
+# =====================================================
+
+import streamlit as st
+import plotly.express as px
+
+import metrics
+from insurance_store import get_store
+
+
+def render():
+    st.header("🛡 Insurance Penetration & Growth Potential")
+
+
+    # --- store (State×Year aggregate, indexed once per data version, shared by all sessions) ---
+    store = get_store()
+
+    if not len(store):
+        st.warning("No insurance data available.")
+    else:
+        # selectors
+        states = ["All"] + store.states()
+        years = ["All"] + store.years()
+
+        sel_state = st.sidebar.selectbox("State", states, index=0)
+        sel_year = st.sidebar.selectbox("Year", years, index=0)
+
+        # per-year totals for the selected state (or all states): a slice of the store
+        df_time = store.yearly(None if sel_state=="All" else sel_state)
+
+        # Chart colors
+        colors = ["#7E57C2", "#26C6DA", "#4E79A7", "#59A14F"]
+
+        # Layout: two rows x two cols
+        col1, col2 = st.columns(2)
+
+        # 1) Line - total_amount over years (for selected state or aggregated)
+        with col1:
+            with metrics.chart("amount_trend"):
+                title = f"Total Insurance Amount — {'All states' if sel_state=='All' else sel_state}"
+                fig1 = px.line(df_time, x='year', y='total_amount', markers=True,
+                            title=title, labels={'year':'Year','total_amount':'Amount'},
+                            color_discrete_sequence=[colors[0]])
+                fig1.update_traces(hovertemplate='Year: %{x}<br>Amount: %{y:,.0f}<extra></extra>')
+                st.plotly_chart(fig1, use_container_width=True)
+
+        # 2) Line - total_count over years
+        with col2:
+            with metrics.chart("count_trend"):
+                title = f"Total Insurance Count — {'All states' if sel_state=='All' else sel_state}"
+                fig2 = px.line(df_time, x='year', y='total_count', markers=True,
+                            title=title, labels={'year':'Year','total_count':'Count'},
+                            color_discrete_sequence=[colors[1]])
+                fig2.update_traces(hovertemplate='Year: %{x}<br>Count: %{y:,.0f}<extra></extra>')
+                st.plotly_chart(fig2, use_container_width=True)
+
+        # Year-based rankings (bar + pie) read the store's per-year ranking for the selected year
+        if sel_year == "All":
+            # default: use the latest year available
+            use_year = store.latest_year()
+        else:
+            use_year = int(sel_year)
+
+        # 3) Bar - top states by amount
+        col3, col4 = st.columns(2)
+        with col3:
+            top_n = 10
+            df_top = store.top(use_year, top_n)
+            with metrics.chart("top_states"):
+                fig3 = px.bar(df_top, x='state', y='total_amount', title=f"Top {top_n} States by Amount — {use_year}",
+                            labels={'state':'State','total_amount':'Amount'},
+                            color_discrete_sequence=colors)
+                fig3.update_traces(hovertemplate='%{x}<br>Amount: %{y:,.0f}<extra></extra>')
+                fig3.update_layout(xaxis_tickangle=-45)
+                st.plotly_chart(fig3, use_container_width=True)
+
+        # 4) Pie - bottom 5 states (lowest total_amount)
+        with col4:
+            df_bottom = store.bottom(use_year, 5)
+            if df_bottom.empty:
+                st.info("No data for pie chart (no positive amounts).")
+            else:
+                with metrics.chart("bottom_states"):
+                    fig4 = px.pie(df_bottom, names='state', values='total_amount', hole=0.45,
+                                title=f"Bottom 5 States by Amount — {use_year}",
+                                color_discrete_sequence=px.colors.sequential.Aggrnyl)
+                    fig4.update_traces(hovertemplate='%{label}<br>Amount: %{value:,.0f} (%{percent})<extra></extra>')
+                    st.plotly_chart(fig4, use_container_width=True)
+
+        # optional: show dataframe
+        with st.expander("Show data (preview)"):
+            st.dataframe(store.preview(200))
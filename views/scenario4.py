@@ -0,0 +1,95 @@
+# =====================================================
+# 4️⃣ SCENARIO 4 – TRANSACTIONS ACROSS STATES & DISTRICTS
+# =====================================================
+
+import streamlit as st
+import plotly.express as px
+
+import grid
+import metrics
+import prefetch
+from cube import get_cube
+from leaderboards import LEVELS, get_leaderboard
+from schema import COLUMNS
+
+
+# drill-down grid of each mode's top_*_transaction table (see grid.py)
+GRIDS = {
+    mode: dict(table=f"top_{mode.lower()}_transaction", columns=COLUMNS[f"top_{mode.lower()}_transaction"],
+               key=["State", "Year", "Quarter", mode], filter_cols=["State", "Year", "Quarter"],
+               sort_cols=["Transaction_amount", "Transaction_count", mode, "State"])
+    for mode in ("District", "Pincode")
+}
+
+
+def render():
+    st.header("📌 Transaction Analysis Across States & Districts") 
+
+    PHONEPE = ["#7E57C2","#5E35B1","#26C6DA","#4E79A7","#59A14F","#EDC948","#E15759"]
+    st.sidebar.title("View")
+    mode = st.sidebar.radio("Show top by", ["Year", "State", "District", "Pincode"])
+    cube = get_cube()
+    years = ["All"] + [int(y) for y in cube.years()]
+    sel_year = st.sidebar.selectbox("Year", years, index=0)
+    # <-- removed sel_state selectbox here
+
+    top_n = st.sidebar.slider("Top Levels", 5, 25, 10)
+
+    # every mode is a slice of a precomputed leaderboard or of the cube: no query per interaction
+    year = None if sel_year == "All" else sel_year
+    if mode == "Year":
+        # aggregated_transaction totals come from the cube, no query needed
+        df_top = cube.year_totals(year)
+        df_line = cube.year_totals()
+        x_col, y_col = 'Year','total_amount'
+
+    elif mode == "State":
+        # the yearly aggregated_transaction trend comes from the cube
+        df_top = get_leaderboard("State").top(year, top_n)
+        df_line = cube.year_totals(year)
+        x_col, y_col = 'name','total_amount'
+
+    else:  # District / Pincode: top N and the yearly trend of the same table
+        board = get_leaderboard(mode)
+        df_top = board.top(year, top_n)
+        df_line = board.trend(year)
+        x_col, y_col = 'name','total_amount'
+
+    # build the other modes' leaderboards while this one is on screen (see prefetch.py)
+    for level in LEVELS:
+        if level != mode:
+            prefetch.submit(("leaderboard", level), lambda level=level: get_leaderboard(level))
+
+    if df_top.empty:
+        st.warning("No data for selection.")
+    else:
+        # Bar (top N)
+        with metrics.chart("top_bar"):
+            fig_bar = px.bar(df_top.head(top_n), x=x_col, y=y_col, color=x_col,
+                            color_discrete_sequence=PHONEPE, title=f"Top {top_n} {mode}s by Amount",
+                            labels={x_col:mode, y_col:"Amount"})
+            fig_bar.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
+            fig_bar.update_traces(hovertemplate='%{x}<br>Amount: %{y:,.0f}')
+            st.plotly_chart(fig_bar, use_container_width=True)
+
+        # Pie (share of top N)
+        with metrics.chart("top_share"):
+            fig_pie = px.pie(df_top.head(top_n), names=x_col, values=y_col, hole=0.45,
+                            color_discrete_sequence=PHONEPE, title=f"Share — Top {top_n}")
+            fig_pie.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+        # Line (trend over years)
+        if not df_line.empty:
+            with metrics.chart("trend"):
+                fig_line = px.line(df_line.sort_values('Year'), x='Year', y='total_amount', markers=True,
+                                color_discrete_sequence=[PHONEPE[0]], title=f"Trend — Amount over Years")
+                fig_line.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+                fig_line.update_traces(hovertemplate='Year: %{x}<br>Amount: %{y:,.0f}')
+                st.plotly_chart(fig_line, use_container_width=True)
+
+    # full drill-down over the underlying rows, a page at a time (see grid.py)
+    if mode in GRIDS:
+        with st.expander(f"🔎 Browse all {mode.lower()} rows"):
+            grid.drilldown(**GRIDS[mode])
@@ -0,0 +1,201 @@
+# =====================================================
+# 5️⃣ SCENARIO 5 – USER REGISTRATION ANALYSIS
+# =====================================================
+
+import streamlit as st
+import plotly.express as px
+
+import db
+import grid
+import metrics
+import prefetch
+from cache import LOOKUP_TTL
+from fragments import fragment
+from schema import COLUMNS
+
+
+# drill-down grid over every pincode registration row (see grid.py)
+GRID = dict(table="top_user_pincode", columns=COLUMNS["top_user_pincode"], key=["State", "Year", "Quarter", "Pincode"],
+            filter_cols=["State", "Year", "Quarter"], sort_cols=["registeredUsers", "Pincode", "State"])
+
+
+# Helper to safely get distinct filter values from DB tables (if present)
+# (table/column are identifiers and can't be bound – only call this with constants)
+def get_distinct_values(table, col):
+    try:
+        q = f"SELECT DISTINCT {col} FROM {table} ORDER BY {col} DESC"
+        return [r[0] for r in db.read_sql(q, ttl=LOOKUP_TTL, name=f"distinct_{col.lower()}").values.tolist()]
+    except Exception:
+        return []
+
+
+def filter_values():
+    # available years/quarters of the sidebar filters (fallback to empty lists)
+    return (get_distinct_values("dbo.top_user_state", "Year"),
+            get_distinct_values("dbo.top_user_state", "Quarter"))
+
+
+def top_user_queries(year=None, quarter=None):
+    # {name: (sql, params)} for the three top_user_* top-10 lists, filtered by Year / Quarter when
+    # given (values are bound as :year / :quarter parameters, never pasted into the SQL)
+    clauses = []
+    if year is not None:
+        clauses.append("Year = :year")
+    if quarter is not None:
+        clauses.append("Quarter = :quarter")
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    params = {"year": year, "quarter": quarter}
+
+    q_state = f"""
+    SELECT TOP 10 State, SUM(registeredUsers) AS total_users
+    FROM dbo.top_user_state
+    {where}
+    GROUP BY State
+    ORDER BY total_users DESC
+    """
+    q_district = f"""
+    SELECT TOP 10 District, SUM(registeredUsers) AS total_users
+    FROM dbo.top_user_district
+    {where}
+    GROUP BY District
+    ORDER BY total_users DESC
+    """
+    q_pincode = f"""
+    SELECT TOP 10 Pincode, SUM(registeredUsers) AS total_users
+    FROM dbo.top_user_pincode
+    {where}
+    GROUP BY Pincode
+    ORDER BY total_users DESC
+    """
+    return {"state": (q_state, params), "district": (q_district, params), "pincode": (q_pincode, params)}
+
+
+# the District and Pincode lists are loaded as shared, compacted datasets (see datasets.py)
+DATASETS = ("district", "pincode")
+
+
+def render():
+    st.header("🧑‍🤝‍🧑 User Registration Analysis")
+
+    # ----- COLORS & STYLE -----
+    PHONEPE = ["#7E57C2","#5E35B1","#26C6DA","#4E79A7","#59A14F","#EDC948","#E15759"]
+
+
+    # Sidebar: Year / Quarter / None radio (left side)
+    filter_mode = st.sidebar.radio("Filter by", ["None", "Year", "Quarter"], index=0)
+
+    available_years, available_quarters = filter_values()
+
+    # Choose actual filter value if requested
+    selected_year = None
+    selected_quarter = None
+    if filter_mode == "Year" and available_years:
+        selected_year = st.sidebar.selectbox("Select Year", ["All"] + available_years, index=0)
+    elif filter_mode == "Quarter" and available_quarters:
+        selected_quarter = st.sidebar.selectbox("Select Quarter", ["All"] + available_quarters, index=0)
+
+    year = None if selected_year in (None, "All") else selected_year
+    quarter = None if selected_quarter in (None, "All") else selected_quarter
+
+    # ------------------------------
+    # Queries – the three top_user_* tables are independent, fetch them concurrently
+    # ------------------------------
+    frames = db.read_sql_many(top_user_queries(year, quarter), compact=DATASETS)
+
+    # warm the adjacent filter values while this one is on screen (see prefetch.py)
+    if filter_mode == "Year" and available_years:
+        for y in prefetch.neighbours(["All"] + available_years, selected_year):
+            prefetch.queries("top_user", top_user_queries(year=None if y == "All" else y), compact=DATASETS)
+    elif filter_mode == "Quarter" and available_quarters:
+        for q in prefetch.neighbours(["All"] + available_quarters, selected_quarter):
+            prefetch.queries("top_user", top_user_queries(quarter=None if q == "All" else q), compact=DATASETS)
+    df_state, df_district, df_pincode = frames["state"], frames["district"], frames["pincode"]
+
+    # ------------------------------
+    # 1) State-wise bar chart
+    # ------------------------------
+
+    st.header("🧑‍🤝‍🧑 Registered Users — STATE WISE")
+    if not df_state.empty:
+        with metrics.chart("states"):
+            fig_state = px.bar(
+                df_state,
+                x="State",
+                y="total_users",
+                title="Top 10 States by Registered Users",
+                color="State",                     # color by state so each bar can pick from palette
+                color_discrete_sequence=PHONEPE,
+                labels={"total_users":"Registered Users", "State":"State"}
+            )
+            fig_state.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            fig_state.update_xaxes(tickangle=45)
+            st.plotly_chart(fig_state, use_container_width=True)
+
+        # selection box under state chart (reruns on its own, see _inspect)
+        _inspect("Inspect state (select to view details):", df_state, "State")
+    else:
+        st.warning("No state-level registration data available.")
+
+    # ------------------------------
+    # 2) District-wise line chart
+    # ------------------------------
+    st.header("📈 Registered Users — DISTRICT WISE (Line)")
+    if not df_district.empty:
+        # for readability: sort by total_users so the line flows by rank
+        df_district = df_district.sort_values("total_users", ascending=False).reset_index(drop=True)
+        with metrics.chart("districts"):
+            fig_district = px.line(
+                df_district,
+                x="District",
+                y="total_users",
+                markers=True,
+                title="Top 10 Districts by Registered Users (ranked)",
+                labels={"total_users":"Registered Users", "District":"District"}
+            )
+            # apply color palette cyclically to markers/lines
+            fig_district.update_traces(line=dict(color=PHONEPE[0]), marker=dict(size=8))
+            fig_district.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            fig_district.update_xaxes(tickangle=45)
+            st.plotly_chart(fig_district, use_container_width=True)
+
+        # selection box under district chart
+        _inspect("Inspect district (select to view details):", df_district, "District")
+    else:
+        st.warning("No district-level registration data available.")
+
+    # ------------------------------
+    # 3) Pincode-wise pie chart
+    # ------------------------------
+    st.header("🥧 Registered Users — PINCODE WISE (Pie)")
+    if not df_pincode.empty:
+        with metrics.chart("pincodes"):
+            fig_pincode = px.pie(
+                df_pincode,
+                names="Pincode",
+                values="total_users",
+                title="Top 10 Pincodes by Registered Users",
+                color_discrete_sequence=PHONEPE
+            )
+            fig_pincode.update_layout(paper_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig_pincode, use_container_width=True)
+
+        # selection box under pincode chart
+        _inspect("Inspect pincode (select to view details):", df_pincode, "Pincode")
+    else:
+        st.warning("No pincode-level registration data available.")
+
+    # ------------------------------
+    # 4) Pincode drill-down – every row, a page at a time (see grid.py)
+    # ------------------------------
+    with st.expander("🔎 Browse all pincode registrations"):
+        grid.drilldown(**GRID)
+
+
+# Inspecting a row only reruns its selectbox and table; the three top_user_* queries and the
+# charts above it stay as they are.
+@fragment
+def _inspect(label, df, col):
+    values = df[col].astype(str)
+    chosen = st.selectbox(label, ["All"] + values.tolist())
+    if chosen != "All":
+        st.write(df[values == chosen].reset_index(drop=True))
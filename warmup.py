@@ -0,0 +1,167 @@
+# ===============================================
+# 🔥 WARM-UP – EVERY CASE-STUDY VIEW BEFORE THE FIRST USER ASKS
+# ===============================================
+# The selector domains are finite, so every view the dashboard can show is known in advance.
+# Home and Scenarios 1, 3 and 4 are slices of the transaction cube, the insurance store and the
+# leaderboards, so building those covers every selection. Scenario 2 is three fixed queries and
+# charts. Scenario 5 is one query set per Year/Quarter filter value. The drill-down grids open on
+# their lookups and first page. test.py calls start() on every run; the warm-up runs in the
+# background once per process and data version, i.e. with the first session after a deploy and
+# again after a refresh changed the data. Figures that are cached (the Home map, the Scenario 2
+# PNGs) are built too; charts.py renders the PNGs in its process pool.
+# The tasks run on threads rather than processes: their results have to land in this process's
+# caches. The queries themselves run in DuckDB or on SQL Server, outside the GIL.
+
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import db
+from cache import background, data_versions
+
+WARMUP = os.environ.get("PHONEPE_WARMUP", "1") == "1"
+WARMUP_WORKERS = int(os.environ.get("PHONEPE_WARMUP_WORKERS", str(os.cpu_count() or 2)))
+PATIENCE = 5.0             # seconds a task gives way to the sessions' queries before it runs anyway
+
+log = logging.getLogger("phonepe.warmup")
+
+
+# ---------- VIEWS ----------
+def tasks():
+    # -> [(label, fn)]; the views pull in plotly & co., so they're only imported here
+    import geo
+    import grid
+    from cube import get_cube
+    from insurance_store import get_store
+    from leaderboards import LEVELS, get_leaderboard
+    from views import home, scenario2, scenario4, scenario5
+
+    out = [
+        ("cube", get_cube),
+        ("insurance_store", get_store),
+        ("home:map", lambda: geo.choropleth_figure(home.map_frame())),
+    ]
+    out += [(f"scenario4:leaderboard:{level}", lambda level=level: get_leaderboard(level)) for level in LEVELS]
+    out += [(f"scenario4:grid:{mode}", lambda spec=spec: grid.warm(**spec)) for mode, spec in scenario4.GRIDS.items()]
+
+    charts = {"brands": scenario2.brand_users_png, "registered": scenario2.registered_users_png,
+              "opens": scenario2.app_opens_png}
+
+    def chart(name):
+        df = db.read_query(name, scenario2.QUERIES[name], compact=scenario2.DATASETS)
+        if not df.empty:
+            charts[name](df)
+
+    out += [(f"scenario2:{name}", lambda name=name: chart(name)) for name in charts]
+
+    years, quarters = scenario5.filter_values()
+    for f in [{}] + [{"year": y} for y in years] + [{"quarter": q} for q in quarters]:
+        for name, q in scenario5.top_user_queries(**f).items():
+            label = f"scenario5:{name}:" + (",".join(f"{k}={v}" for k, v in f.items()) or "all")
+            out.append((label, lambda name=name, q=q: db.read_query(name, q, compact=scenario5.DATASETS)))
+    out.append(("scenario5:grid", lambda: grid.warm(**scenario5.GRID)))
+    return out
+
+
+# ---------- RUNNER ----------
+class Warmup:
+    def __init__(self, workers=WARMUP_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._version = None
+        self._generation = 0
+        self._status = {"state": "idle"}
+
+    def start(self):
+        # once per data version; returns at once, the warm-up runs in a thread
+        version = sorted((t, sorted(v.items())) for t, v in data_versions.snapshot().items())
+        with self._lock:
+            if version == self._version:
+                return False
+            self._version = version
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(target=self.run, args=(generation,), name="phonepe-warmup", daemon=True).start()
+        return True
+
+    def _current(self, generation):
+        return generation is None or generation == self._generation
+
+    def _update(self, **kw):
+        with self._lock:
+            self._status.update(kw)
+
+    def _task(self, generation, fn):
+        # a newer data version makes this warm-up pointless: the next one covers it
+        if not self._current(generation):
+            return False
+        deadline = time.monotonic() + PATIENCE
+        while db.foreground_busy() and time.monotonic() < deadline:
+            time.sleep(db.WAIT_SLICE)
+        with background("warmup"):
+            fn()
+        return True
+
+    def run(self, generation=None):
+        start = time.perf_counter()
+        self._update(state="running", generation=generation, started=time.strftime("%H:%M:%S"),
+                     total=0, done=0, failed=0, seconds=None)
+        try:
+            with background("warmup"):
+                todo = tasks()
+        except Exception as e:
+            log.warning("warm-up could not enumerate the views: %s", e)
+            self._update(state="failed", seconds=round(time.perf_counter() - start, 3))
+            return
+        self._update(total=len(todo))
+        log.info("warm-up: %d views on %d workers", len(todo), self.workers)
+
+        done = failed = 0
+        step = max(1, len(todo) // 10)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="phonepe-warmup") as pool:
+            futures = {pool.submit(self._task, generation, fn): label for label, fn in todo}
+            for f in as_completed(futures):
+                try:
+                    f.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    log.warning("warm-up of %s failed: %s", futures[f], e)
+                self._update(done=done, failed=failed)
+                if (done + failed) % step == 0:
+                    log.info("warm-up: %d/%d", done + failed, len(todo))
+
+        seconds = round(time.perf_counter() - start, 3)
+        state = "done" if self._current(generation) else "superseded"
+        self._update(state=state, seconds=seconds)
+        log.info("warm-up %s: %d views in %.1fs (%d failed)", state, done, seconds, failed)
+
+    def status(self):
+        with self._lock:
+            s = dict(self._status)
+        if s.get("total"):
+            s["progress"] = round((s["done"] + s["failed"]) / s["total"], 3)
+        return s
+
+
+warmup = Warmup()
+
+
+def start():
+    if WARMUP:
+        warmup.start()
+
+
+def status():
+    return warmup.status()
+
+
+if __name__ == "__main__":
+    # `python warmup.py` warms this process once and reports progress and the total time
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    db.check_refresh(wait=None)
+    warmup.run()
+    print(status())